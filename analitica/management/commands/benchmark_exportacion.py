@@ -0,0 +1,136 @@
+"""Compara la exportación CSV por instancias con la consulta proyectada."""
+
+import csv
+import io
+import time
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from analitica.services.consultas import COLUMNAS_CSV_MENSUAL, consulta_csv_mensual
+from denuncias.models import Denuncia, ReporteCuadrilla
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el tiempo por cada 100.000 filas del CSV de denuncias generado "
+        "instanciando modelos frente a la consulta proyectada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--generar",
+            type=int,
+            default=0,
+            help=(
+                "Crea esta cantidad de denuncias sintéticas dentro de una "
+                "transacción que se revierte al terminar. Por defecto se mide "
+                "sobre las denuncias existentes."
+            ),
+        )
+        parser.add_argument("--repeticiones", type=int, default=3)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options["generar"] > 0:
+                self._generar(options["generar"])
+            # Todo el histórico, sin depender del mes en curso.
+            inicio = timezone.make_aware(datetime(1970, 1, 1))
+            fin = timezone.now() + timedelta(days=1)
+            filas = Denuncia.objects.filter(
+                fecha_creacion__gte=inicio, fecha_creacion__lt=fin
+            ).count()
+            if not filas:
+                raise CommandError("No hay denuncias; usa --generar para crear datos de prueba.")
+
+            repeticiones = max(options["repeticiones"], 1)
+            for titulo, exportar in (
+                ("Instancias + Python", self._csv_por_instancias),
+                ("Consulta proyectada", self._csv_proyectado),
+            ):
+                tiempos = []
+                for _ in range(repeticiones):
+                    comienzo = time.perf_counter()
+                    exportar(inicio, fin)
+                    tiempos.append(time.perf_counter() - comienzo)
+                mejor = min(tiempos)
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"{titulo}: n={filas} mejor={mejor:.3f} s "
+                        f"por_100k={mejor * 100_000 / filas:.3f} s"
+                    )
+                )
+            transaction.set_rollback(True)
+
+    def _generar(self, cantidad):
+        usuario_model = get_user_model()
+        jefe = usuario_model.objects.create_user(
+            username=f"benchmark_{time.time_ns()}", rol=usuario_model.Roles.JEFE_CUADRILLA
+        )
+        denuncias = Denuncia.objects.bulk_create(
+            (
+                Denuncia(
+                    usuario=jefe,
+                    descripcion=f"Benchmark {indice}",
+                    zona="" if indice % 5 == 0 else f"Zona {indice % 12}",
+                    latitud=-33.45,
+                    longitud=-70.66,
+                )
+                for indice in range(cantidad)
+            ),
+            batch_size=2000,
+        )
+        ReporteCuadrilla.objects.bulk_create(
+            (
+                ReporteCuadrilla(denuncia=denuncia, jefe_cuadrilla=jefe, comentario="ok")
+                for denuncia in denuncias[::2]
+            ),
+            batch_size=2000,
+        )
+
+    @staticmethod
+    def _csv_por_instancias(inicio, fin):
+        """Implementación anterior: una instancia por fila y formato en Python."""
+
+        writer = csv.writer(io.StringIO())
+        writer.writerow(COLUMNAS_CSV_MENSUAL)
+        queryset = (
+            Denuncia.objects.filter(fecha_creacion__gte=inicio, fecha_creacion__lt=fin)
+            .select_related("reporte_cuadrilla", "reporte_cuadrilla__jefe_cuadrilla")
+            .order_by("-fecha_creacion")
+        )
+        for denuncia in queryset:
+            reporte = getattr(denuncia, "reporte_cuadrilla", None)
+            fecha_resolucion = None
+            if reporte and reporte.fecha_reporte:
+                fecha_resolucion = timezone.localtime(reporte.fecha_reporte)
+            writer.writerow(
+                [
+                    denuncia.id,
+                    timezone.localtime(denuncia.fecha_creacion).strftime("%Y-%m-%d %H:%M"),
+                    denuncia.estado,
+                    denuncia.zona or "Sin zona",
+                    Command._tiempo_resolucion_horas(denuncia, reporte) or "",
+                    denuncia.cuadrilla_asignada or "No asignada",
+                    fecha_resolucion.strftime("%Y-%m-%d %H:%M") if fecha_resolucion else "",
+                    "SI" if reporte else "NO",
+                ]
+            )
+
+    @staticmethod
+    def _tiempo_resolucion_horas(denuncia, reporte):
+        """Cálculo por fila en Python que reemplazó la expresión ``HorasEntre``."""
+
+        if not reporte or not reporte.fecha_reporte:
+            return None
+        delta = reporte.fecha_reporte - denuncia.fecha_creacion
+        return round(delta.total_seconds() / 3600, 2)
+
+    @staticmethod
+    def _csv_proyectado(inicio, fin):
+        writer = csv.writer(io.StringIO())
+        writer.writerow(COLUMNAS_CSV_MENSUAL)
+        writer.writerows(consulta_csv_mensual(inicio, fin).iterator(chunk_size=2000))
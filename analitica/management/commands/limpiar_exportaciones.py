@@ -0,0 +1,16 @@
+"""Elimina las exportaciones en segundo plano vencidas o fallidas."""
+
+from django.core.management.base import BaseCommand
+
+from analitica.services.trabajos import limpiar_exportaciones_vencidas
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra los archivos de exportación cuyo plazo de reutilización venció "
+        "y los trabajos fallidos. Los meses cerrados no vencen."
+    )
+
+    def handle(self, *args, **options):
+        eliminados = limpiar_exportaciones_vencidas()
+        self.stdout.write(self.style.SUCCESS(f"Exportaciones eliminadas: {eliminados}."))
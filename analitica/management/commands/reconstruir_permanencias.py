@@ -0,0 +1,30 @@
+"""Recalcula la tabla de permanencias por estado de analítica."""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analitica.services.permanencia import reconstruir_permanencias
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye el tiempo que cada denuncia pasó en cada estado a partir "
+        "de HistorialEstado, con una sola consulta de ventana (LAG por denuncia)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=2000, help="Filas por inserción.")
+
+    def handle(self, *args, **options):
+        if options["lote"] <= 0:
+            raise CommandError("--lote debe ser positivo.")
+
+        inicio = time.perf_counter()
+        creadas = reconstruir_permanencias(options["lote"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Permanencias reconstruidas: {creadas} filas en "
+                f"{time.perf_counter() - inicio:.2f} s."
+            )
+        )
@@ -0,0 +1,80 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:15
+
+from django.db import migrations, models
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def poblar_resumen(apps, schema_editor):
+    """Calcula el resumen diario a partir de las denuncias existentes."""
+
+    Denuncia = apps.get_model("denuncias", "Denuncia")
+    ResumenDiario = apps.get_model("analitica", "ResumenDiario")
+    filas = (
+        Denuncia.objects.annotate(
+            fecha=TruncDate("fecha_creacion", tzinfo=timezone.get_current_timezone())
+        )
+        .values("fecha", "zona", "estado")
+        .annotate(
+            total=Count("id"),
+            con_reporte=Count("reporte_cuadrilla"),
+            cantidad_resueltas=Count("reporte_cuadrilla__fecha_reporte"),
+            suma_resolucion=Sum(
+                ExpressionWrapper(
+                    F("reporte_cuadrilla__fecha_reporte") - F("fecha_creacion"),
+                    output_field=DurationField(),
+                )
+            ),
+        )
+        .order_by()
+    )
+    ResumenDiario.objects.bulk_create(
+        [
+            ResumenDiario(
+                fecha=fila["fecha"],
+                zona=fila["zona"],
+                estado=fila["estado"],
+                total=fila["total"],
+                con_reporte=fila["con_reporte"],
+                cantidad_resueltas=fila["cantidad_resueltas"],
+                suma_horas_resolucion=(
+                    fila["suma_resolucion"].total_seconds() / 3600
+                    if fila["suma_resolucion"]
+                    else 0
+                ),
+            )
+            for fila in filas
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("denuncias", "0017_indices_filtros_panel"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('zona', models.CharField(blank=True, max_length=100)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('rechazada', 'Rechazada'), ('en_gestion', 'En gestión'), ('operativo_realizado', 'Operativo realizado'), ('finalizado', 'Finalizado')], max_length=20)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('con_reporte', models.PositiveIntegerField(default=0)),
+                ('suma_horas_resolucion', models.FloatField(default=0)),
+                ('cantidad_resueltas', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ('fecha', 'zona', 'estado'),
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'zona', 'estado'), name='resumen_diario_fecha_zona_estado_unico')],
+            },
+        ),
+        migrations.RunPython(poblar_resumen, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, Window
+from django.db.models.functions import Coalesce, Lag
+
+
+def cargar_permanencias(apps, schema_editor):
+    # Misma consulta que reconstruir_permanencias, con los modelos históricos.
+    HistorialEstado = apps.get_model("denuncias", "HistorialEstado")
+    PermanenciaEstado = apps.get_model("analitica", "PermanenciaEstado")
+    entrada = Coalesce(
+        Window(
+            Lag("fecha"),
+            partition_by=[F("denuncia_id")],
+            order_by=[F("fecha").asc(), F("id").asc()],
+        ),
+        F("denuncia__fecha_creacion"),
+    )
+    intervalos = (
+        HistorialEstado.objects.annotate(entrada=entrada)
+        .values_list("id", "denuncia_id", "estado_anterior", "entrada", "fecha")
+        .order_by()
+    )
+    nuevas = []
+    for historial_id, denuncia_id, estado, inicio, salida in intervalos.iterator(chunk_size=2000):
+        nuevas.append(
+            PermanenciaEstado(
+                historial_id=historial_id,
+                denuncia_id=denuncia_id,
+                estado=estado,
+                entrada=inicio,
+                salida=salida,
+                horas=(salida - inicio).total_seconds() / 3600,
+            )
+        )
+        if len(nuevas) >= 2000:
+            PermanenciaEstado.objects.bulk_create(nuevas)
+            nuevas = []
+    PermanenciaEstado.objects.bulk_create(nuevas)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analitica', '0002_trabajoexportacion'),
+        ('denuncias', '0021_remove_denuncia_historial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PermanenciaEstado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(max_length=50)),
+                ('entrada', models.DateTimeField()),
+                ('salida', models.DateTimeField()),
+                ('horas', models.FloatField()),
+                ('denuncia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='permanencias', to='denuncias.denuncia')),
+                ('historial', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='permanencia', to='denuncias.historialestado')),
+            ],
+            options={
+                'ordering': ('salida',),
+                'indexes': [models.Index(fields=['estado', 'salida'], name='permanencia_estado_salida_idx')],
+            },
+        ),
+        migrations.RunPython(cargar_permanencias, migrations.RunPython.noop),
+    ]
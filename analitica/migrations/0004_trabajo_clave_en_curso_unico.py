@@ -0,0 +1,38 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def descartar_duplicados_en_curso(apps, schema_editor):
+    # Deja solo el trabajo en curso más reciente por clave para que la
+    # restricción pueda crearse sobre datos existentes.
+    TrabajoExportacion = apps.get_model("analitica", "TrabajoExportacion")
+    vistos = set()
+    en_curso = TrabajoExportacion.objects.filter(
+        estado__in=["pendiente", "en_proceso"]
+    ).order_by("clave", "-fecha_creacion", "-id")
+    duplicados = []
+    for pk, clave in en_curso.values_list("id", "clave").iterator():
+        if clave in vistos:
+            duplicados.append(pk)
+        vistos.add(clave)
+    TrabajoExportacion.objects.filter(pk__in=duplicados).update(
+        estado="error", error="Trabajo duplicado descartado."
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analitica', '0003_permanenciaestado'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(descartar_duplicados_en_curso, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='trabajoexportacion',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado__in', ['pendiente', 'en_proceso'])), fields=('clave',), name='trabajo_export_clave_en_curso_unico'),
+        ),
+    ]
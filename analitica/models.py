@@ -1,3 +1,118 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+from denuncias.models import EstadoDenuncia
+
+
+class ResumenDiario(models.Model):
+    """Agregado diario de denuncias por zona y estado.
+
+    Se mantiene con señales sobre Denuncia, ReporteCuadrilla e HistorialEstado
+    y se puede reconstruir con ``manage.py reconstruir_resumen_diario``. Las
+    pantallas de analítica leen de aquí, por lo que su costo depende de la
+    cantidad de días y zonas y no del número de denuncias.
+    """
+
+    fecha = models.DateField()
+    zona = models.CharField(max_length=100, blank=True)
+    estado = models.CharField(max_length=20, choices=EstadoDenuncia.choices)
+    total = models.PositiveIntegerField(default=0)
+    con_reporte = models.PositiveIntegerField(default=0)
+    suma_horas_resolucion = models.FloatField(default=0)
+    cantidad_resueltas = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ("fecha", "zona", "estado")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["fecha", "zona", "estado"],
+                name="resumen_diario_fecha_zona_estado_unico",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.zona or 'Sin zona'} ({self.estado}): {self.total}"
+
+
+class TrabajoExportacion(models.Model):
+    """Exportación CSV generada en segundo plano y guardada en MEDIA.
+
+    ``clave`` identifica el conjunto de parámetros: una solicitud igual a un
+    trabajo vigente reutiliza su archivo hasta ``expira``.
+    """
+
+    class Estado(models.TextChoices):
+        PENDIENTE = "pendiente", "Pendiente"
+        EN_PROCESO = "en_proceso", "En proceso"
+        LISTO = "listo", "Listo"
+        ERROR = "error", "Error"
+
+    clave = models.CharField(max_length=64)
+    parametros = models.JSONField(default=dict)
+    estado = models.CharField(max_length=20, choices=Estado.choices, default=Estado.PENDIENTE)
+    archivo = models.FileField(upload_to="exportaciones/", blank=True)
+    filas = models.PositiveIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    solicitado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="trabajos_exportacion",
+    )
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+    expira = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("-fecha_creacion",)
+        indexes = [
+            models.Index(fields=["clave", "estado"], name="trabajo_export_clave_idx"),
+        ]
+        constraints = [
+            # Un solo trabajo en curso por conjunto de parámetros.
+            models.UniqueConstraint(
+                fields=["clave"],
+                condition=models.Q(estado__in=["pendiente", "en_proceso"]),
+                name="trabajo_export_clave_en_curso_unico",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Exportación #{self.pk} ({self.get_estado_display()})"
+
+
+class PermanenciaEstado(models.Model):
+    """Tiempo que una denuncia permaneció en un estado.
+
+    Cada fila corresponde a la transición de ``HistorialEstado`` que cerró el
+    intervalo: ``estado`` es el estado anterior, ``entrada`` la transición
+    previa (o la creación de la denuncia) y ``salida`` la fecha del cambio.
+    Se agrega una fila con cada transición y se puede reconstruir con
+    ``manage.py reconstruir_permanencias``.
+    """
+
+    historial = models.OneToOneField(
+        "denuncias.HistorialEstado",
+        on_delete=models.CASCADE,
+        related_name="permanencia",
+    )
+    denuncia = models.ForeignKey(
+        "denuncias.Denuncia",
+        on_delete=models.CASCADE,
+        related_name="permanencias",
+    )
+    estado = models.CharField(max_length=50)
+    entrada = models.DateTimeField()
+    salida = models.DateTimeField()
+    horas = models.FloatField()
+
+    class Meta:
+        ordering = ("salida",)
+        indexes = [
+            models.Index(fields=["estado", "salida"], name="permanencia_estado_salida_idx"),
+        ]
+
+    def __str__(self):
+        return f"Denuncia #{self.denuncia_id} en {self.estado}: {self.horas:.2f} h"
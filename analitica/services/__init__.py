@@ -1,8 +1,50 @@
 """Servicios utilitarios del módulo de analítica."""
 
-from .exportacion import generar_csv_mensual, calcular_tiempo_resolucion_horas
+from .consultas import (
+    COLUMNAS_CSV_MENSUAL,
+    HorasEntre,
+    consulta_csv_denuncias,
+    consulta_csv_mensual,
+    consulta_dataset_powerbi,
+)
+from .exportacion import (
+    ParametrosExportacion,
+    exportar_csv_denuncias,
+    generar_csv_mensual,
+    generar_csv_resumen_mensual,
+    rango_mes,
+)
+from .permanencia import (
+    Percentil,
+    percentiles_permanencia,
+    reconstruir_permanencias,
+    registrar_permanencia,
+)
+from .resumen import recalcular_buckets, reconstruir_resumen_diario
+from .trabajos import (
+    ejecutar_exportacion,
+    limpiar_exportaciones_vencidas,
+    solicitar_exportacion,
+)
 
 __all__ = [
+    "ParametrosExportacion",
+    "exportar_csv_denuncias",
     "generar_csv_mensual",
-    "calcular_tiempo_resolucion_horas",
+    "generar_csv_resumen_mensual",
+    "rango_mes",
+    "COLUMNAS_CSV_MENSUAL",
+    "HorasEntre",
+    "consulta_csv_denuncias",
+    "consulta_csv_mensual",
+    "consulta_dataset_powerbi",
+    "Percentil",
+    "percentiles_permanencia",
+    "reconstruir_permanencias",
+    "registrar_permanencia",
+    "recalcular_buckets",
+    "reconstruir_resumen_diario",
+    "solicitar_exportacion",
+    "ejecutar_exportacion",
+    "limpiar_exportaciones_vencidas",
 ]
@@ -0,0 +1,170 @@
+"""Consultas proyectadas para las exportaciones de analítica.
+
+Cada exportación pide a la base exactamente las columnas que escribe, en un
+solo ``values_list``: la hora local, los textos por defecto y las horas de
+resolución se calculan en SQL, y las filas llegan listas para el escritor
+(``csv.writer`` o el codificador JSON) sin instanciar modelos.
+"""
+
+from __future__ import annotations
+
+from django.db import NotSupportedError
+from django.db.models import (
+    BooleanField,
+    Case,
+    CharField,
+    F,
+    FloatField,
+    Func,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce, NullIf, Substr, TruncMinute, TruncSecond
+from django.utils import timezone
+
+from denuncias.models import Denuncia
+
+
+class HorasEntre(Func):
+    """Horas transcurridas entre dos fechas, redondeadas a dos decimales.
+
+    Equivale a ``round((fin - inicio).total_seconds() / 3600, 2)`` y es
+    ``NULL`` si alguna de las fechas lo es.
+    """
+
+    arity = 2
+    output_field = FloatField()
+
+    def _compilar(self, compiler, plantilla):
+        inicio, fin = self.get_source_expressions()
+        sql_inicio, params_inicio = compiler.compile(inicio)
+        sql_fin, params_fin = compiler.compile(fin)
+        # En ambas plantillas ``fin`` aparece antes que ``inicio``.
+        sql = plantilla.replace("{fin}", sql_fin).replace("{inicio}", sql_inicio)
+        return sql, (*params_fin, *params_inicio)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError(f"HorasEntre no está implementado para {connection.vendor}.")
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self._compilar(
+            compiler,
+            "ROUND((EXTRACT(EPOCH FROM ({fin} - {inicio})) / 3600)::numeric, 2)"
+            "::double precision",
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self._compilar(
+            compiler, "ROUND((julianday({fin}) - julianday({inicio})) * 24, 2)"
+        )
+
+
+def fecha_local_texto(campo: str):
+    """``AAAA-MM-DD HH:MM`` en la zona horaria local, formateado por la base."""
+
+    truncada = TruncMinute(campo, tzinfo=timezone.get_current_timezone())
+    return Substr(Cast(truncada, output_field=CharField()), 1, 16)
+
+
+def fecha_local(campo: str):
+    """Fecha convertida a la zona local en SQL (sin microsegundos)."""
+
+    return TruncSecond(campo, tzinfo=timezone.get_current_timezone())
+
+
+def texto_o_defecto(campo: str, defecto: str):
+    """El texto del campo, o ``defecto`` si está vacío o es ``NULL``."""
+
+    return Coalesce(NullIf(campo, Value("")), Value(defecto))
+
+
+COLUMNAS_CSV_MENSUAL = (
+    "id",
+    "fecha_creacion",
+    "estado",
+    "zona",
+    "tiempo_respuesta_horas",
+    "funcionario_a_cargo",
+    "fecha_resolucion",
+    "tiene_reporte_cuadrilla",
+)
+
+
+def consulta_csv_denuncias(queryset):
+    """Proyecta ``queryset`` a las filas del CSV, en el orden de ``COLUMNAS_CSV_MENSUAL``."""
+
+    return (
+        queryset.annotate(
+            exp_fecha_creacion=fecha_local_texto("fecha_creacion"),
+            exp_zona=texto_o_defecto("zona", "Sin zona"),
+            exp_horas=HorasEntre("fecha_creacion", "reporte_cuadrilla__fecha_reporte"),
+            exp_funcionario=texto_o_defecto("cuadrilla_asignada", "No asignada"),
+            exp_fecha_resolucion=fecha_local_texto("reporte_cuadrilla__fecha_reporte"),
+            exp_tiene_reporte=Case(
+                When(reporte_cuadrilla__id__isnull=True, then=Value("NO")),
+                default=Value("SI"),
+                output_field=CharField(),
+            ),
+        )
+        .order_by("-fecha_creacion")
+        .values_list(
+            "id",
+            "exp_fecha_creacion",
+            "estado",
+            "exp_zona",
+            "exp_horas",
+            "exp_funcionario",
+            "exp_fecha_resolucion",
+            "exp_tiene_reporte",
+        )
+    )
+
+
+def consulta_csv_mensual(inicio, fin):
+    """Filas del CSV para las denuncias creadas en ``[inicio, fin)``."""
+
+    return consulta_csv_denuncias(
+        Denuncia.objects.filter(fecha_creacion__gte=inicio, fecha_creacion__lt=fin)
+    )
+
+
+def consulta_dataset_powerbi(queryset):
+    """Proyecta ``queryset`` a las columnas del dataset de Power BI.
+
+    Cada fila es ``(id, fecha_creacion, fecha_actualizacion, fecha_resolucion,
+    estado, zona, latitud, longitud, tiempo_resolucion, denunciante, rol,
+    tiene_reporte, foto, comentario, jefe_cuadrilla)``.
+
+    Las fechas llegan ya convertidas a la hora local; solo la URL de la foto
+    queda para Python porque depende del almacenamiento configurado.
+    """
+
+    return queryset.annotate(
+        exp_fecha_creacion=fecha_local("fecha_creacion"),
+        exp_fecha_actualizacion=fecha_local("fecha_actualizacion"),
+        exp_fecha_resolucion=fecha_local("reporte_cuadrilla__fecha_reporte"),
+        exp_zona=texto_o_defecto("zona", "Sin zona"),
+        exp_horas=HorasEntre("fecha_creacion", "reporte_cuadrilla__fecha_reporte"),
+        exp_denunciante=Coalesce(F("usuario__username"), Value("anónimo")),
+        exp_tiene_reporte=Case(
+            When(reporte_cuadrilla__id__isnull=True, then=Value(False)),
+            default=Value(True),
+            output_field=BooleanField(),
+        ),
+    ).values_list(
+        "id",
+        "exp_fecha_creacion",
+        "exp_fecha_actualizacion",
+        "exp_fecha_resolucion",
+        "estado",
+        "exp_zona",
+        "latitud",
+        "longitud",
+        "exp_horas",
+        "exp_denunciante",
+        "reporte_cuadrilla__jefe_cuadrilla__rol",
+        "exp_tiene_reporte",
+        "reporte_cuadrilla__foto_trabajo",
+        "reporte_cuadrilla__comentario",
+        "reporte_cuadrilla__jefe_cuadrilla__username",
+    )
@@ -3,16 +3,27 @@
 from __future__ import annotations
 
 import csv
-from datetime import date, datetime, time
-from typing import Tuple
-
-from django.http import HttpResponse
+import hashlib
+import json
+from dataclasses import dataclass, replace
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterator, Tuple
+
+from django.conf import settings
+from django.db.models import Value
+from django.db.models.functions import Lower
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from analitica.models import ResumenDiario
+from denuncias.models import Denuncia, EstadoDenuncia
 
-from denuncias.models import Denuncia
+from .consultas import COLUMNAS_CSV_MENSUAL, consulta_csv_denuncias
+from .streaming import respuesta_streaming
 
 
-def _rango_mes(fecha: date) -> Tuple[datetime, datetime]:
+def rango_mes(fecha: date) -> Tuple[datetime, datetime]:
     """Retorna las fechas de inicio y término (exclusivo) del mes indicado."""
 
     fecha_base = fecha.replace(day=1)
@@ -27,67 +38,207 @@ def _rango_mes(fecha: date) -> Tuple[datetime, datetime]:
     return inicio, fin
 
 
-def calcular_tiempo_resolucion_horas(denuncia: Denuncia) -> float | None:
-    """Calcula el tiempo de resolución (en horas) para una denuncia."""
+class _Eco:
+    """Pseudo-buffer para ``csv.writer``: devuelve la línea en vez de guardarla."""
+
+    def write(self, valor: str) -> str:
+        return valor
+
+
+@dataclass(frozen=True)
+class ParametrosExportacion:
+    """Filtros del CSV de denuncias: rango de días (inclusive), zona y estado."""
+
+    desde: date
+    hasta: date
+    zona: str = ""
+    estado: str = ""
+
+    @classmethod
+    def del_mes(cls, fecha: date) -> "ParametrosExportacion":
+        inicio, fin = rango_mes(fecha)
+        return cls(desde=inicio.date(), hasta=fin.date() - timedelta(days=1))
+
+    @classmethod
+    def desde_params(cls, params) -> "ParametrosExportacion":
+        """Interpreta ``desde``/``hasta`` (AAAA-MM-DD) o ``mes`` (AAAA-MM),
+        ``zona`` y ``estado``; lanza ``ValueError`` si algún valor es inválido.
+
+        Sin fechas se exporta el mes en curso. Si falta ``desde`` se parte el
+        primer día del mes de ``hasta``; si falta ``hasta`` se llega a hoy.
+        """
+
+        zona = (params.get("zona") or "").strip()
+        estado = EstadoDenuncia.normalize(params.get("estado") or "") or ""
+        if estado and estado not in EstadoDenuncia.values:
+            raise ValueError(f"Estado desconocido: {params.get('estado')}.")
+
+        mes = params.get("mes")
+        desde = params.get("desde")
+        hasta = params.get("hasta")
+        if mes:
+            try:
+                base = cls.del_mes(datetime.strptime(mes, "%Y-%m").date())
+            except ValueError:
+                raise ValueError("mes debe tener formato AAAA-MM.")
+            return replace(base, zona=zona, estado=estado)
+        if not desde and not hasta:
+            return replace(cls.del_mes(timezone.localdate()), zona=zona, estado=estado)
+
+        fecha_hasta = cls._fecha(hasta, "hasta") if hasta else timezone.localdate()
+        fecha_desde = cls._fecha(desde, "desde") if desde else fecha_hasta.replace(day=1)
+        if fecha_desde > fecha_hasta:
+            raise ValueError("desde no puede ser posterior a hasta.")
+        return cls(desde=fecha_desde, hasta=fecha_hasta, zona=zona, estado=estado)
+
+    @staticmethod
+    def _fecha(valor: str, nombre: str) -> date:
+        try:
+            fecha = parse_date(valor)
+        except ValueError:
+            fecha = None
+        if fecha is None:
+            raise ValueError(f"{nombre} debe tener formato AAAA-MM-DD.")
+        return fecha
+
+    def rango(self) -> Tuple[datetime, datetime]:
+        """Límites ``[inicio, fin)`` en hora local del rango de días."""
+
+        tz = timezone.get_current_timezone()
+        inicio = timezone.make_aware(datetime.combine(self.desde, time.min), tz)
+        fin = timezone.make_aware(datetime.combine(self.hasta + timedelta(days=1), time.min), tz)
+        return inicio, fin
+
+    def filtrar(self, queryset):
+        inicio, fin = self.rango()
+        queryset = queryset.filter(fecha_creacion__gte=inicio, fecha_creacion__lt=fin)
+        if self.zona:
+            # Igual que en el panel: LOWER(zona) usa el índice denuncia_zona_lower_idx.
+            queryset = queryset.alias(zona_normalizada=Lower("zona")).filter(
+                zona_normalizada=Lower(Value(self.zona))
+            )
+        if self.estado:
+            queryset = queryset.filter(estado=self.estado)
+        return queryset
+
+    def como_params(self) -> Dict[str, str]:
+        """Parámetros equivalentes, aceptados de vuelta por ``desde_params``."""
+
+        return {
+            "desde": self.desde.isoformat(),
+            "hasta": self.hasta.isoformat(),
+            "zona": self.zona,
+            "estado": self.estado,
+        }
+
+    @property
+    def clave(self) -> str:
+        """Huella estable del conjunto de parámetros (zona sin distinguir mayúsculas)."""
+
+        params = self.como_params()
+        params["zona"] = params["zona"].lower()
+        contenido = json.dumps(params, sort_keys=True)
+        return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+    def mes_cerrado(self) -> bool:
+        """Indica si el rango termina antes del mes en curso."""
+
+        return self.hasta < timezone.localdate().replace(day=1)
+
+    @property
+    def nombre_archivo(self) -> str:
+        mes = ParametrosExportacion.del_mes(self.desde)
+        if (self.desde, self.hasta) == (mes.desde, mes.hasta):
+            return f"informes_microbasurales_{self.desde.strftime('%m-%Y')}.csv"
+        return (
+            f"informes_microbasurales_{self.desde.isoformat()}_{self.hasta.isoformat()}.csv"
+        )
+
+
+def iterar_csv_denuncias(parametros: ParametrosExportacion) -> Iterator[str]:
+    """Emite el CSV línea a línea, leyendo la consulta por bloques."""
 
-    reporte = getattr(denuncia, "reporte_cuadrilla", None)
-    if not reporte or not reporte.fecha_reporte:
-        return None
+    writer = csv.writer(_Eco())
+    yield writer.writerow(COLUMNAS_CSV_MENSUAL)
+    filas = consulta_csv_denuncias(parametros.filtrar(Denuncia.objects.all())).iterator(
+        chunk_size=getattr(settings, "ANALITICA_EXPORTACION_CHUNK", 2000)
+    )
+    # Las filas ya vienen formateadas desde la base; ``None`` se escribe vacío.
+    for fila in filas:
+        yield writer.writerow(fila)
 
-    delta = reporte.fecha_reporte - denuncia.fecha_creacion
-    return round(delta.total_seconds() / 3600, 2)
 
+def exportar_csv_denuncias(
+    parametros: ParametrosExportacion, request=None
+) -> StreamingHttpResponse:
+    """CSV de denuncias en streaming, comprimido si el cliente acepta gzip.
 
-def generar_csv_mensual(fecha_referencia: date | None = None) -> HttpResponse:
+    La memoria del worker no depende del largo del rango: se mantiene un
+    bloque de filas de la consulta y un bloque de salida a la vez.
+    """
+
+    return respuesta_streaming(
+        request,
+        iterar_csv_denuncias(parametros),
+        content_type="text/csv",
+        nombre_archivo=parametros.nombre_archivo,
+    )
+
+
+def generar_csv_mensual(
+    fecha_referencia: date | None = None, request=None
+) -> StreamingHttpResponse:
     """Genera el CSV correspondiente al mes solicitado (o mes actual)."""
 
     fecha_objetivo = fecha_referencia or timezone.localdate()
-    inicio, fin = _rango_mes(fecha_objetivo)
+    return exportar_csv_denuncias(ParametrosExportacion.del_mes(fecha_objetivo), request)
 
-    queryset = (
-        Denuncia.objects.filter(fecha_creacion__gte=inicio, fecha_creacion__lt=fin)
-        .select_related(
-            "reporte_cuadrilla",
-            "reporte_cuadrilla__jefe_cuadrilla",
-        )
-        .order_by("-fecha_creacion")
-    )
+
+def generar_csv_resumen_mensual(fecha_referencia: date | None = None) -> HttpResponse:
+    """Genera el CSV del resumen diario (fecha, zona, estado) del mes solicitado.
+
+    Lee la tabla ``ResumenDiario``, por lo que su costo depende de los días y
+    zonas del mes y no de la cantidad de denuncias.
+    """
+
+    fecha_objetivo = fecha_referencia or timezone.localdate()
+    inicio, fin = rango_mes(fecha_objetivo)
+
+    queryset = ResumenDiario.objects.filter(
+        fecha__gte=inicio.date(), fecha__lt=fin.date()
+    ).order_by("fecha", "zona", "estado")
 
     response = HttpResponse(content_type="text/csv")
     response["Content-Disposition"] = (
-        f"attachment; filename=informes_microbasurales_{fecha_objetivo.strftime('%m-%Y')}.csv"
+        "attachment; filename=resumen_diario_microbasurales_"
+        f"{fecha_objetivo.strftime('%m-%Y')}.csv"
     )
 
     writer = csv.writer(response)
     writer.writerow(
         [
-            "id",
-            "fecha_creacion",
-            "estado",
+            "fecha",
             "zona",
-            "tiempo_respuesta_horas",
-            "funcionario_a_cargo",
-            "fecha_resolucion",
-            "tiene_reporte_cuadrilla",
+            "estado",
+            "total_denuncias",
+            "con_reporte_cuadrilla",
+            "promedio_resolucion_horas",
         ]
     )
-
-    for denuncia in queryset:
-        reporte = getattr(denuncia, "reporte_cuadrilla", None)
-        fecha_resolucion = None
-        if reporte and reporte.fecha_reporte:
-            fecha_resolucion = timezone.localtime(reporte.fecha_reporte)
-
+    for fila in queryset:
+        promedio = (
+            round(fila.suma_horas_resolucion / fila.cantidad_resueltas, 2)
+            if fila.cantidad_resueltas
+            else ""
+        )
         writer.writerow(
             [
-                denuncia.id,
-                timezone.localtime(denuncia.fecha_creacion).strftime("%Y-%m-%d %H:%M"),
-                denuncia.estado,
-                denuncia.zona or "Sin zona",
-                calcular_tiempo_resolucion_horas(denuncia) or "",
-                denuncia.cuadrilla_asignada or "No asignada",
-                fecha_resolucion.strftime("%Y-%m-%d %H:%M") if fecha_resolucion else "",
-                "SI" if reporte else "NO",
+                fila.fecha.isoformat(),
+                fila.zona or "Sin zona",
+                fila.estado,
+                fila.total,
+                fila.con_reporte,
+                promedio,
             ]
         )
 
@@ -0,0 +1,195 @@
+"""Tiempo de permanencia de las denuncias en cada estado (``PermanenciaEstado``).
+
+Los intervalos se derivan de ``HistorialEstado``: con ``LAG(fecha)`` sobre el
+historial de cada denuncia se obtiene la entrada al estado que cierra cada
+transición, en una sola consulta. La tabla se completa fila a fila con cada
+transición, y los percentiles por zona y estado se calculan sobre ella sin
+volver a recorrer el historial.
+"""
+
+from __future__ import annotations
+
+import math
+from datetime import datetime
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from django.db import NotSupportedError, connection, transaction
+from django.db.models import Aggregate, Count, F, FloatField, Window
+from django.db.models.functions import Coalesce, Lag
+
+from analitica.models import PermanenciaEstado
+from denuncias.models import HistorialEstado
+
+PERCENTILES = (0.5, 0.9)
+
+
+class Percentil(Aggregate):
+    """Percentil continuo (``PERCENTILE_CONT``), con interpolación lineal."""
+
+    name = "Percentil"
+    output_field = FloatField()
+
+    def __init__(self, expression, fraccion: float, **extra):
+        self.fraccion = float(fraccion)
+        super().__init__(expression, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError(f"Percentil no está implementado para {connection.vendor}.")
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.get_source_expressions()[0])
+        return (
+            f"PERCENTILE_CONT(%s) WITHIN GROUP (ORDER BY {sql})",
+            (self.fraccion, *params),
+        )
+
+
+def _horas(entrada: datetime, salida: datetime) -> float:
+    return (salida - entrada).total_seconds() / 3600
+
+
+def consulta_intervalos(historial=None):
+    """Intervalos ``(historial_id, denuncia_id, estado, entrada, salida)``.
+
+    ``historial`` debe incluir el historial completo de cada denuncia: la
+    ventana necesita la transición previa para fijar la entrada.
+    """
+
+    if historial is None:
+        historial = HistorialEstado.objects.all()
+    entrada = Coalesce(
+        Window(
+            Lag("fecha"),
+            partition_by=[F("denuncia_id")],
+            order_by=[F("fecha").asc(), F("id").asc()],
+        ),
+        F("denuncia__fecha_creacion"),
+    )
+    return (
+        historial.annotate(entrada=entrada)
+        .values_list("id", "denuncia_id", "estado_anterior", "entrada", "fecha")
+        .order_by()
+    )
+
+
+def registrar_permanencia(historial: HistorialEstado) -> Optional[PermanenciaEstado]:
+    """Agrega el intervalo que cierra ``historial``; no hace nada si ya existe.
+
+    Supone que la transición es la más reciente de su denuncia, como ocurre al
+    crearla. Un historial cargado fuera de orden se corrige reconstruyendo.
+    """
+
+    if PermanenciaEstado.objects.filter(historial_id=historial.pk).exists():
+        return None
+
+    entrada = (
+        HistorialEstado.objects.filter(denuncia_id=historial.denuncia_id, id__lt=historial.pk)
+        .order_by("-fecha", "-id")
+        .values_list("fecha", flat=True)
+        .first()
+    ) or historial.denuncia.fecha_creacion
+    return PermanenciaEstado.objects.create(
+        historial=historial,
+        denuncia_id=historial.denuncia_id,
+        estado=historial.estado_anterior,
+        entrada=entrada,
+        salida=historial.fecha,
+        horas=_horas(entrada, historial.fecha),
+    )
+
+
+@transaction.atomic
+def reconstruir_permanencias(lote: int = 2000) -> int:
+    """Recalcula toda la tabla desde el historial; retorna las filas creadas."""
+
+    PermanenciaEstado.objects.all().delete()
+    creadas = 0
+    nuevas: List[PermanenciaEstado] = []
+    for historial_id, denuncia_id, estado, entrada, salida in consulta_intervalos().iterator(
+        chunk_size=lote
+    ):
+        nuevas.append(
+            PermanenciaEstado(
+                historial_id=historial_id,
+                denuncia_id=denuncia_id,
+                estado=estado,
+                entrada=entrada,
+                salida=salida,
+                horas=_horas(entrada, salida),
+            )
+        )
+        if len(nuevas) >= lote:
+            PermanenciaEstado.objects.bulk_create(nuevas)
+            creadas += len(nuevas)
+            nuevas = []
+    PermanenciaEstado.objects.bulk_create(nuevas)
+    return creadas + len(nuevas)
+
+
+def _percentil_continuo(valores: Sequence[float], fraccion: float) -> Optional[float]:
+    """Mismo cálculo que ``PERCENTILE_CONT`` sobre valores ya ordenados."""
+
+    if not valores:
+        return None
+    posicion = fraccion * (len(valores) - 1)
+    inferior = math.floor(posicion)
+    superior = math.ceil(posicion)
+    return valores[inferior] + (valores[superior] - valores[inferior]) * (posicion - inferior)
+
+
+def _clave_percentil(fraccion: float) -> str:
+    return f"p{round(fraccion * 100)}"
+
+
+def percentiles_permanencia(
+    *,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    percentiles: Iterable[float] = PERCENTILES,
+) -> List[Dict[str, object]]:
+    """Percentiles de horas en cada estado, por zona y estado.
+
+    Considera los intervalos cerrados en ``[desde, hasta)``. Retorna filas
+    ``{"zona", "estado", "total", "p50", "p90"}`` ordenadas por zona y estado.
+    En PostgreSQL el cálculo es un solo ``GROUP BY``; en otras bases (SQLite
+    en desarrollo) se recorren las horas de la tabla de permanencias.
+    """
+
+    percentiles = tuple(percentiles)
+    queryset = PermanenciaEstado.objects.all()
+    if desde:
+        queryset = queryset.filter(salida__gte=desde)
+    if hasta:
+        queryset = queryset.filter(salida__lt=hasta)
+    queryset = queryset.annotate(zona=F("denuncia__zona"))
+
+    if connection.vendor == "postgresql":
+        filas = (
+            queryset.values("zona", "estado")
+            .annotate(
+                total=Count("id"),
+                **{_clave_percentil(p): Percentil("horas", p) for p in percentiles},
+            )
+            .order_by("zona", "estado")
+        )
+        return [
+            {
+                **fila,
+                **{
+                    _clave_percentil(p): round(fila[_clave_percentil(p)], 2)
+                    for p in percentiles
+                },
+            }
+            for fila in filas
+        ]
+
+    filas = []
+    horas = queryset.values_list("zona", "estado", "horas").order_by("zona", "estado", "horas")
+    for (zona, estado), grupo in groupby(horas.iterator(), key=lambda fila: fila[:2]):
+        valores = [fila[2] for fila in grupo]
+        fila = {"zona": zona, "estado": estado, "total": len(valores)}
+        for p in percentiles:
+            fila[_clave_percentil(p)] = round(_percentil_continuo(valores, p), 2)
+        filas.append(fila)
+    return filas
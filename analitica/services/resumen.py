@@ -0,0 +1,133 @@
+"""Mantención de la tabla de resumen diario (``ResumenDiario``)."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from functools import partial
+from typing import Iterable, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from analitica.models import ResumenDiario
+from denuncias.models import Denuncia
+
+Bucket = Tuple[date, str, str]
+
+_CLAVE_RESUMEN = ["fecha", "zona", "estado"]
+_METRICAS_RESUMEN = ["total", "con_reporte", "cantidad_resueltas", "suma_horas_resolucion"]
+
+
+def _metricas():
+    return {
+        "total": Count("id"),
+        "con_reporte": Count("reporte_cuadrilla"),
+        "cantidad_resueltas": Count("reporte_cuadrilla__fecha_reporte"),
+        "suma_resolucion": Sum(
+            ExpressionWrapper(
+                F("reporte_cuadrilla__fecha_reporte") - F("fecha_creacion"),
+                output_field=DurationField(),
+            )
+        ),
+    }
+
+
+def _horas(duracion: Optional[timedelta]) -> float:
+    return duracion.total_seconds() / 3600 if duracion else 0.0
+
+
+def _rango_dia(fecha: date) -> Tuple[datetime, datetime]:
+    inicio = timezone.make_aware(datetime.combine(fecha, time.min))
+    fin = timezone.make_aware(datetime.combine(fecha + timedelta(days=1), time.min))
+    return inicio, fin
+
+
+def bucket_de(fecha_creacion: datetime, zona: str, estado: str) -> Bucket:
+    """Clave del resumen al que pertenece una denuncia."""
+
+    return timezone.localdate(fecha_creacion), zona or "", estado
+
+
+def recalcular_buckets(buckets: Iterable[Bucket]) -> None:
+    """Recalcula desde las denuncias solo las filas de resumen indicadas."""
+
+    for fecha, zona, estado in set(buckets):
+        inicio, fin = _rango_dia(fecha)
+        valores = Denuncia.objects.filter(
+            fecha_creacion__gte=inicio, fecha_creacion__lt=fin, zona=zona, estado=estado
+        ).aggregate(**_metricas())
+
+        clave = {"fecha": fecha, "zona": zona, "estado": estado}
+        if not valores["total"]:
+            ResumenDiario.objects.filter(**clave).delete()
+            continue
+
+        # Upsert (INSERT ... ON CONFLICT): dos commits que crean el mismo
+        # bucket a la vez no chocan con la restricción única.
+        ResumenDiario.objects.bulk_create(
+            [
+                ResumenDiario(
+                    **clave,
+                    total=valores["total"],
+                    con_reporte=valores["con_reporte"],
+                    cantidad_resueltas=valores["cantidad_resueltas"],
+                    suma_horas_resolucion=_horas(valores["suma_resolucion"]),
+                )
+            ],
+            update_conflicts=True,
+            unique_fields=_CLAVE_RESUMEN,
+            update_fields=_METRICAS_RESUMEN,
+        )
+
+
+def programar_recalculo(buckets: Set[Bucket]) -> None:
+    """Recalcula los buckets cuando la transacción actual se confirme.
+
+    Se espera al commit para leer datos confirmados: dos transacciones que
+    tocan el mismo día no dejan un conteo calculado sobre datos sin confirmar.
+    """
+
+    buckets = {bucket for bucket in buckets if bucket[2]}
+    if buckets:
+        transaction.on_commit(partial(recalcular_buckets, buckets))
+
+
+@transaction.atomic
+def reconstruir_resumen_diario(desde: Optional[date] = None, hasta: Optional[date] = None) -> int:
+    """Recalcula el resumen completo (o un rango de días); retorna las filas creadas."""
+
+    queryset = Denuncia.objects.all()
+    resumen = ResumenDiario.objects.all()
+    if desde:
+        queryset = queryset.filter(fecha_creacion__gte=_rango_dia(desde)[0])
+        resumen = resumen.filter(fecha__gte=desde)
+    if hasta:
+        queryset = queryset.filter(fecha_creacion__lt=_rango_dia(hasta)[1])
+        resumen = resumen.filter(fecha__lte=hasta)
+
+    filas = (
+        queryset.annotate(
+            fecha=TruncDate("fecha_creacion", tzinfo=timezone.get_current_timezone())
+        )
+        .values("fecha", "zona", "estado")
+        .annotate(**_metricas())
+        .order_by()
+    )
+    nuevas = [
+        ResumenDiario(
+            fecha=fila["fecha"],
+            zona=fila["zona"],
+            estado=fila["estado"],
+            total=fila["total"],
+            con_reporte=fila["con_reporte"],
+            cantidad_resueltas=fila["cantidad_resueltas"],
+            suma_horas_resolucion=_horas(fila["suma_resolucion"]),
+        )
+        for fila in filas
+    ]
+
+    resumen.delete()
+    ResumenDiario.objects.bulk_create(nuevas, batch_size=1000)
+    return len(nuevas)
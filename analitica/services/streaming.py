@@ -0,0 +1,99 @@
+"""Respuestas en streaming (JSON, NDJSON y gzip) para los feeds de analítica."""
+
+from __future__ import annotations
+
+import json
+import zlib
+from typing import Any, Iterable, Iterator
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+_ENCODER = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def iterar_json_array(registros: Iterable[Any]) -> Iterator[str]:
+    """Emite ``[reg1,reg2,...]`` de a un registro, sin armar la lista completa."""
+
+    yield "["
+    separador = ""
+    for registro in registros:
+        yield separador + _ENCODER.encode(registro)
+        separador = ","
+    yield "]"
+
+
+def iterar_ndjson(registros: Iterable[Any]) -> Iterator[str]:
+    """Emite un documento JSON por línea (``application/x-ndjson``)."""
+
+    for registro in registros:
+        yield _ENCODER.encode(registro) + "\n"
+
+
+def agrupar_bloques(partes: Iterable[str], tamano: int = 64 * 1024) -> Iterator[bytes]:
+    """Junta fragmentos pequeños en bloques de ~``tamano`` bytes para el socket."""
+
+    buffer = []
+    acumulado = 0
+    for parte in partes:
+        datos = parte.encode("utf-8")
+        buffer.append(datos)
+        acumulado += len(datos)
+        if acumulado >= tamano:
+            yield b"".join(buffer)
+            buffer = []
+            acumulado = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def comprimir_gzip(bloques: Iterable[bytes]) -> Iterator[bytes]:
+    """Comprime en gzip a medida que llegan los bloques."""
+
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for bloque in bloques:
+        comprimido = compresor.compress(bloque)
+        if comprimido:
+            yield comprimido
+    yield compresor.flush()
+
+
+def acepta_gzip(request) -> bool:
+    if request is None:
+        return False
+    return "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "").lower()
+
+
+def respuesta_streaming(
+    request,
+    partes: Iterable[str],
+    *,
+    content_type: str,
+    nombre_archivo: str | None = None,
+) -> StreamingHttpResponse:
+    """Arma la respuesta en streaming, comprimida si el cliente acepta gzip."""
+
+    bloques = agrupar_bloques(partes)
+    comprimir = acepta_gzip(request)
+    if comprimir:
+        bloques = comprimir_gzip(bloques)
+
+    response = StreamingHttpResponse(bloques, content_type=content_type)
+    response["Vary"] = "Accept-Encoding"
+    if comprimir:
+        response["Content-Encoding"] = "gzip"
+    if nombre_archivo:
+        response["Content-Disposition"] = f"attachment; filename={nombre_archivo}"
+    return response
+
+
+def respuesta_json_streaming(request, registros: Iterable[Any]) -> StreamingHttpResponse:
+    """JSON array por defecto; NDJSON con ``?formato=ndjson``."""
+
+    if request.GET.get("formato") == "ndjson":
+        return respuesta_streaming(
+            request, iterar_ndjson(registros), content_type="application/x-ndjson"
+        )
+    return respuesta_streaming(
+        request, iterar_json_array(registros), content_type="application/json"
+    )
@@ -0,0 +1,211 @@
+"""Exportaciones CSV en segundo plano con archivos reutilizables."""
+
+from __future__ import annotations
+
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from analitica.models import TrabajoExportacion
+
+from .exportacion import ParametrosExportacion, iterar_csv_denuncias
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _obtener_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "ANALITICA_EXPORTACION_WORKERS", 1),
+                    thread_name_prefix="exportacion-analitica",
+                )
+    return _executor
+
+
+def _limite_en_curso():
+    # Un trabajo en curso más antiguo que esto se da por perdido (p. ej. el
+    # proceso se reinició).
+    return timezone.now() - timedelta(
+        minutes=getattr(settings, "ANALITICA_EXPORTACION_TIMEOUT_MINUTOS", 60)
+    )
+
+
+def marcar_trabajos_perdidos(clave: Optional[str] = None) -> int:
+    """Pasa a ``error`` los trabajos en curso que superaron el plazo; retorna cuántos."""
+
+    perdidos = TrabajoExportacion.objects.filter(
+        estado__in=[TrabajoExportacion.Estado.PENDIENTE, TrabajoExportacion.Estado.EN_PROCESO],
+        fecha_creacion__lt=_limite_en_curso(),
+    )
+    if clave is not None:
+        perdidos = perdidos.filter(clave=clave)
+    return perdidos.update(
+        estado=TrabajoExportacion.Estado.ERROR,
+        error="El trabajo no terminó dentro del plazo.",
+        fecha_fin=timezone.now(),
+    )
+
+
+def _ttl_minutos(parametros: ParametrosExportacion) -> int:
+    if parametros.mes_cerrado():
+        return getattr(settings, "ANALITICA_EXPORTACION_TTL_MES_CERRADO_MINUTOS", 24 * 60)
+    return getattr(settings, "ANALITICA_EXPORTACION_TTL_MINUTOS", 30)
+
+
+def _trabajo_vigente(clave: str) -> Optional[TrabajoExportacion]:
+    """Trabajo reutilizable para ``clave``: listo y sin expirar, o aún en curso."""
+
+    ahora = timezone.now()
+    return (
+        TrabajoExportacion.objects.filter(clave=clave)
+        .filter(
+            Q(estado=TrabajoExportacion.Estado.LISTO, expira__gt=ahora)
+            | Q(
+                estado__in=[
+                    TrabajoExportacion.Estado.PENDIENTE,
+                    TrabajoExportacion.Estado.EN_PROCESO,
+                ],
+                fecha_creacion__gte=_limite_en_curso(),
+            )
+        )
+        .order_by("-fecha_creacion")
+        .first()
+    )
+
+
+def solicitar_exportacion(
+    parametros: ParametrosExportacion, usuario=None
+) -> Tuple[TrabajoExportacion, bool]:
+    """Retorna ``(trabajo, creado)``; reutiliza un trabajo vigente con los mismos parámetros.
+
+    La restricción única sobre ``clave`` en trabajos en curso evita que dos
+    solicitudes simultáneas generen el mismo archivo: la que pierde la
+    carrera reutiliza el trabajo de la otra.
+    """
+
+    # Libera la clave de un trabajo perdido para poder crear uno nuevo.
+    marcar_trabajos_perdidos(parametros.clave)
+    vigente = _trabajo_vigente(parametros.clave)
+    if vigente is not None:
+        return vigente, False
+
+    try:
+        with transaction.atomic():
+            trabajo = TrabajoExportacion.objects.create(
+                clave=parametros.clave,
+                parametros=parametros.como_params(),
+                solicitado_por=usuario if getattr(usuario, "is_authenticated", False) else None,
+            )
+    except IntegrityError:
+        vigente = _trabajo_vigente(parametros.clave)
+        if vigente is None:
+            raise
+        return vigente, False
+    encolar_exportacion(trabajo.pk)
+    return trabajo, True
+
+
+def encolar_exportacion(trabajo_id: int) -> None:
+    """Programa la generación del archivo una vez confirmada la transacción."""
+
+    def _enviar():
+        if getattr(settings, "ANALITICA_EXPORTACION_SINCRONA", False):
+            ejecutar_exportacion(trabajo_id)
+            return
+        _obtener_executor().submit(_ejecutar_en_worker, trabajo_id)
+
+    transaction.on_commit(_enviar)
+
+
+def _ejecutar_en_worker(trabajo_id: int) -> None:
+    close_old_connections()
+    try:
+        ejecutar_exportacion(trabajo_id)
+    finally:
+        close_old_connections()
+
+
+def ejecutar_exportacion(trabajo_id: int) -> bool:
+    """Genera el CSV del trabajo en MEDIA; retorna ``True`` si quedó listo.
+
+    Solo procesa trabajos pendientes: el cambio a ``en_proceso`` es un UPDATE
+    condicional, así que un mismo trabajo no se genera dos veces.
+    """
+
+    tomado = TrabajoExportacion.objects.filter(
+        pk=trabajo_id, estado=TrabajoExportacion.Estado.PENDIENTE
+    ).update(estado=TrabajoExportacion.Estado.EN_PROCESO, fecha_inicio=timezone.now())
+    if not tomado:
+        return False
+
+    trabajo = TrabajoExportacion.objects.get(pk=trabajo_id)
+    try:
+        parametros = ParametrosExportacion.desde_params(trabajo.parametros)
+        filas = -1  # la primera línea es el encabezado
+        with tempfile.TemporaryFile() as temporal:
+            for linea in iterar_csv_denuncias(parametros):
+                temporal.write(linea.encode("utf-8"))
+                filas += 1
+            temporal.seek(0)
+            trabajo.archivo.save(parametros.nombre_archivo, File(temporal), save=False)
+    except Exception as exc:
+        logger.exception("Falló la exportación #%s.", trabajo_id)
+        TrabajoExportacion.objects.filter(pk=trabajo_id).update(
+            estado=TrabajoExportacion.Estado.ERROR,
+            error=str(exc),
+            fecha_fin=timezone.now(),
+        )
+        return False
+
+    ahora = timezone.now()
+    trabajo.estado = TrabajoExportacion.Estado.LISTO
+    trabajo.filas = filas
+    trabajo.fecha_fin = ahora
+    # Un mes cerrado cambia poco (estados, reportes o zonas de denuncias
+    # antiguas), así que su archivo dura más, pero igual vence.
+    trabajo.expira = ahora + timedelta(minutes=_ttl_minutos(parametros))
+    trabajo.save(update_fields=["estado", "archivo", "filas", "fecha_fin", "expira"])
+    return True
+
+
+def limpiar_exportaciones_vencidas() -> int:
+    """Elimina los trabajos vencidos, fallidos o perdidos y sus archivos; retorna cuántos.
+
+    Los trabajos en curso que superaron el plazo se marcan primero como
+    ``error`` y se eliminan con los demás fallidos.
+    """
+
+    marcar_trabajos_perdidos()
+    ahora = timezone.now()
+    vencidos = TrabajoExportacion.objects.filter(
+        Q(estado=TrabajoExportacion.Estado.LISTO, expira__lte=ahora)
+        # Archivos sin vencimiento de versiones anteriores.
+        | Q(estado=TrabajoExportacion.Estado.LISTO, expira__isnull=True)
+        | Q(
+            estado=TrabajoExportacion.Estado.ERROR,
+            fecha_creacion__lt=ahora
+            - timedelta(minutes=getattr(settings, "ANALITICA_EXPORTACION_TTL_MINUTOS", 30)),
+        )
+    )
+    eliminados = 0
+    for trabajo in vencidos.iterator():
+        if trabajo.archivo:
+            trabajo.archivo.delete(save=False)
+        trabajo.delete()
+        eliminados += 1
+    return eliminados
@@ -0,0 +1,88 @@
+"""Señales que mantienen al día el resumen diario y las permanencias de analítica."""
+
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from denuncias.models import Denuncia, HistorialEstado, ReporteCuadrilla
+from denuncias.services.esquema import tabla_disponible
+from denuncias.signals import zonas_actualizadas
+
+from .models import PermanenciaEstado
+from .services.permanencia import registrar_permanencia
+from .services.resumen import bucket_de, programar_recalculo
+
+_CAMPOS_RESUMEN = ("fecha_creacion", "zona", "estado")
+
+
+def _bucket_actual(instance):
+    # Se lee desde __dict__ para no disparar consultas sobre campos diferidos.
+    valores = tuple(instance.__dict__.get(campo) for campo in _CAMPOS_RESUMEN)
+    if valores[0] is None or valores[2] is None:
+        return None
+    return bucket_de(*valores)
+
+
+def _buckets_de_denuncia(denuncia_id):
+    fila = (
+        Denuncia.objects.filter(pk=denuncia_id)
+        .values_list(*_CAMPOS_RESUMEN)
+        .first()
+    )
+    return {bucket_de(*fila)} if fila else set()
+
+
+@receiver(post_init, sender=Denuncia)
+def guardar_bucket_original(sender, instance, **kwargs):
+    instance._resumen_original = _bucket_actual(instance)
+
+
+@receiver(post_save, sender=Denuncia)
+def actualizar_resumen_denuncia(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not {"zona", "estado"} & set(update_fields):
+        return
+
+    actual = _bucket_actual(instance)
+    anterior = getattr(instance, "_resumen_original", None)
+    if created or actual != anterior:
+        programar_recalculo({bucket for bucket in (anterior, actual) if bucket})
+    instance._resumen_original = actual
+
+
+@receiver(post_delete, sender=Denuncia)
+def actualizar_resumen_denuncia_eliminada(sender, instance, **kwargs):
+    anterior = getattr(instance, "_resumen_original", None)
+    if anterior:
+        programar_recalculo({anterior})
+
+
+@receiver(post_save, sender=ReporteCuadrilla)
+@receiver(post_delete, sender=ReporteCuadrilla)
+def actualizar_resumen_reporte(sender, instance, **kwargs):
+    programar_recalculo(_buckets_de_denuncia(instance.denuncia_id))
+
+
+@receiver(post_save, sender=HistorialEstado)
+def actualizar_resumen_historial(sender, instance, created, **kwargs):
+    if created:
+        programar_recalculo(_buckets_de_denuncia(instance.denuncia_id))
+
+
+@receiver(post_save, sender=HistorialEstado)
+def registrar_permanencia_historial(sender, instance, created, **kwargs):
+    # En la misma transacción que el cambio de estado. Sin la migración de
+    # analítica aplicada, el cambio de estado no debe fallar por la tabla.
+    if created and tabla_disponible(PermanenciaEstado):
+        registrar_permanencia(instance)
+
+
+@receiver(zonas_actualizadas)
+def actualizar_resumen_zonas(sender, cambios, **kwargs):
+    """Recalcula los días afectados por cambios de zona hechos con ``update()``."""
+
+    anteriores = dict(cambios)
+    buckets = set()
+    filas = Denuncia.objects.filter(pk__in=anteriores).values_list("pk", *_CAMPOS_RESUMEN)
+    for pk, fecha_creacion, zona, estado in filas:
+        buckets.add(bucket_de(fecha_creacion, zona, estado))
+        buckets.add(bucket_de(fecha_creacion, anteriores[pk], estado))
+    programar_recalculo(buckets)
@@ -1,3 +1,537 @@
-from django.test import TestCase
+import gzip
+import json
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta
+from importlib import import_module
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from denuncias.models import Denuncia, EstadoDenuncia, HistorialEstado, ReporteCuadrilla
+
+from .models import PermanenciaEstado, ResumenDiario, TrabajoExportacion
+from .services import (
+    COLUMNAS_CSV_MENSUAL,
+    ParametrosExportacion,
+    consulta_csv_mensual,
+    limpiar_exportaciones_vencidas,
+    percentiles_permanencia,
+    rango_mes,
+    recalcular_buckets,
+    reconstruir_permanencias,
+    reconstruir_resumen_diario,
+    solicitar_exportacion,
+)
+from .services.resumen import bucket_de
+
+
+class AnaliticaDashboardViewTests(TestCase):
+    """Indicadores del dashboard calculados con agregados condicionales."""
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario_model = get_user_model()
+        cls.administrador = usuario_model.objects.create_user(
+            username="admin", password="x", rol=usuario_model.Roles.ADMINISTRADOR
+        )
+        cls.jefe = usuario_model.objects.create_user(
+            username="jefe", password="x", rol=usuario_model.Roles.JEFE_CUADRILLA
+        )
+        base = {"usuario": cls.administrador, "latitud": -33.4, "longitud": -70.6}
+        Denuncia.objects.create(descripcion="A", zona="Centro", **base)
+        Denuncia.objects.create(
+            descripcion="B", zona="centro", estado=EstadoDenuncia.EN_GESTION, **base
+        )
+        finalizada = Denuncia.objects.create(
+            descripcion="C", zona="Norte", estado=EstadoDenuncia.FINALIZADO, **base
+        )
+        Denuncia.objects.create(descripcion="D", **base)
+        reporte = ReporteCuadrilla.objects.create(
+            denuncia=finalizada, jefe_cuadrilla=cls.jefe, comentario="Listo"
+        )
+        ReporteCuadrilla.objects.filter(pk=reporte.pk).update(
+            fecha_reporte=finalizada.fecha_creacion + timedelta(hours=6)
+        )
+        # Los update() anteriores no emiten señales: se reconstruye el resumen.
+        reconstruir_resumen_diario()
+
+    def setUp(self):
+        self.client.force_login(self.administrador)
+
+    def test_indicadores(self):
+        context = self.client.get(reverse("analitica:dashboard")).context
+        self.assertEqual(context["total_denuncias"], 4)
+        self.assertEqual(context["denuncias_activas"], 3)
+        self.assertEqual(context["denuncias_finalizadas"], 1)
+        self.assertEqual(context["total_con_reporte"], 1)
+        self.assertEqual(context["zonas_monitoreadas"], 3)
+        self.assertEqual(context["tiempo_promedio_resolucion_horas"], 6.0)
+        totales = {item.estado: item.total for item in context["denuncias_por_estado"]}
+        self.assertEqual(totales[EstadoDenuncia.PENDIENTE], 2)
+
+    def test_presupuesto_de_consultas(self):
+        # Sesión + usuario + un agregado del resumen con todos los indicadores
+        # + la agrupación por zona + los percentiles de permanencia, sin
+        # importar cuántas denuncias existan.
+        with self.assertNumQueries(5):
+            self.client.get(reverse("analitica:dashboard"))
+
+    def test_csv_resumen_mensual(self):
+        response = self.client.get(
+            reverse("analitica:exportar_csv"), {"descargar": 1, "resumen": 1}
+        )
+        filas = response.content.decode().strip().splitlines()
+        self.assertEqual(filas[0].split(",")[:3], ["fecha", "zona", "estado"])
+        self.assertEqual(sum(int(fila.split(",")[3]) for fila in filas[1:]), 4)
+
+
+class ResumenDiarioSenalesTests(TestCase):
+    """El resumen se ajusta solo en los buckets tocados por cada cambio."""
+
+    def setUp(self):
+        usuario_model = get_user_model()
+        self.usuario = usuario_model.objects.create_user(username="vecino", password="x")
+        self.jefe = usuario_model.objects.create_user(
+            username="jefe", password="x", rol=usuario_model.Roles.JEFE_CUADRILLA
+        )
+
+    def _totales(self):
+        return {
+            (fila.zona, fila.estado): fila.total for fila in ResumenDiario.objects.all()
+        }
+
+    def test_alta_cambio_de_estado_reporte_y_baja(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            denuncia = Denuncia.objects.create(
+                usuario=self.usuario, descripcion="A", zona="Centro", latitud=-33.4, longitud=-70.6
+            )
+        self.assertEqual(self._totales(), {("Centro", EstadoDenuncia.PENDIENTE): 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            denuncia.estado = EstadoDenuncia.EN_GESTION
+            denuncia.save(update_fields=["estado"])
+        self.assertEqual(self._totales(), {("Centro", EstadoDenuncia.EN_GESTION): 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ReporteCuadrilla.objects.create(denuncia=denuncia, jefe_cuadrilla=self.jefe)
+        self.assertEqual(ResumenDiario.objects.get().con_reporte, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            denuncia.delete()
+        self.assertFalse(ResumenDiario.objects.exists())
+
+    def test_bucket_creado_por_otro_commit_se_sobrescribe(self):
+        denuncia = Denuncia.objects.create(
+            usuario=self.usuario, descripcion="A", zona="Centro", latitud=-33.4, longitud=-70.6
+        )
+        bucket = bucket_de(denuncia.fecha_creacion, denuncia.zona, denuncia.estado)
+        # Fila insertada por una transacción concurrente con datos viejos.
+        ResumenDiario.objects.create(fecha=bucket[0], zona="Centro", estado=bucket[2], total=7)
+
+        recalcular_buckets([bucket])
+        self.assertEqual(self._totales(), {("Centro", EstadoDenuncia.PENDIENTE): 1})
+
+
+class PermanenciaEstadoTests(TestCase):
+    """Horas en cada estado: incrementales por transición e iguales a la reconstrucción."""
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario_model = get_user_model()
+        cls.usuario = usuario_model.objects.create_user(username="vecino", password="x")
+        cls.inicio = timezone.now() - timedelta(days=2)
+
+    def _en(self, horas):
+        return mock.patch(
+            "django.utils.timezone.now", return_value=self.inicio + timedelta(hours=horas)
+        )
+
+    def _denuncia(self, zona, transiciones):
+        """Crea la denuncia y sus transiciones ``[(horas, anterior, nuevo), ...]``."""
+
+        with self._en(0):
+            denuncia = Denuncia.objects.create(
+                usuario=self.usuario, descripcion="A", zona=zona, latitud=-33.4, longitud=-70.6
+            )
+        for horas, anterior, nuevo in transiciones:
+            with self._en(horas):
+                HistorialEstado.objects.create(
+                    denuncia=denuncia, estado_anterior=anterior, estado_nuevo=nuevo
+                )
+        return denuncia
+
+    def _intervalos(self):
+        return sorted(
+            PermanenciaEstado.objects.values_list("historial_id", "estado", "entrada", "horas")
+        )
+
+    def test_incremental_coincide_con_reconstruccion(self):
+        self._denuncia(
+            "Centro",
+            [
+                (2, EstadoDenuncia.PENDIENTE, EstadoDenuncia.EN_GESTION),
+                (10, EstadoDenuncia.EN_GESTION, EstadoDenuncia.REALIZADO),
+            ],
+        )
+        incrementales = self._intervalos()
+        self.assertEqual(
+            [(estado, horas) for _, estado, _, horas in incrementales],
+            [(EstadoDenuncia.PENDIENTE, 2.0), (EstadoDenuncia.EN_GESTION, 8.0)],
+        )
+
+        self.assertEqual(reconstruir_permanencias(), 2)
+        self.assertEqual(self._intervalos(), incrementales)
+
+    def test_migracion_carga_el_historial_existente(self):
+        self._denuncia(
+            "Centro",
+            [
+                (2, EstadoDenuncia.PENDIENTE, EstadoDenuncia.EN_GESTION),
+                (10, EstadoDenuncia.EN_GESTION, EstadoDenuncia.REALIZADO),
+            ],
+        )
+        incrementales = self._intervalos()
+        PermanenciaEstado.objects.all().delete()
+
+        migracion = import_module("analitica.migrations.0003_permanenciaestado")
+        migracion.cargar_permanencias(apps, None)
+        self.assertEqual(self._intervalos(), incrementales)
+
+    def test_sin_tabla_el_cambio_de_estado_no_falla(self):
+        with mock.patch("analitica.signals.tabla_disponible", return_value=False):
+            self._denuncia("Centro", [(2, EstadoDenuncia.PENDIENTE, EstadoDenuncia.EN_GESTION)])
+        self.assertEqual(HistorialEstado.objects.count(), 1)
+        self.assertFalse(PermanenciaEstado.objects.exists())
+
+    def test_percentiles_por_zona_y_estado(self):
+        for horas in (1, 2, 3, 4):
+            self._denuncia(
+                "Centro", [(horas, EstadoDenuncia.PENDIENTE, EstadoDenuncia.EN_GESTION)]
+            )
+        self._denuncia("", [(5, EstadoDenuncia.PENDIENTE, EstadoDenuncia.RECHAZADA)])
+
+        filas = percentiles_permanencia()
+        self.assertEqual(
+            filas,
+            [
+                {"zona": "", "estado": EstadoDenuncia.PENDIENTE, "total": 1, "p50": 5.0, "p90": 5.0},
+                {
+                    "zona": "Centro",
+                    "estado": EstadoDenuncia.PENDIENTE,
+                    "total": 4,
+                    "p50": 2.5,
+                    "p90": 3.7,
+                },
+            ],
+        )
+        self.assertEqual(percentiles_permanencia(desde=timezone.now()), [])
+
+
+class PowerBIDatasetStreamingTests(TestCase):
+    """El feed de Power BI se emite en streaming con el formato histórico."""
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario_model = get_user_model()
+        cls.administrador = usuario_model.objects.create_user(
+            username="admin", password="x", rol=usuario_model.Roles.ADMINISTRADOR
+        )
+        jefe = usuario_model.objects.create_user(
+            username="jefe", password="x", rol=usuario_model.Roles.JEFE_CUADRILLA
+        )
+        base = {"usuario": cls.administrador, "latitud": -33.4, "longitud": -70.6}
+        cls.con_reporte = Denuncia.objects.create(descripcion="A", zona="Centro", **base)
+        ReporteCuadrilla.objects.create(
+            denuncia=cls.con_reporte, jefe_cuadrilla=jefe, comentario="Listo", foto_trabajo="r.jpg"
+        )
+        cls.sin_reporte = Denuncia.objects.create(descripcion="B", **base)
+
+    def setUp(self):
+        self.client.force_login(self.administrador)
+
+    def _contenido(self, response):
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content)
+
+    def test_json_array(self):
+        datos = json.loads(self._contenido(self.client.get(reverse("analitica:powerbi_api"))))
+        por_id = {fila["id"]: fila for fila in datos}
+        self.assertEqual(por_id[self.sin_reporte.id]["zona"], "Sin zona")
+        self.assertIsNone(por_id[self.sin_reporte.id]["datos_reporte"])
+        reporte = por_id[self.con_reporte.id]["datos_reporte"]
+        self.assertEqual(reporte["jefe_cuadrilla"], "jefe")
+        self.assertTrue(reporte["foto_url"].endswith("/media/r.jpg"))
+        self.assertEqual(por_id[self.con_reporte.id]["rol_que_gestiono"], "jefe_cuadrilla")
+
+    def test_ndjson_comprimido(self):
+        response = self.client.get(
+            reverse("analitica:powerbi_api"),
+            {"formato": "ndjson"},
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        lineas = gzip.decompress(self._contenido(response)).decode().splitlines()
+        self.assertEqual(len(lineas), 2)
+        self.assertEqual(
+            {json.loads(linea)["id"] for linea in lineas},
+            {self.con_reporte.id, self.sin_reporte.id},
+        )
+
+    def test_incremental_por_marca_de_agua_e_id(self):
+        marca = timezone.now()
+        Denuncia.objects.filter(pk=self.con_reporte.pk).update(
+            fecha_actualizacion=marca - timedelta(days=1)
+        )
+        ReporteCuadrilla.objects.update(fecha_reporte=marca - timedelta(days=1))
+        Denuncia.objects.filter(pk=self.sin_reporte.pk).update(fecha_actualizacion=marca)
+
+        response = self.client.get(reverse("analitica:powerbi_api"), {"desde": marca.isoformat()})
+        self.assertIn("X-Watermark", response)
+        datos = json.loads(self._contenido(response))
+        self.assertEqual([fila["id"] for fila in datos], [self.sin_reporte.id])
+
+        response = self.client.get(
+            reverse("analitica:powerbi_api"), {"desde_id": self.con_reporte.id}
+        )
+        datos = json.loads(self._contenido(response))
+        self.assertEqual([fila["id"] for fila in datos], [self.sin_reporte.id])
+
+        response = self.client.get(reverse("analitica:powerbi_api"), {"desde": "ayer"})
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(DENUNCIAS_SYNC_MARGEN_SEGUNDOS=5)
+    def test_marca_con_margen_y_reporte_actualiza_denuncia(self):
+        antes = timezone.now()
+        response = self.client.get(reverse("analitica:powerbi_api"), {"desde": antes.isoformat()})
+        self._contenido(response)
+        marca = datetime.fromisoformat(response["X-Watermark"])
+        self.assertLessEqual(marca, antes - timedelta(seconds=4))
+
+        Denuncia.objects.update(fecha_actualizacion=antes - timedelta(days=1))
+        reporte = ReporteCuadrilla.objects.get(denuncia=self.con_reporte)
+        reporte.comentario = "Corregido"
+        reporte.save()
+        response = self.client.get(reverse("analitica:powerbi_api"), {"desde": antes.isoformat()})
+        datos = json.loads(self._contenido(response))
+        self.assertEqual([fila["id"] for fila in datos], [self.con_reporte.id])
+
+    def test_particion_mensual(self):
+        reconstruir_resumen_diario()
+        mes = timezone.localdate().strftime("%Y-%m")
+        particiones = self.client.get(reverse("analitica:powerbi_api"), {"particiones": 1}).json()
+        self.assertEqual(particiones, [{"mes": mes, "total": 2}])
+
+        datos = json.loads(
+            self._contenido(self.client.get(reverse("analitica:powerbi_api"), {"mes": mes}))
+        )
+        self.assertEqual(len(datos), 2)
+        datos = json.loads(
+            self._contenido(self.client.get(reverse("analitica:powerbi_api"), {"mes": "2001-01"}))
+        )
+        self.assertEqual(datos, [])
+
+
+class ConsultasExportacionTests(TestCase):
+    """La consulta proyectada reproduce el formato calculado antes en Python."""
+
+    def setUp(self):
+        usuario_model = get_user_model()
+        self.administrador = usuario_model.objects.create_user(
+            username="admin", password="x", rol=usuario_model.Roles.ADMINISTRADOR
+        )
+        jefe = usuario_model.objects.create_user(
+            username="jefe", password="x", rol=usuario_model.Roles.JEFE_CUADRILLA
+        )
+        base = {"usuario": self.administrador, "latitud": -33.4, "longitud": -70.6}
+        self.resuelta = Denuncia.objects.create(
+            descripcion="A", zona="Centro", cuadrilla_asignada="Cuadrilla 1", **base
+        )
+        reporte = ReporteCuadrilla.objects.create(
+            denuncia=self.resuelta, jefe_cuadrilla=jefe, comentario="Listo"
+        )
+        ReporteCuadrilla.objects.filter(pk=reporte.pk).update(
+            fecha_reporte=self.resuelta.fecha_creacion + timedelta(hours=5, minutes=17, seconds=31)
+        )
+        self.pendiente = Denuncia.objects.create(descripcion="B", **base)
+        self.client.force_login(self.administrador)
+
+    def test_csv_mensual(self):
+        inicio, fin = rango_mes(timezone.localdate())
+        filas = {fila[0]: fila for fila in consulta_csv_mensual(inicio, fin)}
+        self.resuelta.refresh_from_db()
+
+        esperado = (
+            self.resuelta.id,
+            timezone.localtime(self.resuelta.fecha_creacion).strftime("%Y-%m-%d %H:%M"),
+            EstadoDenuncia.PENDIENTE,
+            "Centro",
+            5.29,
+            "Cuadrilla 1",
+            timezone.localtime(self.resuelta.reporte_cuadrilla.fecha_reporte).strftime(
+                "%Y-%m-%d %H:%M"
+            ),
+            "SI",
+        )
+        self.assertEqual(filas[self.resuelta.id], esperado)
+        self.assertEqual(filas[self.pendiente.id][3:], ("Sin zona", None, "No asignada", None, "NO"))
+
+        response = self.client.get(reverse("analitica:exportar_csv"), {"descargar": 1})
+        lineas = b"".join(response.streaming_content).decode().strip().splitlines()
+        self.assertEqual(lineas[0].split(","), list(COLUMNAS_CSV_MENSUAL))
+        self.assertIn(f"{self.pendiente.id},", lineas[1])
+        self.assertTrue(lineas[1].endswith(",Sin zona,,No asignada,,NO"))
+
+    def test_powerbi_en_hora_local(self):
+        response = self.client.get(reverse("analitica:powerbi_api"))
+        datos = {fila["id"]: fila for fila in json.loads(b"".join(response.streaming_content))}
+        fila = datos[self.resuelta.id]
+        self.assertEqual(fila["tiempo_resolucion"], 5.29)
+        creada = timezone.localtime(self.resuelta.fecha_creacion).replace(microsecond=0)
+        self.assertEqual(fila["fecha_creacion"], creada.isoformat())
+        self.assertIsNone(datos[self.pendiente.id]["tiempo_resolucion"])
+
+    def test_csv_por_rango_zona_y_estado(self):
+        Denuncia.objects.filter(pk=self.pendiente.pk).update(
+            fecha_creacion=timezone.now() - timedelta(days=400)
+        )
+        hoy = timezone.localdate()
+        url = reverse("analitica:exportar_csv")
+
+        response = self.client.get(
+            url,
+            {"descargar": 1, "desde": (hoy - timedelta(days=500)).isoformat(), "hasta": hoy},
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        lineas = gzip.decompress(b"".join(response.streaming_content)).decode().splitlines()
+        self.assertEqual(len(lineas), 3)
+
+        response = self.client.get(
+            url,
+            {
+                "descargar": 1,
+                "desde": (hoy - timedelta(days=500)).isoformat(),
+                "zona": "centro",
+                "estado": "pendiente",
+            },
+        )
+        lineas = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([linea.split(",")[0] for linea in lineas[1:]], [str(self.resuelta.id)])
+
+        for params in ({"desde": "2024-13-01"}, {"desde": "2024-02-01", "hasta": "2024-01-01"}):
+            response = self.client.get(url, {"descargar": 1, **params})
+            self.assertEqual(response.status_code, 400)
+
+
+@override_settings(ANALITICA_EXPORTACION_SINCRONA=True)
+class TrabajoExportacionTests(TestCase):
+    """Exportaciones en segundo plano con reutilización de archivos."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._media_root = tempfile.mkdtemp()
+        cls._override = override_settings(MEDIA_ROOT=cls._media_root)
+        cls._override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._override.disable()
+        shutil.rmtree(cls._media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario_model = get_user_model()
+        cls.administrador = usuario_model.objects.create_user(
+            username="admin", password="x", rol=usuario_model.Roles.ADMINISTRADOR
+        )
+        Denuncia.objects.create(
+            usuario=cls.administrador, descripcion="A", zona="Centro", latitud=-33.4, longitud=-70.6
+        )
+
+    def setUp(self):
+        self.client.force_login(self.administrador)
+
+    def _solicitar(self, **params):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse("analitica:exportacion_crear"), params)
+
+    def test_flujo_y_reutilizacion(self):
+        response = self._solicitar(zona="Centro")
+        self.assertEqual(response.status_code, 202)
+        estado = self.client.get(response.json()["url_estado"]).json()
+        self.assertEqual(estado["estado"], TrabajoExportacion.Estado.LISTO)
+        self.assertEqual(estado["filas"], 1)
+        self.assertIsNotNone(estado["expira"])
+
+        descarga = self.client.get(estado["url_descarga"])
+        contenido = b"".join(descarga.streaming_content).decode()
+        self.assertEqual(len(contenido.strip().splitlines()), 2)
+
+        # Mismos parámetros (zona sin distinguir mayúsculas): se reutiliza el archivo.
+        repetida = self._solicitar(zona="centro")
+        self.assertEqual(repetida.status_code, 200)
+        self.assertTrue(repetida.json()["reutilizado"])
+        self.assertEqual(TrabajoExportacion.objects.count(), 1)
+
+        TrabajoExportacion.objects.update(expira=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(limpiar_exportaciones_vencidas(), 1)
+        self.assertEqual(self._solicitar(zona="Centro").status_code, 202)
+
+    @override_settings(ANALITICA_EXPORTACION_TTL_MES_CERRADO_MINUTOS=120)
+    def test_mes_cerrado_vence_con_plazo_largo(self):
+        self._solicitar(mes="2023-01")
+        trabajo = TrabajoExportacion.objects.get()
+        self.assertEqual(trabajo.parametros["desde"], date(2023, 1, 1).isoformat())
+        self.assertEqual(trabajo.filas, 0)
+        self.assertEqual(trabajo.expira - trabajo.fecha_fin, timedelta(minutes=120))
+
+        # Un archivo sin vencimiento (versiones anteriores) no se reutiliza y se limpia.
+        TrabajoExportacion.objects.update(expira=None)
+        self.assertEqual(self._solicitar(mes="2023-01").status_code, 202)
+        self.assertEqual(limpiar_exportaciones_vencidas(), 1)
+        self.assertEqual(TrabajoExportacion.objects.count(), 1)
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self._solicitar(estado="inexistente").status_code, 400)
+        self.assertFalse(TrabajoExportacion.objects.exists())
+
+    def test_solicitudes_simultaneas_reutilizan_el_trabajo_en_curso(self):
+        parametros = ParametrosExportacion.del_mes(date(2023, 1, 1))
+        en_curso = TrabajoExportacion.objects.create(
+            clave=parametros.clave, parametros=parametros.como_params()
+        )
+        # Ambas solicitudes no vieron un trabajo vigente antes de insertar.
+        with mock.patch(
+            "analitica.services.trabajos._trabajo_vigente", side_effect=[None, en_curso]
+        ):
+            trabajo, creado = solicitar_exportacion(parametros)
+        self.assertEqual((trabajo, creado), (en_curso, False))
+        self.assertEqual(TrabajoExportacion.objects.count(), 1)
+
+    def test_trabajo_perdido_se_marca_y_limpia(self):
+        parametros = ParametrosExportacion.del_mes(date(2023, 1, 1))
+        perdido = TrabajoExportacion.objects.create(
+            clave=parametros.clave,
+            parametros=parametros.como_params(),
+            estado=TrabajoExportacion.Estado.EN_PROCESO,
+        )
+        TrabajoExportacion.objects.filter(pk=perdido.pk).update(
+            fecha_creacion=timezone.now() - timedelta(hours=2)
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            trabajo, creado = solicitar_exportacion(parametros)
+        self.assertTrue(creado)
+        perdido.refresh_from_db()
+        self.assertEqual(perdido.estado, TrabajoExportacion.Estado.ERROR)
+
+        self.assertEqual(limpiar_exportaciones_vencidas(), 1)
+        self.assertFalse(TrabajoExportacion.objects.filter(pk=perdido.pk).exists())
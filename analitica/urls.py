@@ -7,6 +7,9 @@ from .views import (
     ExportarCSVView,
     PowerBIDashboardView,
     PowerBIDatasetView,
+    TrabajoExportacionCrearView,
+    TrabajoExportacionDescargarView,
+    TrabajoExportacionDetalleView,
 )
 
 app_name = "analitica"
@@ -14,6 +17,21 @@ app_name = "analitica"
 urlpatterns = [
     path("", AnaliticaDashboardView.as_view(), name="dashboard"),
     path("exportar-csv/", ExportarCSVView.as_view(), name="exportar_csv"),
+    path(
+        "exportar-csv/trabajos/",
+        TrabajoExportacionCrearView.as_view(),
+        name="exportacion_crear",
+    ),
+    path(
+        "exportar-csv/trabajos/<int:pk>/",
+        TrabajoExportacionDetalleView.as_view(),
+        name="exportacion_trabajo",
+    ),
+    path(
+        "exportar-csv/trabajos/<int:pk>/descargar/",
+        TrabajoExportacionDescargarView.as_view(),
+        name="exportacion_descargar",
+    ),
     path("powerbi/", PowerBIDashboardView.as_view(), name="powerbi_dashboard"),
     path("api/powerbi/", PowerBIDatasetView.as_view(), name="powerbi_api"),
 ]
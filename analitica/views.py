@@ -3,20 +3,34 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, List
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
 
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F
-from django.http import JsonResponse
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.http import FileResponse, Http404, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.views import View
 from django.views.generic import TemplateView
 
-from denuncias.models import Denuncia
+from denuncias.models import Denuncia, ReporteCuadrilla
 
-from .services import calcular_tiempo_resolucion_horas, generar_csv_mensual
+from .models import ResumenDiario, TrabajoExportacion
+from .services import (
+    ParametrosExportacion,
+    exportar_csv_denuncias,
+    generar_csv_resumen_mensual,
+    rango_mes,
+    solicitar_exportacion,
+)
+from .services.consultas import consulta_dataset_powerbi
+from .services.permanencia import percentiles_permanencia
+from .services.streaming import respuesta_json_streaming
 
 
 class AdministradorRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
@@ -54,13 +68,28 @@ class AnaliticaDashboardView(AdministradorRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         context = super().get_context_data(**kwargs)
 
-        queryset = Denuncia.objects.select_related("reporte_cuadrilla").all()
-        total_denuncias = queryset.count()
-
         estado_labels = dict(Denuncia.EstadoDenuncia.choices)
-        estado_counts = {estado: 0 for estado in estado_labels.keys()}
-        for entry in queryset.values("estado").annotate(total=Count("id")):
-            estado_counts[entry["estado"]] = entry["total"]
+
+        # Un solo recorrido del resumen diario: cada indicador es un agregado
+        # condicional, y el costo depende de días × zonas, no de las denuncias.
+        agregados = {
+            f"estado_{estado}": Sum("total", filter=Q(estado=estado))
+            for estado in estado_labels
+        }
+        indicadores = ResumenDiario.objects.aggregate(
+            total_denuncias=Sum("total"),
+            total_con_reporte=Sum("con_reporte"),
+            zonas_monitoreadas=Count("zona", distinct=True, filter=~Q(zona="")),
+            suma_horas=Sum("suma_horas_resolucion"),
+            total_resueltas=Sum("cantidad_resueltas"),
+            **agregados,
+        )
+        indicadores = {clave: valor or 0 for clave, valor in indicadores.items()}
+
+        total_denuncias = indicadores["total_denuncias"]
+        estado_counts = {
+            estado: indicadores[f"estado_{estado}"] for estado in estado_labels
+        }
 
         resumen_estados: List[ResumenEstado] = []
         for estado, total in estado_counts.items():
@@ -75,34 +104,33 @@ class AnaliticaDashboardView(AdministradorRequiredMixin, TemplateView):
                 )
             )
 
-        denuncias_por_zona = (
-            queryset.values("zona")
-            .annotate(total=Count("id"))
-            .order_by("-total", "zona")
-        )
-
-        con_reporte = queryset.filter(reporte_cuadrilla__isnull=False).count()
-        activas = queryset.filter(
-            estado__in=[
-                Denuncia.EstadoDenuncia.PENDIENTE,
-                Denuncia.EstadoDenuncia.EN_GESTION,
-            ]
-        ).count()
-        finalizadas = queryset.filter(estado=Denuncia.EstadoDenuncia.FINALIZADO).count()
-        zonas_monitoreadas = queryset.exclude(zona="").values("zona").distinct().count()
-
-        promedio_delta = queryset.filter(reporte_cuadrilla__fecha_reporte__isnull=False).aggregate(
-            promedio=Avg(
-                ExpressionWrapper(
-                    F("reporte_cuadrilla__fecha_reporte") - F("fecha_creacion"),
-                    output_field=DurationField(),
-                )
+        denuncias_por_zona = [
+            {"zona": fila["zona"], "total": fila["total_zona"]}
+            for fila in ResumenDiario.objects.values("zona")
+            .annotate(total_zona=Sum("total"))
+            .order_by("-total_zona", "zona")
+        ]
+
+        # Percentiles leídos de la tabla de permanencias, no del historial.
+        dias_permanencia = getattr(settings, "ANALITICA_PERMANENCIA_DIAS", 90)
+        permanencia_por_zona_estado = [
+            {**fila, "etiqueta": estado_labels.get(fila["estado"], fila["estado"])}
+            for fila in percentiles_permanencia(
+                desde=timezone.now() - timedelta(days=dias_permanencia)
             )
-        )["promedio"]
+        ]
+
+        con_reporte = indicadores["total_con_reporte"]
+        activas = (
+            estado_counts[Denuncia.EstadoDenuncia.PENDIENTE]
+            + estado_counts[Denuncia.EstadoDenuncia.EN_GESTION]
+        )
+        finalizadas = estado_counts[Denuncia.EstadoDenuncia.FINALIZADO]
+        zonas_monitoreadas = indicadores["zonas_monitoreadas"]
         tiempo_promedio_resolucion_horas = None
         tiempo_promedio_resolucion_legible = "Sin datos"
-        if promedio_delta:
-            horas = round(promedio_delta.total_seconds() / 3600, 2)
+        if indicadores["total_resueltas"]:
+            horas = round(indicadores["suma_horas"] / indicadores["total_resueltas"], 2)
             tiempo_promedio_resolucion_horas = horas
             dias = round(horas / 24, 2)
             tiempo_promedio_resolucion_legible = f"{horas} h (~{dias} días)"
@@ -112,6 +140,8 @@ class AnaliticaDashboardView(AdministradorRequiredMixin, TemplateView):
                 "total_denuncias": total_denuncias,
                 "denuncias_por_estado": resumen_estados,
                 "denuncias_por_zona": denuncias_por_zona,
+                "permanencia_por_zona_estado": permanencia_por_zona_estado,
+                "dias_permanencia": dias_permanencia,
                 "tiempo_promedio_resolucion_horas": tiempo_promedio_resolucion_horas,
                 "tiempo_promedio_resolucion_legible": tiempo_promedio_resolucion_legible,
                 "denuncias_activas": activas,
@@ -156,6 +186,7 @@ class ExportarCSVView(FuncionarioOAdministradorRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         context.update(
             {
+                "estados": Denuncia.EstadoDenuncia.choices,
                 "mes_actual": timezone.localdate().strftime("%B %Y"),
                 "nombre_archivo": f"informes_microbasurales_{timezone.localdate().strftime('%m-%Y')}.csv",
             }
@@ -164,10 +195,81 @@ class ExportarCSVView(FuncionarioOAdministradorRequiredMixin, TemplateView):
 
     def get(self, request, *args: Any, **kwargs: Any):  # type: ignore[override]
         if request.GET.get("descargar"):
-            return generar_csv_mensual()
+            if request.GET.get("resumen"):
+                return generar_csv_resumen_mensual()
+            # ``desde``/``hasta``/``mes``, ``zona`` y ``estado``; sin filtros, el mes en curso.
+            try:
+                parametros = ParametrosExportacion.desde_params(request.GET)
+            except ValueError as exc:
+                return HttpResponseBadRequest(str(exc))
+            return exportar_csv_denuncias(parametros, request)
         return super().get(request, *args, **kwargs)
 
 
+class TrabajoExportacionCrearView(FuncionarioOAdministradorRequiredMixin, View):
+    """Encola una exportación CSV en segundo plano con los filtros del formulario.
+
+    Si ya existe un archivo vigente (o un trabajo en curso) con los mismos
+    parámetros se retorna ese trabajo en lugar de generar otro.
+    """
+
+    def post(self, request, *args, **kwargs):
+        try:
+            parametros = ParametrosExportacion.desde_params(request.POST)
+        except ValueError as exc:
+            return JsonResponse({"detail": str(exc)}, status=400)
+
+        trabajo, creado = solicitar_exportacion(parametros, request.user)
+        listo = trabajo.estado == TrabajoExportacion.Estado.LISTO
+        return JsonResponse(
+            _datos_trabajo(request, trabajo, reutilizado=not creado),
+            status=200 if listo else 202,
+        )
+
+
+class TrabajoExportacionDetalleView(FuncionarioOAdministradorRequiredMixin, View):
+    """Estado de un trabajo de exportación, consultado periódicamente por la UI."""
+
+    def get(self, request, pk, *args, **kwargs):
+        trabajo = get_object_or_404(TrabajoExportacion, pk=pk)
+        return JsonResponse(_datos_trabajo(request, trabajo))
+
+
+class TrabajoExportacionDescargarView(FuncionarioOAdministradorRequiredMixin, View):
+    """Descarga el archivo de un trabajo terminado."""
+
+    def get(self, request, pk, *args, **kwargs):
+        trabajo = get_object_or_404(
+            TrabajoExportacion, pk=pk, estado=TrabajoExportacion.Estado.LISTO
+        )
+        if not trabajo.archivo:
+            raise Http404("El archivo de la exportación ya no está disponible.")
+        nombre = ParametrosExportacion.desde_params(trabajo.parametros).nombre_archivo
+        return FileResponse(
+            trabajo.archivo.open("rb"),
+            as_attachment=True,
+            filename=nombre,
+            content_type="text/csv",
+        )
+
+
+def _datos_trabajo(request, trabajo: TrabajoExportacion, **extra: Any) -> Dict[str, Any]:
+    datos = {
+        "id": trabajo.pk,
+        "estado": trabajo.estado,
+        "parametros": trabajo.parametros,
+        "filas": trabajo.filas,
+        "error": trabajo.error,
+        "expira": trabajo.expira,
+        "url_estado": reverse("analitica:exportacion_trabajo", args=[trabajo.pk]),
+        "url_descarga": None,
+        **extra,
+    }
+    if trabajo.estado == TrabajoExportacion.Estado.LISTO:
+        datos["url_descarga"] = reverse("analitica:exportacion_descargar", args=[trabajo.pk])
+    return datos
+
+
 class PowerBIDashboardView(AdministradorRequiredMixin, TemplateView):
     """Vista dedicada para integrar el dashboard avanzado de Power BI."""
 
@@ -185,58 +287,164 @@ class PowerBIDashboardView(AdministradorRequiredMixin, TemplateView):
 
 
 class PowerBIDatasetView(AdministradorRequiredMixin, View):
-    """Entrega un dataset completo para su consumo en Power BI."""
+    """Entrega un dataset completo para su consumo en Power BI.
+
+    La respuesta se emite en streaming (JSON array, o NDJSON con
+    ``?formato=ndjson``) recorriendo el queryset por bloques, así que la memoria
+    no crece con la cantidad de denuncias. Las columnas, la hora local y las
+    horas de resolución se calculan en la consulta (ver ``services.consultas``).
+    """
 
     def get(self, request, *args, **kwargs):  # type: ignore[override]
-        queryset = (
-            Denuncia.objects.select_related(
-                "usuario", "reporte_cuadrilla", "reporte_cuadrilla__jefe_cuadrilla"
+        if request.GET.get("resumen"):
+            return self._resumen_diario()
+        if request.GET.get("particiones"):
+            return self._particiones()
+
+        # Se descuenta el margen de la sincronización incremental: cubre
+        # transacciones que confirman después de esta respuesta con una
+        # fecha_actualizacion anterior. Esas filas se repiten en la próxima
+        # carga y el cliente las deduplica por ``id`` (orden fecha, id).
+        margen = getattr(settings, "DENUNCIAS_SYNC_MARGEN_SEGUNDOS", 5)
+        marca_de_agua = timezone.now() - timedelta(seconds=margen)
+        try:
+            queryset = self._filtrar(Denuncia.objects.all(), request.GET)
+        except ValueError as exc:
+            return JsonResponse({"detail": str(exc)}, status=400)
+
+        filas = consulta_dataset_powerbi(queryset).iterator(
+            chunk_size=getattr(settings, "ANALITICA_EXPORTACION_CHUNK", 2000)
+        )
+        response = respuesta_json_streaming(request, self._registros(request, filas))
+        # Valor a enviar como ``desde`` en la próxima actualización incremental.
+        response["X-Watermark"] = marca_de_agua.isoformat()
+        return response
+
+    @staticmethod
+    def _filtrar(queryset, params):
+        """Aplica el modo incremental (``desde`` / ``desde_id``) o por partición (``mes``).
+
+        Sin parámetros entrega el histórico completo, como antes.
+        """
+
+        desde = params.get("desde")
+        desde_id = params.get("desde_id")
+        mes = params.get("mes")
+
+        if desde:
+            momento = parse_datetime(desde)
+            if momento is None:
+                raise ValueError("desde debe ser una fecha y hora ISO 8601.")
+            if timezone.is_naive(momento):
+                momento = timezone.make_aware(momento)
+            # Filas creadas o modificadas desde la marca; guardar un reporte de
+            # cuadrilla también actualiza fecha_actualizacion de su denuncia.
+            return queryset.filter(fecha_actualizacion__gte=momento).order_by(
+                "fecha_actualizacion", "id"
             )
-            .all()
-            .order_by("-fecha_creacion")
+
+        if desde_id:
+            try:
+                ultimo_id = int(desde_id)
+            except ValueError:
+                raise ValueError("desde_id debe ser un entero.")
+            return queryset.filter(id__gt=ultimo_id).order_by("id")
+
+        if mes:
+            try:
+                inicio, fin = rango_mes(datetime.strptime(mes, "%Y-%m").date())
+            except ValueError:
+                raise ValueError("mes debe tener formato AAAA-MM.")
+            return queryset.filter(
+                fecha_creacion__gte=inicio, fecha_creacion__lt=fin
+            ).order_by("fecha_creacion", "id")
+
+        return queryset.order_by("-fecha_creacion")
+
+    @staticmethod
+    def _particiones() -> JsonResponse:
+        """Lista las particiones mensuales disponibles con su cantidad de filas."""
+
+        filas = (
+            ResumenDiario.objects.annotate(mes=TruncMonth("fecha"))
+            .values("mes")
+            .annotate(total_mes=Sum("total"))
+            .order_by("mes")
+        )
+        return JsonResponse(
+            [
+                {"mes": fila["mes"].strftime("%Y-%m"), "total": fila["total_mes"]}
+                for fila in filas
+            ],
+            safe=False,
         )
 
-        dataset: List[Dict[str, Any]] = []
-        for denuncia in queryset:
-            reporte = getattr(denuncia, "reporte_cuadrilla", None)
-            fecha_resolucion = None
-            if reporte and reporte.fecha_reporte:
-                fecha_resolucion = timezone.localtime(reporte.fecha_reporte)
-
-            dataset.append(
-                {
-                    "id": denuncia.id,
-                    "fecha_creacion": timezone.localtime(denuncia.fecha_creacion).isoformat(),
-                    "fecha_resolucion": fecha_resolucion.isoformat() if fecha_resolucion else None,
-                    "estado": denuncia.estado,
-                    "zona": denuncia.zona or "Sin zona",
-                    "latitud": denuncia.latitud,
-                    "longitud": denuncia.longitud,
-                    "tiempo_resolucion": calcular_tiempo_resolucion_horas(denuncia),
-                    "denunciante": getattr(denuncia.usuario, "username", "anónimo"),
-                    "rol_que_gestiono": (
-                        reporte.jefe_cuadrilla.rol if reporte and reporte.jefe_cuadrilla else None
-                    ),
-                    "tiene_reporte_cuadrilla": bool(reporte),
-                    "datos_reporte": (
-                        {
-                            "foto_url": (
-                                request.build_absolute_uri(reporte.foto_trabajo.url)
-                                if reporte and reporte.foto_trabajo
-                                else None
-                            ),
-                            "comentario": reporte.comentario if reporte else None,
-                            "fecha": fecha_resolucion.isoformat() if fecha_resolucion else None,
-                            "jefe_cuadrilla": (
-                                reporte.jefe_cuadrilla.username
-                                if reporte and reporte.jefe_cuadrilla
-                                else None
-                            ),
-                        }
-                        if reporte
-                        else None
-                    ),
-                }
-            )
+    @staticmethod
+    def _registros(request, filas) -> Iterator[Dict[str, Any]]:
+        """Arma el formato histórico del dataset a partir de las filas proyectadas."""
+
+        almacenamiento = ReporteCuadrilla._meta.get_field("foto_trabajo").storage
+        for (
+            denuncia_id,
+            fecha_creacion,
+            fecha_actualizacion,
+            fecha_resolucion,
+            estado,
+            zona,
+            latitud,
+            longitud,
+            tiempo_resolucion,
+            denunciante,
+            rol,
+            tiene_reporte,
+            foto,
+            comentario,
+            jefe_cuadrilla,
+        ) in filas:
+            yield {
+                "id": denuncia_id,
+                "fecha_creacion": fecha_creacion,
+                "fecha_actualizacion": fecha_actualizacion,
+                "fecha_resolucion": fecha_resolucion,
+                "estado": estado,
+                "zona": zona,
+                "latitud": latitud,
+                "longitud": longitud,
+                "tiempo_resolucion": tiempo_resolucion,
+                "denunciante": denunciante,
+                "rol_que_gestiono": rol,
+                "tiene_reporte_cuadrilla": tiene_reporte,
+                "datos_reporte": (
+                    {
+                        "foto_url": (
+                            request.build_absolute_uri(almacenamiento.url(foto)) if foto else None
+                        ),
+                        "comentario": comentario,
+                        "fecha": fecha_resolucion,
+                        "jefe_cuadrilla": jefe_cuadrilla,
+                    }
+                    if tiene_reporte
+                    else None
+                ),
+            }
+
+    @staticmethod
+    def _resumen_diario() -> JsonResponse:
+        """Dataset agregado por día, zona y estado, leído del resumen diario."""
 
+        dataset = [
+            {
+                "fecha": fila["fecha"].isoformat(),
+                "zona": fila["zona"] or "Sin zona",
+                "estado": fila["estado"],
+                "total": fila["total"],
+                "con_reporte_cuadrilla": fila["con_reporte"],
+                "promedio_resolucion_horas": (
+                    round(fila["suma_horas_resolucion"] / fila["cantidad_resueltas"], 2)
+                    if fila["cantidad_resueltas"]
+                    else None
+                ),
+            }
+            for fila in ResumenDiario.objects.order_by("fecha", "zona", "estado").values()
+        ]
         return JsonResponse(dataset, safe=False)
@@ -3,6 +3,10 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Servir con ASGI (p. ej. ``uvicorn config.asgi:application``) habilita el canal
+de notificaciones en tiempo real ``/api/denuncias/notificaciones/stream/``:
+cada cliente conectado es una corrutina en espera, no un worker bloqueado.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -133,6 +133,86 @@ MEDIA_ROOT = BASE_DIR / "media"
 # ========================================
 POWERBI_DASHBOARD_EMBED_URL = ""
 
+# Filas leídas por bloque al exportar datasets en streaming (Power BI, CSV).
+ANALITICA_EXPORTACION_CHUNK = 2000
+
+# Exportaciones CSV en segundo plano (archivos en MEDIA_ROOT/exportaciones).
+ANALITICA_EXPORTACION_WORKERS = 1
+# Minutos durante los que una exportación del mes en curso se reutiliza.
+ANALITICA_EXPORTACION_TTL_MINUTOS = 30
+# Minutos para un mes cerrado: sus denuncias aún cambian de estado o zona.
+ANALITICA_EXPORTACION_TTL_MES_CERRADO_MINUTOS = 24 * 60
+# Un trabajo sin terminar tras este plazo se considera perdido.
+ANALITICA_EXPORTACION_TIMEOUT_MINUTOS = 60
+# Genera el archivo en el mismo hilo al confirmar la transacción.
+ANALITICA_EXPORTACION_SINCRONA = False
+
+# Ventana (días) de los percentiles de permanencia por zona y estado del panel.
+ANALITICA_PERMANENCIA_DIAS = 90
+
+# ========================================
+# ZONAS MUNICIPALES (GEORREFERENCIACIÓN)
+# ========================================
+# Polígonos de las zonas operativas en formato GeoJSON (FeatureCollection).
+ZONAS_GEOJSON_PATH = BASE_DIR / "data" / "zonas.geojson"
+# Propiedad del feature que contiene el nombre de la zona.
+ZONAS_GEOJSON_PROPIEDAD_NOMBRE = "nombre"
+# Tamaño (en grados) de las celdas del índice espacial en memoria.
+ZONAS_INDICE_TAMANO_CELDA = 0.01
+# Si el punto no cae en ninguna zona local se consulta Nominatim.
+ZONAS_NOMINATIM_FALLBACK = True
+# Caché de zonas resueltas: las coordenadas se agrupan en celdas de
+# ZONAS_CACHE_TAMANO_CELDA grados (~55 m) con LRU acotado y expiración.
+ZONAS_CACHE_TAMANO_CELDA = 0.0005
+ZONAS_CACHE_MAX_ENTRADAS = 2048
+ZONAS_CACHE_TTL = 60 * 60 * 24
+# Alias de CACHES para compartir la caché entre workers (None = solo local).
+ZONAS_CACHE_ALIAS = None
+
+# Cliente de Nominatim: sesión keep-alive, circuit breaker y límite de tasa
+# (la política de uso pública exige como máximo 1 consulta por segundo).
+NOMINATIM_URL = "https://nominatim.openstreetmap.org"
+NOMINATIM_USER_AGENT = "microbasurales-app/1.0"
+NOMINATIM_TIMEOUT_CONEXION = 2.0
+NOMINATIM_TIMEOUT_LECTURA = 3.0
+NOMINATIM_TAMANO_POOL = 4
+NOMINATIM_UMBRAL_FALLOS = 3
+NOMINATIM_TIEMPO_REAPERTURA = 60.0
+NOMINATIM_INTERVALO_MINIMO = 1.0
+NOMINATIM_ESPERA_MAXIMA = 2.0
+
+# Máximo de marcadores entregados por /api/denuncias/mapa/ en una consulta.
+MAPA_MAX_MARCADORES = 2000
+
+# Sincronización incremental de listados (?sync_token / ?updated_since).
+DENUNCIAS_SYNC_MARGEN_SEGUNDOS = 5
+# Edad máxima de un token; también es el plazo de retención de las marcas de
+# eliminación (python manage.py depurar_denuncias_eliminadas).
+DENUNCIAS_SYNC_MAX_DIAS = 30
+
+# Enriquecimiento asíncrono (zona y dirección) de las denuncias nuevas.
+ENRIQUECIMIENTO_WORKERS = 2
+ENRIQUECIMIENTO_REINTENTOS = 3
+ENRIQUECIMIENTO_ESPERA_BASE = 2.0  # segundos; se duplica en cada reintento
+# Ejecuta el enriquecimiento en el mismo hilo al confirmar la transacción.
+ENRIQUECIMIENTO_SINCRONO = False
+
+# Notificaciones en tiempo real (Server-Sent Events); requiere servir con ASGI.
+NOTIFICACIONES_SSE_HABILITADO = True
+# Con varios workers, cada proceso consulta las notificaciones nuevas cada
+# NOTIFICACIONES_SSE_SONDEO_SEGUNDOS mientras tenga clientes conectados.
+NOTIFICACIONES_SSE_PUENTE = True
+NOTIFICACIONES_SSE_SONDEO_SEGUNDOS = 2.0
+NOTIFICACIONES_SSE_LATIDO_SEGUNDOS = 20
+NOTIFICACIONES_SSE_REINTENTO_MS = 5000
+
+# Retención de notificaciones (manage.py depurar_notificaciones): las leídas
+# se eliminan tras NOTIFICACIONES_RETENCION_DIAS; las no leídas más antiguas
+# que NOTIFICACIONES_COMPACTAR_DIAS se resumen en una fila por denuncia.
+NOTIFICACIONES_RETENCION_DIAS = 90
+NOTIFICACIONES_COMPACTAR_DIAS = 30
+NOTIFICACIONES_RETENCION_LOTE = 1000
+
 # ========================================
 # AUTH & USER MODEL
 # ========================================
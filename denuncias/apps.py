@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class DenunciasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'denuncias'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+
+        from . import signals  # noqa: F401
+        from .services.esquema import invalidar_tablas_disponibles
+        from .services.zonas import recargar_zonas
+
+        # Las tablas disponibles se cachean por proceso; migrar las invalida.
+        post_migrate.connect(
+            invalidar_tablas_disponibles, dispatch_uid="denuncias_invalidar_tablas"
+        )
+
+        # Carga los polígonos de zonas una sola vez al iniciar el proceso.
+        recargar_zonas()
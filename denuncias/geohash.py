@@ -0,0 +1,122 @@
+"""Codificación geohash para indexar ubicaciones sin extensiones GIS.
+
+Un geohash divide el planeta en celdas cuyo identificador comparte prefijo
+con el de las celdas que la contienen, por lo que un filtro por prefijo
+(``LIKE 'abc%'``) sobre un índice B-tree selecciona una región rectangular.
+"""
+
+import math
+from typing import List, Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_INDICE_BASE32 = {caracter: posicion for posicion, caracter in enumerate(_BASE32)}
+
+PRECISION_MAXIMA = 12
+
+
+def codificar(lat: float, lon: float, precision: int = PRECISION_MAXIMA) -> str:
+    """Retorna el geohash de ``precision`` caracteres para el punto."""
+
+    lat_min, lat_max = -90.0, 90.0
+    lon_min, lon_max = -180.0, 180.0
+    resultado = []
+    bits = 0
+    valor = 0
+    usar_lon = True
+
+    while len(resultado) < precision:
+        if usar_lon:
+            medio = (lon_min + lon_max) / 2
+            if lon >= medio:
+                valor = (valor << 1) | 1
+                lon_min = medio
+            else:
+                valor <<= 1
+                lon_max = medio
+        else:
+            medio = (lat_min + lat_max) / 2
+            if lat >= medio:
+                valor = (valor << 1) | 1
+                lat_min = medio
+            else:
+                valor <<= 1
+                lat_max = medio
+        usar_lon = not usar_lon
+        bits += 1
+        if bits == 5:
+            resultado.append(_BASE32[valor])
+            bits = 0
+            valor = 0
+
+    return "".join(resultado)
+
+
+def limites(geohash: str) -> Tuple[float, float, float, float]:
+    """Retorna ``(sur, oeste, norte, este)`` de la celda del geohash."""
+
+    lat_min, lat_max = -90.0, 90.0
+    lon_min, lon_max = -180.0, 180.0
+    usar_lon = True
+    for caracter in geohash:
+        valor = _INDICE_BASE32[caracter]
+        for desplazamiento in range(4, -1, -1):
+            bit = (valor >> desplazamiento) & 1
+            if usar_lon:
+                medio = (lon_min + lon_max) / 2
+                if bit:
+                    lon_min = medio
+                else:
+                    lon_max = medio
+            else:
+                medio = (lat_min + lat_max) / 2
+                if bit:
+                    lat_min = medio
+                else:
+                    lat_max = medio
+            usar_lon = not usar_lon
+    return lat_min, lon_min, lat_max, lon_max
+
+
+def tamano_celda(precision: int) -> Tuple[float, float]:
+    """Retorna ``(alto, ancho)`` en grados de una celda de la precisión dada."""
+
+    bits_totales = precision * 5
+    bits_lon = math.ceil(bits_totales / 2)
+    bits_lat = bits_totales // 2
+    return 180.0 / (2 ** bits_lat), 360.0 / (2 ** bits_lon)
+
+
+def prefijos_para_bbox(
+    sur: float,
+    oeste: float,
+    norte: float,
+    este: float,
+    max_prefijos: int = 32,
+) -> List[str]:
+    """Retorna los geohash que cubren la caja, con la mayor precisión posible
+    sin superar ``max_prefijos`` celdas."""
+
+    precision = PRECISION_MAXIMA
+    while precision > 1:
+        alto, ancho = tamano_celda(precision)
+        celdas = (math.floor(norte / alto) - math.floor(sur / alto) + 1) * (
+            math.floor(este / ancho) - math.floor(oeste / ancho) + 1
+        )
+        if celdas <= max_prefijos:
+            break
+        precision -= 1
+
+    alto, ancho = tamano_celda(precision)
+    prefijos = set()
+    lat = sur
+    while True:
+        lon = oeste
+        while True:
+            prefijos.add(codificar(min(lat, 90.0), min(lon, 180.0), precision))
+            if lon >= este:
+                break
+            lon = min(lon + ancho, este)
+        if lat >= norte:
+            break
+        lat = min(lat + alto, norte)
+    return sorted(prefijos)
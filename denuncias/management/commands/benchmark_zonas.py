@@ -0,0 +1,90 @@
+"""Compara el resolutor local de zonas con el reverse geocoding de Nominatim."""
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from denuncias.services.zonas import recargar_zonas
+from denuncias.utils import obtener_zona_nominatim
+
+
+class Command(BaseCommand):
+    help = "Mide la latencia del índice local de zonas frente a Nominatim."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--muestras",
+            type=int,
+            default=10000,
+            help="Cantidad de puntos aleatorios consultados en el índice local.",
+        )
+        parser.add_argument(
+            "--nominatim",
+            type=int,
+            default=0,
+            help=(
+                "Cantidad de consultas a Nominatim (se espacian 1 s para respetar "
+                "su política de uso). Por defecto no se consulta."
+            ),
+        )
+        parser.add_argument("--semilla", type=int, default=42)
+
+    def handle(self, *args, **options):
+        indice = recargar_zonas()
+        if indice is None or not indice.poligonos:
+            raise CommandError("No hay zonas cargadas; revisa ZONAS_GEOJSON_PATH.")
+
+        aleatorio = random.Random(options["semilla"])
+        min_lat = min(p.min_lat for p in indice.poligonos)
+        max_lat = max(p.max_lat for p in indice.poligonos)
+        min_lon = min(p.min_lon for p in indice.poligonos)
+        max_lon = max(p.max_lon for p in indice.poligonos)
+        puntos = [
+            (aleatorio.uniform(min_lat, max_lat), aleatorio.uniform(min_lon, max_lon))
+            for _ in range(max(options["muestras"], 1))
+        ]
+
+        tiempos_locales = []
+        aciertos = 0
+        for lat, lon in puntos:
+            inicio = time.perf_counter()
+            zona = indice.buscar(lat, lon)
+            tiempos_locales.append((time.perf_counter() - inicio) * 1_000_000)
+            if zona:
+                aciertos += 1
+
+        self._reportar("Índice local", tiempos_locales, "µs")
+        self.stdout.write(f"  puntos dentro de alguna zona: {aciertos}/{len(puntos)}")
+
+        total_nominatim = options["nominatim"]
+        if total_nominatim <= 0:
+            return
+
+        tiempos_remotos = []
+        coincidencias = 0
+        for lat, lon in puntos[:total_nominatim]:
+            inicio = time.perf_counter()
+            zona_remota = obtener_zona_nominatim(lat, lon)
+            tiempos_remotos.append((time.perf_counter() - inicio) * 1000)
+            if zona_remota == indice.buscar(lat, lon):
+                coincidencias += 1
+            time.sleep(1)
+
+        self._reportar("Nominatim", tiempos_remotos, "ms")
+        self.stdout.write(
+            f"  coincidencias con el índice local: {coincidencias}/{len(tiempos_remotos)}"
+        )
+
+    def _reportar(self, titulo, tiempos, unidad):
+        ordenados = sorted(tiempos)
+        p95 = ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{titulo}: n={len(ordenados)} "
+                f"media={statistics.mean(ordenados):.2f}{unidad} "
+                f"p50={statistics.median(ordenados):.2f}{unidad} "
+                f"p95={p95:.2f}{unidad}"
+            )
+        )
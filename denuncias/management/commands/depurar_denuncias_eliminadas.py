@@ -0,0 +1,24 @@
+"""Elimina las marcas de denuncias eliminadas que ya no necesita ningún token."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from denuncias.services.sincronizacion import depurar_eliminadas
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra las marcas de eliminación más antiguas que DENUNCIAS_SYNC_MAX_DIAS; "
+        "los tokens de esa edad ya se rechazan y el cliente recarga el listado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=1000, help="Filas por transacción.")
+
+    def handle(self, *args, **options):
+        if options["lote"] <= 0:
+            raise CommandError("--lote debe ser positivo.")
+
+        eliminadas = depurar_eliminadas(lote=options["lote"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Marcas de eliminación depuradas: {eliminadas}.")
+        )
@@ -0,0 +1,65 @@
+"""Aplica la retención de notificaciones: elimina leídas y compacta no leídas."""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from denuncias.services.retencion import depurar_notificaciones
+
+
+class Command(BaseCommand):
+    help = (
+        "Elimina las notificaciones leídas antiguas y resume las no leídas "
+        "antiguas en una fila por usuario y denuncia, en lotes acotados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dias-leidas",
+            type=int,
+            default=getattr(settings, "NOTIFICACIONES_RETENCION_DIAS", 90),
+            help="Antigüedad en días a partir de la cual se eliminan las leídas.",
+        )
+        parser.add_argument(
+            "--dias-no-leidas",
+            type=int,
+            default=getattr(settings, "NOTIFICACIONES_COMPACTAR_DIAS", 30),
+            help="Antigüedad en días a partir de la cual se compactan las no leídas.",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=getattr(settings, "NOTIFICACIONES_RETENCION_LOTE", 1000),
+            help="Filas (o pares usuario/denuncia) por transacción.",
+        )
+        parser.add_argument(
+            "--pausa",
+            type=float,
+            default=0.0,
+            help="Segundos de espera entre lotes para aliviar la base de datos.",
+        )
+
+    def handle(self, *args, **options):
+        if options["lote"] <= 0:
+            raise CommandError("--lote debe ser positivo.")
+        if options["dias_leidas"] < 0 or options["dias_no_leidas"] < 0 or options["pausa"] < 0:
+            raise CommandError("--dias-leidas, --dias-no-leidas y --pausa no pueden ser negativos.")
+
+        ahora = timezone.now()
+        resultado = depurar_notificaciones(
+            leidas_antes=ahora - timedelta(days=options["dias_leidas"]),
+            no_leidas_antes=ahora - timedelta(days=options["dias_no_leidas"]),
+            lote=options["lote"],
+            pausa=options["pausa"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Retención terminada en {resultado.segundos:.2f} s: "
+                f"{resultado.filas_eliminadas} filas eliminadas "
+                f"({resultado.leidas_eliminadas} leídas, "
+                f"{resultado.no_leidas_eliminadas} no leídas compactadas en "
+                f"{resultado.resumenes} resúmenes)."
+            )
+        )
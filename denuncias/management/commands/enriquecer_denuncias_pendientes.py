@@ -0,0 +1,36 @@
+"""Completa zona y dirección de las denuncias cuyo enriquecimiento no terminó."""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from denuncias.services.enriquecimiento import enriquecer_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        "Vuelve a enriquecer las denuncias que siguen sin zona porque el "
+        "geocodificador falló o el proceso se reinició con trabajos en cola."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--minutos",
+            type=int,
+            default=10,
+            help="Omite las denuncias creadas en los últimos minutos (aún pueden estar en cola).",
+        )
+        parser.add_argument("--lote", type=int, default=500, help="Filas leídas por bloque.")
+
+    def handle(self, *args, **options):
+        if options["minutos"] < 0 or options["lote"] <= 0:
+            raise CommandError("--minutos no puede ser negativo y --lote debe ser positivo.")
+
+        completadas = enriquecer_pendientes(
+            antes=timezone.now() - timedelta(minutes=options["minutos"]),
+            lote=options["lote"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Enriquecimiento terminado: {completadas} denuncias completadas.")
+        )
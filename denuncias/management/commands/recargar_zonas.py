@@ -0,0 +1,69 @@
+"""Valida y recarga los polígonos de zonas municipales."""
+
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from denuncias.services.zonas import (
+    ZonasGeoJSONError,
+    cargar_indice_desde_archivo,
+    recargar_zonas,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Valida el GeoJSON de zonas municipales y recarga el índice espacial. "
+        "Con --archivo instala un nuevo GeoJSON en ZONAS_GEOJSON_PATH; los "
+        "procesos en ejecución lo detectan automáticamente."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--archivo",
+            help="Ruta de un nuevo GeoJSON que reemplazará al configurado.",
+        )
+
+    def handle(self, *args, **options):
+        destino = getattr(settings, "ZONAS_GEOJSON_PATH", None)
+        if not destino:
+            raise CommandError("ZONAS_GEOJSON_PATH no está configurado.")
+        destino = Path(destino)
+
+        origen = Path(options["archivo"]) if options.get("archivo") else destino
+        if not origen.exists():
+            raise CommandError(f"No existe el archivo de zonas {origen}.")
+
+        inicio = time.perf_counter()
+        try:
+            indice = cargar_indice_desde_archivo(origen)
+        except ZonasGeoJSONError as exc:
+            raise CommandError(str(exc)) from exc
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+
+        if not indice.poligonos:
+            raise CommandError("El archivo no contiene polígonos de zona válidos.")
+
+        if origen.resolve() != destino.resolve():
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            # Copia atómica para que ningún proceso lea un archivo a medio escribir.
+            descriptor, temporal = tempfile.mkstemp(dir=destino.parent, suffix=".geojson")
+            os.close(descriptor)
+            shutil.copyfile(origen, temporal)
+            os.replace(temporal, destino)
+            self.stdout.write(f"Archivo instalado en {destino}.")
+
+        recargar_zonas()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Zonas cargadas: {indice.total_zonas} zonas, "
+                f"{len(indice.poligonos)} polígonos, {indice.total_celdas} celdas "
+                f"({duracion_ms:.1f} ms)."
+            )
+        )
@@ -0,0 +1,153 @@
+"""Recalcula en bloque la zona de denuncias históricas."""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from denuncias.models import Denuncia
+from denuncias.services.zonas import buscar_zona_local
+from denuncias.signals import zonas_actualizadas
+from denuncias.utils import ZONA_DESCONOCIDA, obtener_zona_por_coordenadas
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula la zona de las denuncias sin zona o con 'Zona desconocida' "
+        "(o de todas con --todas), en bloques ordenados por id y en paralelo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--todas",
+            action="store_true",
+            help="Reevalúa todas las denuncias, no solo las que no tienen zona.",
+        )
+        parser.add_argument(
+            "--solo-local",
+            action="store_true",
+            help="Usa únicamente el índice local de polígonos (sin Nominatim).",
+        )
+        parser.add_argument("--bloque", type=int, default=500, help="Filas por bloque.")
+        parser.add_argument("--workers", type=int, default=4, help="Hilos de resolución.")
+        parser.add_argument(
+            "--checkpoint",
+            help="Archivo JSON donde se guarda el último id procesado para reanudar.",
+        )
+        parser.add_argument(
+            "--reiniciar",
+            action="store_true",
+            help="Ignora el checkpoint existente y comienza desde el inicio.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Calcula los cambios sin escribirlos en la base de datos.",
+        )
+
+    def handle(self, *args, **options):
+        bloque = options["bloque"]
+        if bloque <= 0 or options["workers"] <= 0:
+            raise CommandError("--bloque y --workers deben ser positivos.")
+
+        dry_run = options["dry_run"]
+        checkpoint = Path(options["checkpoint"]) if options.get("checkpoint") else None
+        ultimo_id = 0
+        if checkpoint and checkpoint.exists() and not options["reiniciar"]:
+            ultimo_id = self._leer_checkpoint(checkpoint)
+            self.stdout.write(f"Reanudando desde la denuncia #{ultimo_id}.")
+
+        queryset = Denuncia.objects.all()
+        if not options["todas"]:
+            queryset = queryset.filter(Q(zona="") | Q(zona=ZONA_DESCONOCIDA))
+        queryset = queryset.filter(pk__gt=ultimo_id).order_by("pk")
+
+        total = queryset.count()
+        if not total:
+            self.stdout.write("No hay denuncias pendientes de rezonificar.")
+            return
+
+        resolver = self._resolver_local if options["solo_local"] else obtener_zona_por_coordenadas
+        filas = queryset.only("pk", "latitud", "longitud", "zona").iterator(chunk_size=bloque)
+
+        procesadas = actualizadas = 0
+        inicio = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            while True:
+                lote = list(islice(filas, bloque))
+                if not lote:
+                    break
+
+                zonas = executor.map(
+                    lambda denuncia: resolver(denuncia.latitud, denuncia.longitud), lote
+                )
+                cambios = []
+                zonas_anteriores = []
+                ahora = timezone.now()
+                for denuncia, zona_nueva in zip(lote, zonas):
+                    if self._debe_actualizar(denuncia.zona, zona_nueva):
+                        zonas_anteriores.append((denuncia.pk, denuncia.zona))
+                        denuncia.zona = zona_nueva
+                        denuncia.fecha_actualizacion = ahora
+                        cambios.append(denuncia)
+
+                if cambios and not dry_run:
+                    Denuncia.objects.bulk_update(
+                        cambios, ["zona", "fecha_actualizacion"], batch_size=bloque
+                    )
+                    zonas_actualizadas.send(sender=Denuncia, cambios=zonas_anteriores)
+
+                procesadas += len(lote)
+                actualizadas += len(cambios)
+                ultimo_id = lote[-1].pk
+                if checkpoint and not dry_run:
+                    self._guardar_checkpoint(checkpoint, ultimo_id)
+
+                transcurrido = time.monotonic() - inicio
+                self.stdout.write(
+                    f"{procesadas}/{total} procesadas, {actualizadas} con cambios, "
+                    f"último id {ultimo_id} ({procesadas / transcurrido if transcurrido else 0:.0f} filas/s)"
+                )
+
+        if checkpoint and not dry_run and checkpoint.exists():
+            checkpoint.unlink()
+
+        prefijo = "[dry-run] " if dry_run else ""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefijo}Rezonificación terminada: {procesadas} denuncias revisadas, "
+                f"{actualizadas} {'se actualizarían' if dry_run else 'actualizadas'}."
+            )
+        )
+
+    @staticmethod
+    def _resolver_local(lat, lon):
+        return buscar_zona_local(lat, lon) or ZONA_DESCONOCIDA
+
+    @staticmethod
+    def _debe_actualizar(zona_actual, zona_nueva):
+        if not zona_nueva or zona_nueva == zona_actual:
+            return False
+        # Un fallo de resolución no reemplaza una zona ya conocida.
+        return zona_nueva != ZONA_DESCONOCIDA or not zona_actual
+
+    @staticmethod
+    def _leer_checkpoint(ruta):
+        try:
+            with open(ruta, encoding="utf-8") as archivo:
+                return int(json.load(archivo).get("ultimo_id", 0))
+        except (OSError, ValueError, AttributeError) as exc:
+            raise CommandError(f"Checkpoint inválido en {ruta}: {exc}") from exc
+
+    @staticmethod
+    def _guardar_checkpoint(ruta, ultimo_id):
+        temporal = ruta.with_suffix(ruta.suffix + ".tmp")
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            json.dump({"ultimo_id": ultimo_id}, archivo)
+        os.replace(temporal, ruta)
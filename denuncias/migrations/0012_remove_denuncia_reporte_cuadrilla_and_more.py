@@ -0,0 +1,25 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('denuncias', '0011_denuncia_jefe_cuadrilla_historialestado'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='denuncia',
+            name='reporte_cuadrilla',
+        ),
+        migrations.AlterField(
+            model_name='reportecuadrilla',
+            name='denuncia',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='_reporte_cuadrilla_rel', related_query_name='reporte_cuadrilla', to='denuncias.denuncia'),
+        ),
+    ]
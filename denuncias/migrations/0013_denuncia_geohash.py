@@ -0,0 +1,42 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+from denuncias.geohash import codificar
+
+
+def calcular_geohash_existentes(apps, schema_editor):
+    """Calcula el geohash de las denuncias registradas antes de este campo."""
+
+    Denuncia = apps.get_model("denuncias", "Denuncia")
+    pendientes = []
+    for denuncia in Denuncia.objects.only("id", "latitud", "longitud").iterator(chunk_size=1000):
+        denuncia.geohash = codificar(denuncia.latitud, denuncia.longitud)
+        pendientes.append(denuncia)
+        if len(pendientes) >= 1000:
+            Denuncia.objects.bulk_update(pendientes, ["geohash"])
+            pendientes = []
+    if pendientes:
+        Denuncia.objects.bulk_update(pendientes, ["geohash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('denuncias', '0012_remove_denuncia_reporte_cuadrilla_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='denuncia',
+            name='geohash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=12),
+        ),
+        migrations.RunPython(calcular_geohash_existentes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='denuncia',
+            index=models.Index(fields=['geohash'], name='denuncia_geohash_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:06
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import Substr
+
+
+PRECISIONES_CLUSTER = (1, 2, 3, 4, 5, 6)
+
+
+def poblar_clusters(apps, schema_editor):
+    """Calcula los clusters iniciales a partir de las denuncias existentes."""
+
+    Denuncia = apps.get_model("denuncias", "Denuncia")
+    ClusterMapa = apps.get_model("denuncias", "ClusterMapa")
+    base = Denuncia.objects.exclude(geohash="")
+    for precision in PRECISIONES_CLUSTER:
+        filas = (
+            base.annotate(celda=Substr("geohash", 1, precision))
+            .values("celda", "estado")
+            .annotate(
+                total=Count("id"),
+                suma_latitud=Sum("latitud"),
+                suma_longitud=Sum("longitud"),
+            )
+            .order_by()
+        )
+        ClusterMapa.objects.bulk_create(
+            [ClusterMapa(precision=precision, **fila) for fila in filas],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('denuncias', '0013_denuncia_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClusterMapa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('precision', models.PositiveSmallIntegerField()),
+                ('celda', models.CharField(max_length=12)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('rechazada', 'Rechazada'), ('en_gestion', 'En gestión'), ('operativo_realizado', 'Operativo realizado'), ('finalizado', 'Finalizado')], max_length=20)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('suma_latitud', models.FloatField(default=0)),
+                ('suma_longitud', models.FloatField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['celda'], name='cluster_mapa_celda_idx', opclasses=['varchar_pattern_ops'])],
+                'constraints': [models.UniqueConstraint(fields=('precision', 'celda', 'estado'), name='cluster_mapa_celda_estado_unico')],
+            },
+        ),
+        migrations.RunPython(poblar_clusters, migrations.RunPython.noop),
+    ]
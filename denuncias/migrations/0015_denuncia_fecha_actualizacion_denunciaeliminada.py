@@ -0,0 +1,49 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:09
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def inicializar_fecha_actualizacion(apps, schema_editor):
+    """Usa la fecha de creación como última actualización conocida."""
+
+    Denuncia = apps.get_model("denuncias", "Denuncia")
+    Denuncia.objects.update(fecha_actualizacion=F("fecha_creacion"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('denuncias', '0014_clustermapa'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DenunciaEliminada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('denuncia_id', models.BigIntegerField()),
+                ('usuario_id', models.BigIntegerField(blank=True, null=True)),
+                ('fecha_eliminacion', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ('-fecha_eliminacion',),
+            },
+        ),
+        migrations.AddField(
+            model_name='denuncia',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(inicializar_fecha_actualizacion, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='denuncia',
+            index=models.Index(fields=['fecha_actualizacion', 'id'], name='denuncia_fecha_actualiz_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='denunciaeliminada',
+            index=models.Index(fields=['fecha_eliminacion'], name='denuncia_elim_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:12
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import Substr
+
+
+# Copia congelada de los alias de EstadoDenuncia a la fecha de esta migración.
+ESTADOS_CANONICOS = {
+    "pendiente": {
+        "pendiente", "pendientes", "nuevo", "nueva", "nuevas", "nuevos", "nuevo_estado",
+    },
+    "rechazada": {"rechazada", "rechazado", "rechazadas", "rechazados"},
+    "en_gestion": {
+        "en_gestion", "en_proceso", "gestion", "gestionandose",
+    },
+    "operativo_realizado": {
+        "operativo_realizado", "realizado", "realizada", "realizadas", "realizados",
+    },
+    "finalizado": {
+        "finalizado", "finalizada", "finalizadas", "finalizados", "finalizo",
+        "resuelto", "resuelta", "resueltos", "resueltas",
+        "cerrado", "cerrada", "cerrados", "cerradas",
+    },
+}
+
+ALIAS_A_CANONICO = {
+    alias: canonico for canonico, alias_set in ESTADOS_CANONICOS.items() for alias in alias_set
+}
+
+
+def _canonico(valor):
+    clave = "_".join(str(valor or "").strip().lower().replace("-", "_").split())
+    return ALIAS_A_CANONICO.get(clave)
+
+
+def _canonicalizar(modelo, campo):
+    desconocidos = []
+    for valor in modelo.objects.values_list(campo, flat=True).distinct().order_by():
+        canonico = _canonico(valor)
+        if canonico is None:
+            desconocidos.append(valor)
+        elif canonico != valor:
+            modelo.objects.filter(**{campo: valor}).update(**{campo: canonico})
+    return desconocidos
+
+
+def canonicalizar_estados(apps, schema_editor):
+    """Reescribe los estados guardados con alias a su valor canónico."""
+
+    Denuncia = apps.get_model("denuncias", "Denuncia")
+    DenunciaNotificacion = apps.get_model("denuncias", "DenunciaNotificacion")
+    HistorialEstado = apps.get_model("denuncias", "HistorialEstado")
+    ClusterMapa = apps.get_model("denuncias", "ClusterMapa")
+
+    desconocidos = _canonicalizar(Denuncia, "estado")
+    if desconocidos:
+        raise RuntimeError(
+            "Hay denuncias con estados no reconocidos; corrígelos antes de migrar: "
+            + ", ".join(repr(valor) for valor in desconocidos)
+        )
+    _canonicalizar(DenunciaNotificacion, "estado_nuevo")
+    # El historial alimenta las permanencias por estado: con alias, un mismo
+    # estado quedaría repartido en varias claves.
+    _canonicalizar(HistorialEstado, "estado_anterior")
+    _canonicalizar(HistorialEstado, "estado_nuevo")
+
+    # Los clusters del mapa están agrupados por estado: se recalculan.
+    ClusterMapa.objects.all().delete()
+    base = Denuncia.objects.exclude(geohash="")
+    for precision in range(1, 7):
+        filas = (
+            base.annotate(celda=Substr("geohash", 1, precision))
+            .values("celda", "estado")
+            .annotate(
+                total=Count("id"),
+                suma_latitud=Sum("latitud"),
+                suma_longitud=Sum("longitud"),
+            )
+            .order_by()
+        )
+        ClusterMapa.objects.bulk_create(
+            [ClusterMapa(precision=precision, **fila) for fila in filas],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('denuncias', '0015_denuncia_fecha_actualizacion_denunciaeliminada'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(canonicalizar_estados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='denuncia',
+            constraint=models.CheckConstraint(condition=models.Q(('estado__in', ['pendiente', 'rechazada', 'en_gestion', 'operativo_realizado', 'finalizado'])), name='denuncia_estado_canonico'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:13
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('denuncias', '0016_canonicalizar_estado_denuncia'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='denuncia',
+            index=models.Index(fields=['estado', 'fecha_creacion'], name='denuncia_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='denuncia',
+            index=models.Index(django.db.models.functions.text.Lower('zona'), models.F('fecha_creacion'), name='denuncia_zona_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='denuncia',
+            index=models.Index(fields=['jefe_cuadrilla_asignado', 'estado'], name='denuncia_jefe_estado_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('denuncias', '0017_indices_filtros_panel'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='denuncianotificacion',
+            index=models.Index(fields=['usuario', 'leida', 'fecha_creacion'], name='notificacion_usuario_leida_idx'),
+        ),
+    ]
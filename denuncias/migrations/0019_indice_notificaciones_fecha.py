@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('denuncias', '0018_indice_notificaciones_no_leidas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='denuncianotificacion',
+            index=models.Index(fields=['fecha_creacion'], name='notificacion_fecha_idx'),
+        ),
+    ]
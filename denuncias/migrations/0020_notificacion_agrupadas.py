@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('denuncias', '0019_indice_notificaciones_fecha'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='denuncianotificacion',
+            name='agrupadas',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
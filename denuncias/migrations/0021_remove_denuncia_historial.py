@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:37
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('denuncias', '0020_notificacion_agrupadas'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='denuncia',
+            name='historial',
+        ),
+    ]
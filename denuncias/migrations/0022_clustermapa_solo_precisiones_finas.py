@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+PRECISION_BASE = 5
+
+
+def eliminar_precisiones_gruesas(apps, schema_editor):
+    """Las celdas gruesas ahora se suman desde las de PRECISION_BASE al consultar."""
+
+    ClusterMapa = apps.get_model("denuncias", "ClusterMapa")
+    ClusterMapa.objects.filter(precision__lt=PRECISION_BASE).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('denuncias', '0021_remove_denuncia_historial'),
+    ]
+
+    operations = [
+        migrations.RunPython(eliminar_precisiones_gruesas, migrations.RunPython.noop),
+    ]
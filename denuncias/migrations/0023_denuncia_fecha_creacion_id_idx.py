@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('denuncias', '0022_clustermapa_solo_precisiones_finas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='denuncia',
+            index=models.Index(fields=['fecha_creacion', 'id'], name='denuncia_fecha_creacion_id_idx'),
+        ),
+    ]
@@ -1,5 +1,8 @@
 from django.conf import settings
 from django.db import models
+from django.db.models.functions import Lower
+
+from . import geohash
 
 class EstadoDenuncia(models.TextChoices):
     PENDIENTE = "pendiente", "Pendiente"
@@ -192,6 +195,14 @@ class Denuncia(models.Model):
     latitud = models.FloatField()
     longitud = models.FloatField()
 
+    # Geohash de la ubicación; permite filtrar por región con un índice B-tree
+    geohash = models.CharField(
+        max_length=geohash.PRECISION_MAXIMA,
+        blank=True,
+        default="",
+        editable=False,
+    )
+
     # Estado de la denuncia
     estado = models.CharField(
         max_length=20,
@@ -220,14 +231,9 @@ class Denuncia(models.Model):
         related_name="denuncias_asignadas",
     )
 
-    historial = models.ManyToManyField(
-        "HistorialEstado",
-        related_name="denuncias",
-        blank=True,
-    )
-
     # Fecha
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
 
     # Foto (por ahora ruta local; después la cambiamos a S3)
     imagen = models.ImageField(
@@ -238,10 +244,65 @@ class Denuncia(models.Model):
 
     class Meta:
         ordering = ("-fecha_creacion",)
+        indexes = [
+            # Soporta la paginación por cursor (fecha_creacion, id).
+            models.Index(
+                fields=["fecha_creacion", "id"],
+                name="denuncia_fecha_creacion_id_idx",
+            ),
+            # Búsquedas por prefijo (LIKE 'abc%') para el endpoint del mapa.
+            models.Index(
+                fields=["geohash"],
+                name="denuncia_geohash_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+            # Filtros del panel: estado (+ rango de fechas y orden por fecha),
+            # zona sin distinguir mayúsculas y bandeja de cada cuadrilla.
+            models.Index(
+                fields=["estado", "fecha_creacion"],
+                name="denuncia_estado_fecha_idx",
+            ),
+            models.Index(
+                Lower("zona"),
+                "fecha_creacion",
+                name="denuncia_zona_lower_idx",
+            ),
+            models.Index(
+                fields=["jefe_cuadrilla_asignado", "estado"],
+                name="denuncia_jefe_estado_idx",
+            ),
+            # Sincronización incremental (?sync_token / ?updated_since).
+            models.Index(
+                fields=["fecha_actualizacion", "id"],
+                name="denuncia_fecha_actualiz_idx",
+            ),
+        ]
+        constraints = [
+            # Los alias de estado se resuelven en la API; en la base solo se
+            # guardan valores canónicos para filtrar con ``estado = %s``.
+            models.CheckConstraint(
+                condition=models.Q(estado__in=EstadoDenuncia.values),
+                name="denuncia_estado_canonico",
+            ),
+        ]
 
     def __str__(self):
         return f"Denuncia de {self.usuario} ({self.estado})"
 
+    def save(self, *args, **kwargs):
+        if self.latitud is not None and self.longitud is not None:
+            self.geohash = geohash.codificar(self.latitud, self.longitud)
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            # auto_now solo se escribe si el campo está en update_fields.
+            campos = set(update_fields) | {"fecha_actualizacion"}
+            if {"latitud", "longitud"} & campos:
+                campos.add("geohash")
+            kwargs["update_fields"] = campos
+
+        super().save(*args, **kwargs)
+
     @property
     def reporte_cuadrilla(self):
         if hasattr(self, "_cached_reporte_cuadrilla"):
@@ -276,9 +337,21 @@ class DenunciaNotificacion(models.Model):
     )
     leida = models.BooleanField(default=False)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    # Notificaciones que representa esta fila; mayor a 1 en las filas de
+    # resumen que deja la compactación (``depurar_notificaciones``).
+    agrupadas = models.PositiveIntegerField(default=1)
 
     class Meta:
         ordering = ("-fecha_creacion",)
+        indexes = [
+            # Listado y resumen de no leídas por usuario, ordenado por fecha.
+            models.Index(
+                fields=["usuario", "leida", "fecha_creacion"],
+                name="notificacion_usuario_leida_idx",
+            ),
+            # Puente de sondeo del canal SSE (notificaciones recientes).
+            models.Index(fields=["fecha_creacion"], name="notificacion_fecha_idx"),
+        ]
 
     def __str__(self):
         return f"Notificación {self.denuncia_id} → {self.get_estado_nuevo_display()}"
@@ -331,3 +404,62 @@ class HistorialEstado(models.Model):
         return (
             f"Historial denuncia #{self.denuncia_id}: {self.estado_anterior} → {self.estado_nuevo}"
         )
+
+
+class DenunciaEliminada(models.Model):
+    """Marca (tombstone) de una denuncia eliminada.
+
+    Permite que los clientes que sincronizan por ``sync_token`` quiten de su
+    copia local las denuncias que ya no existen. Los identificadores se guardan
+    como enteros simples porque la denuncia, y a veces su autor, ya no existen.
+    """
+
+    denuncia_id = models.BigIntegerField()
+    usuario_id = models.BigIntegerField(null=True, blank=True)
+    fecha_eliminacion = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-fecha_eliminacion",)
+        indexes = [
+            models.Index(
+                fields=["fecha_eliminacion"],
+                name="denuncia_elim_fecha_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Denuncia #{self.denuncia_id} eliminada"
+
+
+class ClusterMapa(models.Model):
+    """Agregado precalculado de denuncias por celda geohash y estado.
+
+    Cada fila resume las denuncias cuyo geohash comienza con ``celda``; la
+    longitud de la celda corresponde a la precisión usada en un rango de zoom.
+    Solo se guardan las precisiones desde ``clusters.PRECISION_BASE``.
+    """
+
+    precision = models.PositiveSmallIntegerField()
+    celda = models.CharField(max_length=geohash.PRECISION_MAXIMA)
+    estado = models.CharField(max_length=20, choices=EstadoDenuncia.choices)
+    total = models.PositiveIntegerField(default=0)
+    suma_latitud = models.FloatField(default=0)
+    suma_longitud = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["precision", "celda", "estado"],
+                name="cluster_mapa_celda_estado_unico",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["celda"],
+                name="cluster_mapa_celda_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
+
+    def __str__(self):
+        return f"Cluster {self.celda} ({self.estado}): {self.total}"
@@ -0,0 +1,112 @@
+"""Paginación por cursor (keyset) para los listados de denuncias."""
+
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class DenunciaCursorPagination(BasePagination):
+    """Pagina por ``(fecha_creacion, id)`` descendente sin usar OFFSET.
+
+    Cada página filtra las filas anteriores a la última entregada, por lo que
+    el costo de una página no depende de su posición ni del tamaño de la tabla.
+    """
+
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    ordering = ("-fecha_creacion", "-id")
+    invalid_cursor_message = "Cursor inválido."
+
+    def __init__(self):
+        self.request = None
+        self.next_cursor = None
+        self.effective_page_size = self.page_size
+
+    def get_page_size(self, request):
+        valor = request.query_params.get(self.page_size_query_param)
+        try:
+            tamano = int(valor)
+        except (TypeError, ValueError):
+            return self.page_size
+        if tamano <= 0:
+            return self.page_size
+        return min(tamano, self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.effective_page_size = self.get_page_size(request)
+
+        posicion = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        if posicion is not None:
+            fecha, identificador = posicion
+            queryset = queryset.filter(
+                Q(fecha_creacion__lt=fecha)
+                | Q(fecha_creacion=fecha, id__lt=identificador)
+            )
+
+        resultados = list(queryset.order_by(*self.ordering)[: self.effective_page_size + 1])
+        hay_mas = len(resultados) > self.effective_page_size
+        resultados = resultados[: self.effective_page_size]
+
+        self.next_cursor = None
+        if hay_mas and resultados:
+            ultimo = resultados[-1]
+            self.next_cursor = self.encode_cursor(ultimo.fecha_creacion, ultimo.id)
+        return resultados
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "next_cursor": self.next_cursor,
+                "page_size": self.effective_page_size,
+                "results": data,
+            }
+        )
+
+    def encode_cursor(self, fecha, identificador):
+        contenido = json.dumps({"f": fecha.isoformat(), "id": identificador})
+        return base64.urlsafe_b64encode(contenido.encode("utf-8")).decode("ascii")
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            contenido = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            fecha = parse_datetime(contenido["f"])
+            identificador = int(contenido["id"])
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if fecha is None:
+            raise NotFound(self.invalid_cursor_message)
+        return fecha, identificador
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "schema": {"type": "integer", "maximum": self.max_page_size},
+            },
+        ]
@@ -1,7 +1,7 @@
 import logging
 
 from django.contrib.auth import get_user_model
-from django.db import OperationalError, ProgrammingError
+from django.db import transaction
 from rest_framework import serializers
 
 from .models import (
@@ -11,6 +11,8 @@ from .models import (
     HistorialEstado,
     ReporteCuadrilla,
 )
+from .services.esquema import tabla_disponible
+from .services.tiempo_real import publicar_notificacion
 
 
 logger = logging.getLogger(__name__)
@@ -223,20 +225,22 @@ class DenunciaAdminSerializer(DenunciaSerializer):
         estado_anterior = EstadoDenuncia.normalize(instance.estado)
         nuevo_estado = validated_data.get("estado")
 
-        instancia_actualizada = super().update(instance, validated_data)
-
-        if (
-            instancia_actualizada.estado != EstadoDenuncia.RECHAZADA
-            and instancia_actualizada.motivo_rechazo
+        # El motivo de rechazo se limpia en el mismo UPDATE de la denuncia.
+        estado_final = nuevo_estado or instance.estado
+        if estado_final != EstadoDenuncia.RECHAZADA and validated_data.get(
+            "motivo_rechazo", instance.motivo_rechazo
         ):
-            instancia_actualizada.motivo_rechazo = None
-            instancia_actualizada.save(update_fields=["motivo_rechazo"])
+            validated_data["motivo_rechazo"] = None
 
-        if nuevo_estado and nuevo_estado != estado_anterior:
-            self._crear_notificacion_estado(instancia_actualizada, nuevo_estado)
-            self._registrar_historial_estado(
-                instancia_actualizada, estado_anterior, nuevo_estado
-            )
+        # Denuncia, notificación e historial se confirman en una sola transacción.
+        with transaction.atomic():
+            instancia_actualizada = super().update(instance, validated_data)
+
+            if nuevo_estado and nuevo_estado != estado_anterior:
+                self._crear_notificacion_estado(instancia_actualizada, nuevo_estado)
+                self._registrar_historial_estado(
+                    instancia_actualizada, estado_anterior, nuevo_estado
+                )
 
         return instancia_actualizada
 
@@ -268,18 +272,20 @@ class DenunciaAdminSerializer(DenunciaSerializer):
         mensaje = self._construir_mensaje_notificacion(denuncia)
         if not mensaje:
             return
-        try:
-            DenunciaNotificacion.objects.create(
-                usuario=denuncia.usuario,
-                denuncia=denuncia,
-                mensaje=mensaje,
-                estado_nuevo=nuevo_estado,
-            )
-        except (ProgrammingError, OperationalError):
+        # Se consulta la caché de tablas en lugar de capturar el error: dentro
+        # de la transacción un error de la base la dejaría inutilizable.
+        if not tabla_disponible(DenunciaNotificacion):
             logger.warning(
-                "No se pudo registrar la notificación del cambio de estado; ¿ejecutaste las migraciones?",
-                exc_info=True,
+                "No se pudo registrar la notificación del cambio de estado; ¿ejecutaste las migraciones?"
             )
+            return
+        notificacion = DenunciaNotificacion.objects.create(
+            usuario=denuncia.usuario,
+            denuncia=denuncia,
+            mensaje=mensaje,
+            estado_nuevo=nuevo_estado,
+        )
+        publicar_notificacion(notificacion)
 
     def _construir_mensaje_notificacion(self, denuncia):
         estado_display = denuncia.get_estado_display()
@@ -346,20 +352,18 @@ class DenunciaAdminSerializer(DenunciaSerializer):
         return MOTIVOS_RECHAZO_TEXTOS.get(clave, texto)
 
     def _registrar_historial_estado(self, denuncia, estado_anterior, estado_nuevo):
-        responsable = self._obtener_usuario()
-        try:
-            registro = HistorialEstado.objects.create(
-                denuncia=denuncia,
-                estado_anterior=estado_anterior or "",
-                estado_nuevo=estado_nuevo or "",
-                responsable=responsable if getattr(responsable, "is_authenticated", False) else None,
-            )
-            denuncia.historial.add(registro)
-        except (ProgrammingError, OperationalError):
+        if not tabla_disponible(HistorialEstado):
             logger.warning(
-                "No se pudo registrar el historial del cambio de estado; ¿ejecutaste las migraciones?",
-                exc_info=True,
+                "No se pudo registrar el historial del cambio de estado; ¿ejecutaste las migraciones?"
             )
+            return
+        responsable = self._obtener_usuario()
+        HistorialEstado.objects.create(
+            denuncia=denuncia,
+            estado_anterior=estado_anterior or "",
+            estado_nuevo=estado_nuevo or "",
+            responsable=responsable if getattr(responsable, "is_authenticated", False) else None,
+        )
 
 
 class DenunciaCiudadanoSerializer(DenunciaSerializer):
@@ -401,6 +405,7 @@ class NotificacionDenunciaSerializer(serializers.ModelSerializer):
             "denuncia_descripcion",
             "estado_nuevo",
             "estado_nuevo_display",
+            "agrupadas",
         ]
         read_only_fields = [
             "id",
@@ -410,5 +415,41 @@ class NotificacionDenunciaSerializer(serializers.ModelSerializer):
             "denuncia_descripcion",
             "estado_nuevo",
             "estado_nuevo_display",
+            "agrupadas",
         ]
         extra_kwargs = {"leida": {"required": False}}
+
+
+class HistorialEstadoSerializer(serializers.ModelSerializer):
+    responsable = serializers.SerializerMethodField()
+
+    class Meta:
+        model = HistorialEstado
+        fields = ["id", "estado_anterior", "estado_nuevo", "responsable", "fecha"]
+        read_only_fields = fields
+
+    def get_responsable(self, obj):
+        responsable = obj.responsable
+        if not responsable:
+            return None
+        return {
+            "id": responsable.id,
+            "nombre": responsable.get_full_name() or responsable.username,
+        }
+
+
+class MarcarNotificacionesLeidasSerializer(serializers.Serializer):
+    """Selección de notificaciones a marcar como leídas: ``ids`` o ``hasta_id``."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=500,
+    )
+    hasta_id = serializers.IntegerField(required=False, min_value=1)
+
+    def validate(self, attrs):
+        if ("ids" in attrs) == ("hasta_id" in attrs):
+            raise serializers.ValidationError("Indica 'ids' o 'hasta_id', pero no ambos.")
+        return attrs
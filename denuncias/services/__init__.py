@@ -0,0 +1,77 @@
+"""Servicios de apoyo para la app de denuncias."""
+
+from .cache_zonas import CacheZonas, obtener_cache_zonas, reiniciar_cache_zonas
+from .clusters import (
+    precision_para_zoom,
+    reconstruir_clusters,
+    restar_denuncia,
+    sumar_denuncia,
+)
+from .enriquecimiento import (
+    encolar_enriquecimiento,
+    enriquecer_denuncia,
+    enriquecer_pendientes,
+)
+from .esquema import invalidar_tablas_disponibles, tabla_disponible
+from .geocodificacion import (
+    CircuitBreaker,
+    ClienteNominatim,
+    LimitadorTasa,
+    obtener_cliente_nominatim,
+)
+from .retencion import ResultadoRetencion, depurar_notificaciones
+from .sincronizacion import (
+    TokenSincronizacionInvalido,
+    cambios_desde,
+    depurar_eliminadas,
+    eliminadas_desde,
+    generar_token_sincronizacion,
+    resolver_desde,
+)
+from .tiempo_real import (
+    CanalNotificaciones,
+    obtener_canal_notificaciones,
+    publicar_notificacion,
+)
+from .zonas import (
+    IndiceZonas,
+    ZonasGeoJSONError,
+    buscar_zona_local,
+    cargar_indice_desde_archivo,
+    recargar_zonas,
+)
+
+__all__ = [
+    "CacheZonas",
+    "obtener_cache_zonas",
+    "reiniciar_cache_zonas",
+    "precision_para_zoom",
+    "reconstruir_clusters",
+    "restar_denuncia",
+    "sumar_denuncia",
+    "encolar_enriquecimiento",
+    "enriquecer_denuncia",
+    "enriquecer_pendientes",
+    "invalidar_tablas_disponibles",
+    "tabla_disponible",
+    "CircuitBreaker",
+    "ClienteNominatim",
+    "LimitadorTasa",
+    "obtener_cliente_nominatim",
+    "ResultadoRetencion",
+    "depurar_notificaciones",
+    "TokenSincronizacionInvalido",
+    "cambios_desde",
+    "depurar_eliminadas",
+    "eliminadas_desde",
+    "generar_token_sincronizacion",
+    "resolver_desde",
+    "CanalNotificaciones",
+    "obtener_canal_notificaciones",
+    "publicar_notificacion",
+    "IndiceZonas",
+    "ZonasGeoJSONError",
+    "buscar_zona_local",
+    "cargar_indice_desde_archivo",
+    "recargar_zonas",
+]
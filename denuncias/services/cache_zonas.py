@@ -0,0 +1,205 @@
+"""Caché de zonas resueltas, agrupando coordenadas cercanas en una grilla."""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+
+
+logger = logging.getLogger(__name__)
+
+ClaveCelda = Tuple[int, int]
+
+
+class CacheZonas:
+    """LRU acotado con expiración por TTL para zonas por celda de grilla.
+
+    Las coordenadas se ajustan a celdas de ``tamano_celda`` grados, de modo que
+    denuncias cercanas comparten la misma entrada. Opcionalmente se usa además
+    el backend de caché de Django para compartir resultados entre workers; sus
+    claves incluyen ``version`` (la del índice de zonas), así que al recargar
+    los polígonos las entradas anteriores dejan de leerse.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entradas: int = 2048,
+        ttl: float = 86400,
+        tamano_celda: float = 0.0005,
+        alias_cache_django: str | None = None,
+        version: str = "",
+        reloj: Callable[[], float] = time.monotonic,
+    ):
+        if max_entradas <= 0:
+            raise ValueError("max_entradas debe ser positivo.")
+        if tamano_celda <= 0:
+            raise ValueError("tamano_celda debe ser positivo.")
+
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.tamano_celda = tamano_celda
+        self.alias_cache_django = alias_cache_django
+        self.version = version
+        self._reloj = reloj
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[ClaveCelda, Tuple[str, float]]" = OrderedDict()
+        self._contadores = {
+            "aciertos": 0,
+            "aciertos_compartidos": 0,
+            "fallos": 0,
+            "desalojos": 0,
+            "expiraciones": 0,
+        }
+
+    def celda(self, lat: float, lon: float) -> ClaveCelda:
+        return (
+            math.floor(lat / self.tamano_celda),
+            math.floor(lon / self.tamano_celda),
+        )
+
+    def _clave_compartida(self, celda: ClaveCelda) -> str:
+        return f"zonas:{self.version}:{self.tamano_celda}:{celda[0]}:{celda[1]}"
+
+    def _cache_compartida(self):
+        if not self.alias_cache_django:
+            return None
+        try:
+            return caches[self.alias_cache_django]
+        except InvalidCacheBackendError:
+            logger.warning(
+                "El alias de caché %s no existe; se usa solo la caché local.",
+                self.alias_cache_django,
+            )
+            self.alias_cache_django = None
+            return None
+
+    def obtener(self, lat: float, lon: float) -> Optional[str]:
+        celda = self.celda(lat, lon)
+        ahora = self._reloj()
+
+        with self._lock:
+            entrada = self._entradas.get(celda)
+            if entrada is not None:
+                zona, expira = entrada
+                if expira > ahora:
+                    self._entradas.move_to_end(celda)
+                    self._contadores["aciertos"] += 1
+                    return zona
+                del self._entradas[celda]
+                self._contadores["expiraciones"] += 1
+
+        compartida = self._cache_compartida()
+        if compartida is not None:
+            zona = compartida.get(self._clave_compartida(celda))
+            if zona:
+                self._guardar_local(celda, zona, ahora)
+                with self._lock:
+                    self._contadores["aciertos_compartidos"] += 1
+                return zona
+
+        with self._lock:
+            self._contadores["fallos"] += 1
+        return None
+
+    def guardar(self, lat: float, lon: float, zona: str) -> None:
+        celda = self.celda(lat, lon)
+        self._guardar_local(celda, zona, self._reloj())
+
+        compartida = self._cache_compartida()
+        if compartida is not None:
+            compartida.set(self._clave_compartida(celda), zona, timeout=self.ttl)
+
+    def _guardar_local(self, celda: ClaveCelda, zona: str, ahora: float) -> None:
+        with self._lock:
+            self._entradas[celda] = (zona, ahora + self.ttl)
+            self._entradas.move_to_end(celda)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self._contadores["desalojos"] += 1
+
+    def obtener_o_resolver(
+        self, lat: float, lon: float, resolver: Callable[[float, float], str], *, omitir=()
+    ) -> str:
+        """Retorna la zona en caché o la resuelve y la guarda.
+
+        Los valores incluidos en ``omitir`` (por ejemplo, "Zona desconocida")
+        no se almacenan para no fijar errores transitorios.
+        """
+
+        zona = self.obtener(lat, lon)
+        if zona is not None:
+            return zona
+
+        zona = resolver(lat, lon)
+        if zona and zona not in omitir:
+            self.guardar(lat, lon, zona)
+        return zona
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            for clave in self._contadores:
+                self._contadores[clave] = 0
+
+    def estadisticas(self) -> Dict[str, object]:
+        with self._lock:
+            contadores = dict(self._contadores)
+            entradas = len(self._entradas)
+
+        consultas = contadores["aciertos"] + contadores["aciertos_compartidos"] + contadores["fallos"]
+        aciertos_totales = contadores["aciertos"] + contadores["aciertos_compartidos"]
+        return {
+            **contadores,
+            "entradas": entradas,
+            "max_entradas": self.max_entradas,
+            "ttl_segundos": self.ttl,
+            "tamano_celda": self.tamano_celda,
+            "compartida": bool(self.alias_cache_django),
+            "version": self.version,
+            "tasa_aciertos": round(aciertos_totales / consultas, 4) if consultas else 0.0,
+        }
+
+
+_cache_zonas: Optional[CacheZonas] = None
+_cache_zonas_lock = threading.Lock()
+
+
+def obtener_cache_zonas() -> CacheZonas:
+    """Entrega la caché de zonas del proceso, configurada desde settings.
+
+    Si el índice de zonas cambió (otra versión del archivo), se descarta la
+    caché local y se crea una nueva con claves compartidas de esa versión.
+    """
+
+    # Import diferido: el módulo de zonas importa este.
+    from .zonas import version_zonas
+
+    global _cache_zonas
+    version = version_zonas()
+    if _cache_zonas is None or _cache_zonas.version != version:
+        with _cache_zonas_lock:
+            if _cache_zonas is None or _cache_zonas.version != version:
+                _cache_zonas = CacheZonas(
+                    max_entradas=getattr(settings, "ZONAS_CACHE_MAX_ENTRADAS", 2048),
+                    ttl=getattr(settings, "ZONAS_CACHE_TTL", 86400),
+                    tamano_celda=getattr(settings, "ZONAS_CACHE_TAMANO_CELDA", 0.0005),
+                    alias_cache_django=getattr(settings, "ZONAS_CACHE_ALIAS", None),
+                    version=version,
+                )
+    return _cache_zonas
+
+
+def reiniciar_cache_zonas() -> None:
+    """Descarta la caché actual; la siguiente consulta la recrea desde settings."""
+
+    global _cache_zonas
+    with _cache_zonas_lock:
+        _cache_zonas = None
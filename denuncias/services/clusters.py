@@ -0,0 +1,159 @@
+"""Agrupación de denuncias en celdas geohash para el mapa del panel."""
+
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Substr
+
+from denuncias.models import ClusterMapa, Denuncia
+
+
+# (zoom máximo, precisión geohash). Las celdas quedan en ~30-130 px de pantalla.
+_PRECISION_POR_ZOOM = (
+    (2, 1),
+    (4, 2),
+    (7, 3),
+    (9, 4),
+    (12, 5),
+    (13, 6),
+)
+
+PRECISIONES_CLUSTER = tuple(precision for _, precision in _PRECISION_POR_ZOOM)
+
+# Solo se guardan las precisiones finas. Una celda gruesa abarca la ciudad
+# completa y sería una fila que todas las escrituras de denuncias actualizan
+# en serie; sus totales se obtienen sumando las celdas de PRECISION_BASE.
+PRECISION_BASE = 5
+PRECISIONES_ALMACENADAS = tuple(p for p in PRECISIONES_CLUSTER if p >= PRECISION_BASE)
+
+
+def precision_para_zoom(zoom: int) -> Optional[int]:
+    """Precisión de agrupación para el zoom; ``None`` si se muestran marcadores."""
+
+    for zoom_maximo, precision in _PRECISION_POR_ZOOM:
+        if zoom <= zoom_maximo:
+            return precision
+    return None
+
+
+def _ajustar(geohash_denuncia: str, estado: str, lat: float, lon: float, signo: int) -> None:
+    for precision in PRECISIONES_ALMACENADAS:
+        celda = geohash_denuncia[:precision]
+        filtro = {"precision": precision, "celda": celda, "estado": estado}
+        actualizados = ClusterMapa.objects.filter(**filtro).update(
+            total=F("total") + signo,
+            suma_latitud=F("suma_latitud") + signo * lat,
+            suma_longitud=F("suma_longitud") + signo * lon,
+        )
+        if actualizados or signo < 0:
+            continue
+        try:
+            with transaction.atomic():
+                ClusterMapa.objects.create(
+                    total=1, suma_latitud=lat, suma_longitud=lon, **filtro
+                )
+        except IntegrityError:
+            # Otro proceso creó la fila en paralelo: se suma sobre ella.
+            ClusterMapa.objects.filter(**filtro).update(
+                total=F("total") + 1,
+                suma_latitud=F("suma_latitud") + lat,
+                suma_longitud=F("suma_longitud") + lon,
+            )
+
+    if signo < 0:
+        ClusterMapa.objects.filter(
+            celda__in=[geohash_denuncia[:p] for p in PRECISIONES_ALMACENADAS],
+            estado=estado,
+            total__lte=0,
+        ).delete()
+
+
+def sumar_denuncia(geohash_denuncia: str, estado: str, lat: float, lon: float) -> None:
+    if geohash_denuncia and estado:
+        _ajustar(geohash_denuncia, estado, lat, lon, 1)
+
+
+def restar_denuncia(geohash_denuncia: str, estado: str, lat: float, lon: float) -> None:
+    if geohash_denuncia and estado:
+        _ajustar(geohash_denuncia, estado, lat, lon, -1)
+
+
+def agrupar_denuncias(queryset, precision: int) -> Iterable[dict]:
+    """Agrupa en vivo un queryset de denuncias (para filtros no precalculados)."""
+
+    return (
+        queryset.annotate(celda=Substr("geohash", 1, precision))
+        .values("celda", "estado")
+        .annotate(
+            total=Count("id"),
+            suma_latitud=Sum("latitud"),
+            suma_longitud=Sum("longitud"),
+        )
+        .order_by()
+    )
+
+
+def filtro_celdas(celdas: Iterable[str], gruesos: Iterable[str], precision: int) -> Q:
+    """Condición sobre ``ClusterMapa`` para las celdas de ``precision`` pedidas.
+
+    ``gruesos`` son prefijos más cortos que la celda: seleccionan todas las
+    celdas que contienen. Bajo ``PRECISION_BASE`` se leen las filas base.
+    """
+
+    celdas, gruesos = sorted(celdas), list(gruesos)
+    if precision >= PRECISION_BASE:
+        condicion = Q(celda__in=celdas) if celdas else Q()
+        for prefijo in gruesos:
+            condicion |= Q(celda__startswith=prefijo)
+        return condicion & Q(precision=precision)
+
+    condicion = Q()
+    for prefijo in celdas + gruesos:
+        condicion |= Q(celda__startswith=prefijo)
+    return condicion & Q(precision=PRECISION_BASE)
+
+
+def resumir_precalculados(queryset, precision: int) -> Iterable[dict]:
+    """Filas ``celda, estado, total, suma_latitud, suma_longitud`` a ``precision``.
+
+    ``queryset`` es de ``ClusterMapa`` filtrado con ``filtro_celdas``; bajo
+    ``PRECISION_BASE`` las filas base se suman por prefijo en la consulta.
+    """
+
+    campos = ("total", "suma_latitud", "suma_longitud")
+    if precision >= PRECISION_BASE:
+        return queryset.values("celda", "estado", *campos)
+
+    filas = (
+        queryset.values(grupo=Substr("celda", 1, precision), estado_grupo=F("estado"))
+        .annotate(**{f"{campo}_grupo": Sum(campo) for campo in campos})
+        .order_by()
+    )
+    return (
+        {
+            "celda": fila["grupo"],
+            "estado": fila["estado_grupo"],
+            **{campo: fila[f"{campo}_grupo"] for campo in campos},
+        }
+        for fila in filas
+    )
+
+
+@transaction.atomic
+def reconstruir_clusters() -> int:
+    """Recalcula por completo la tabla de clusters; retorna las filas creadas."""
+
+    ClusterMapa.objects.all().delete()
+    base = Denuncia.objects.exclude(geohash="")
+    creados = 0
+    for precision in PRECISIONES_ALMACENADAS:
+        filas = [
+            ClusterMapa(precision=precision, **fila)
+            for fila in agrupar_denuncias(base, precision)
+        ]
+        ClusterMapa.objects.bulk_create(filas, batch_size=1000)
+        creados += len(filas)
+    return creados
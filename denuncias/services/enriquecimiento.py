@@ -0,0 +1,151 @@
+"""Enriquecimiento asíncrono de denuncias (zona y dirección) fuera del request."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from denuncias.models import Denuncia
+
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _obtener_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "ENRIQUECIMIENTO_WORKERS", 2),
+                    thread_name_prefix="enriquecimiento-denuncias",
+                )
+    return _executor
+
+
+def encolar_enriquecimiento(denuncia_id: int) -> None:
+    """Programa el cálculo de zona y dirección una vez confirmada la transacción."""
+
+    def _enviar():
+        if getattr(settings, "ENRIQUECIMIENTO_SINCRONO", False):
+            enriquecer_denuncia(denuncia_id)
+            return
+        _obtener_executor().submit(_ejecutar_en_worker, denuncia_id)
+
+    transaction.on_commit(_enviar)
+
+
+def _ejecutar_en_worker(denuncia_id: int, intento: int = 0) -> None:
+    close_old_connections()
+    try:
+        enriquecer_denuncia(denuncia_id, intento=intento)
+    except Exception:
+        logger.exception("Falló el enriquecimiento de la denuncia #%s.", denuncia_id)
+    finally:
+        close_old_connections()
+
+
+def _programar_reintento(denuncia_id: int, intento: int) -> None:
+    """Vuelve a encolar la denuncia tras el backoff, sin ocupar un worker esperando."""
+
+    espera = getattr(settings, "ENRIQUECIMIENTO_ESPERA_BASE", 2.0) * (2 ** intento)
+    logger.info(
+        "Reintentando enriquecimiento de la denuncia #%s en %.1f s.", denuncia_id, espera
+    )
+    temporizador = threading.Timer(
+        espera,
+        lambda: _obtener_executor().submit(_ejecutar_en_worker, denuncia_id, intento + 1),
+    )
+    temporizador.daemon = True
+    temporizador.start()
+
+
+def enriquecer_denuncia(denuncia_id: int, *, intento: int = 0, reprogramar: bool = True) -> bool:
+    """Completa ``zona`` y ``direccion`` vacías de la denuncia indicada.
+
+    Hace una sola consulta a Nominatim y toma de ella ambos datos. Si la
+    consulta falló (red, límite de tasa o circuito abierto) y quedan
+    reintentos, la denuncia se vuelve a encolar con backoff exponencial; al
+    agotarlos la zona queda vacía para que ``enriquecer_denuncias_pendientes``
+    la retome. Un punto sin dirección o sin zona conocida es un resultado
+    válido y no se reintenta. Solo escribe sobre campos que sigan vacíos, para
+    no pisar ediciones hechas mientras tanto. Retorna ``True`` si se
+    actualizó algún campo.
+    """
+
+    # Imports diferidos: denuncias.utils y denuncias.signals dependen de este
+    # paquete de servicios.
+    from denuncias.signals import zonas_actualizadas
+    from denuncias.utils import ZONA_DESCONOCIDA, obtener_zona_y_direccion
+
+    fila = (
+        Denuncia.objects.filter(pk=denuncia_id)
+        .values("latitud", "longitud", "zona", "direccion")
+        .first()
+    )
+    if fila is None:
+        return False
+
+    requiere_zona = not fila["zona"]
+    requiere_direccion = not fila["direccion"]
+    if not (requiere_zona or requiere_direccion):
+        return False
+
+    resultado = obtener_zona_y_direccion(
+        fila["latitud"],
+        fila["longitud"],
+        requiere_zona=requiere_zona,
+        requiere_direccion=requiere_direccion,
+    )
+    if resultado is None:
+        if reprogramar and intento < getattr(settings, "ENRIQUECIMIENTO_REINTENTOS", 3):
+            _programar_reintento(denuncia_id, intento)
+        else:
+            logger.warning(
+                "La denuncia #%s quedó sin enriquecer; se retomará con "
+                "enriquecer_denuncias_pendientes.",
+                denuncia_id,
+            )
+        return False
+
+    zona, direccion = resultado
+    actualizados = 0
+    if requiere_zona:
+        if Denuncia.objects.filter(pk=denuncia_id, zona="").update(
+            zona=zona or ZONA_DESCONOCIDA, fecha_actualizacion=timezone.now()
+        ):
+            actualizados += 1
+            zonas_actualizadas.send(sender=Denuncia, cambios=[(denuncia_id, "")])
+    if requiere_direccion and direccion:
+        actualizados += Denuncia.objects.filter(pk=denuncia_id, direccion="").update(
+            direccion=direccion, fecha_actualizacion=timezone.now()
+        )
+    return bool(actualizados)
+
+
+def enriquecer_pendientes(*, antes=None, lote: int = 500) -> int:
+    """Enriquece en este hilo las denuncias que siguen sin zona; retorna cuántas se completaron.
+
+    Recupera las que agotaron sus reintentos o cuyo trabajo se perdió al
+    reiniciar el proceso. ``antes`` omite las creadas después, que pueden
+    seguir en cola.
+    """
+
+    pendientes = Denuncia.objects.filter(zona="")
+    if antes is not None:
+        pendientes = pendientes.filter(fecha_creacion__lt=antes)
+    completadas = 0
+    for denuncia_id in pendientes.order_by("pk").values_list("pk", flat=True).iterator(
+        chunk_size=lote
+    ):
+        completadas += enriquecer_denuncia(denuncia_id, reprogramar=False)
+    return completadas
@@ -0,0 +1,48 @@
+"""Caché por proceso de las tablas disponibles en la base de datos.
+
+Consultar ``connection.introspection.table_names()`` lista todo el esquema,
+así que no conviene hacerlo en cada request. El resultado se calcula la
+primera vez que se pide, se invalida con ``post_migrate`` y se puede
+invalidar a mano con ``invalidar_tablas_disponibles()``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Tuple
+
+from django.db import OperationalError, ProgrammingError, connection
+
+# Una tabla ausente se vuelve a consultar tras este plazo, para que un proceso
+# iniciado antes de ``migrate`` (que corre en otro proceso) la detecte.
+REINTENTO_TABLA_AUSENTE = 60.0
+
+_tablas: Dict[str, Tuple[bool, float]] = {}
+_tablas_lock = threading.Lock()
+
+
+def tabla_disponible(modelo) -> bool:
+    """Indica si la tabla del modelo existe, consultando la base solo una vez."""
+
+    tabla = modelo._meta.db_table
+    disponible, consultada = _tablas.get(tabla, (None, 0.0))
+    if disponible or (
+        disponible is False and time.monotonic() - consultada < REINTENTO_TABLA_AUSENTE
+    ):
+        return disponible
+
+    try:
+        disponible = tabla in connection.introspection.table_names()
+    except (ProgrammingError, OperationalError):
+        disponible = False
+    with _tablas_lock:
+        _tablas[tabla] = (disponible, time.monotonic())
+    return disponible
+
+
+def invalidar_tablas_disponibles(**kwargs) -> None:
+    """Olvida las tablas verificadas; acepta los argumentos de una señal."""
+
+    with _tablas_lock:
+        _tablas.clear()
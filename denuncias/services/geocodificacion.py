@@ -0,0 +1,242 @@
+"""Cliente HTTP reutilizable para el reverse geocoding de Nominatim."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Corta las llamadas tras ``umbral_fallos`` errores consecutivos.
+
+    Mientras está abierto las consultas fallan de inmediato. Pasado
+    ``tiempo_reapertura`` se deja pasar una única consulta de prueba
+    (semiabierto): si resulta bien se cierra, si falla vuelve a abrirse.
+    """
+
+    CERRADO = "cerrado"
+    ABIERTO = "abierto"
+    SEMIABIERTO = "semiabierto"
+
+    def __init__(
+        self,
+        umbral_fallos: int = 3,
+        tiempo_reapertura: float = 60.0,
+        reloj: Callable[[], float] = time.monotonic,
+    ):
+        self.umbral_fallos = umbral_fallos
+        self.tiempo_reapertura = tiempo_reapertura
+        self._reloj = reloj
+        self._lock = threading.Lock()
+        self._estado = self.CERRADO
+        self._fallos = 0
+        self._abierto_hasta = 0.0
+        self._prueba_en_curso = False
+
+    @property
+    def estado(self) -> str:
+        with self._lock:
+            if self._estado == self.ABIERTO and self._reloj() >= self._abierto_hasta:
+                return self.SEMIABIERTO
+            return self._estado
+
+    def permitir(self) -> bool:
+        with self._lock:
+            if self._estado == self.CERRADO:
+                return True
+            if self._reloj() < self._abierto_hasta or self._prueba_en_curso:
+                return False
+            self._estado = self.SEMIABIERTO
+            self._prueba_en_curso = True
+            return True
+
+    def registrar_exito(self) -> None:
+        with self._lock:
+            self._estado = self.CERRADO
+            self._fallos = 0
+            self._prueba_en_curso = False
+
+    def liberar_prueba(self) -> None:
+        """Libera la consulta de prueba reservada sin registrar resultado."""
+
+        with self._lock:
+            self._prueba_en_curso = False
+
+    def registrar_fallo(self) -> None:
+        with self._lock:
+            self._fallos += 1
+            self._prueba_en_curso = False
+            if self._estado == self.SEMIABIERTO or self._fallos >= self.umbral_fallos:
+                self._abrir(self.tiempo_reapertura)
+
+    def abrir(self, segundos: float) -> None:
+        """Abre el circuito durante el tiempo indicado (p. ej. por ``Retry-After``)."""
+
+        with self._lock:
+            self._prueba_en_curso = False
+            self._abrir(segundos)
+
+    def _abrir(self, segundos: float) -> None:
+        self._estado = self.ABIERTO
+        self._abierto_hasta = self._reloj() + max(segundos, 0)
+
+
+class LimitadorTasa:
+    """Espacia las consultas para respetar el límite de uso del servicio."""
+
+    def __init__(
+        self,
+        intervalo_minimo: float = 1.0,
+        reloj: Callable[[], float] = time.monotonic,
+        dormir: Callable[[float], None] = time.sleep,
+    ):
+        self.intervalo_minimo = intervalo_minimo
+        self._reloj = reloj
+        self._dormir = dormir
+        self._lock = threading.Lock()
+        self._proximo_turno = 0.0
+
+    def adquirir(self, espera_maxima: float) -> bool:
+        """Reserva un turno; ``False`` si habría que esperar más de lo permitido."""
+
+        with self._lock:
+            ahora = self._reloj()
+            turno = max(ahora, self._proximo_turno)
+            espera = turno - ahora
+            if espera > espera_maxima:
+                return False
+            self._proximo_turno = turno + self.intervalo_minimo
+
+        if espera > 0:
+            self._dormir(espera)
+        return True
+
+
+class ClienteNominatim:
+    """Cliente con sesión keep-alive, circuit breaker y límite de tasa."""
+
+    def __init__(
+        self,
+        *,
+        url_base: str = "https://nominatim.openstreetmap.org",
+        user_agent: str = "microbasurales-app/1.0",
+        timeout_conexion: float = 2.0,
+        timeout_lectura: float = 3.0,
+        tamano_pool: int = 4,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        limitador: Optional[LimitadorTasa] = None,
+        espera_maxima: float = 2.0,
+    ):
+        self.url_base = url_base.rstrip("/")
+        self.timeout = (timeout_conexion, timeout_lectura)
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.limitador = limitador or LimitadorTasa()
+        self.espera_maxima = espera_maxima
+
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": user_agent})
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=tamano_pool, max_retries=0)
+        self.session.mount("http://", adaptador)
+        self.session.mount("https://", adaptador)
+
+    def reverse(self, lat: float, lon: float) -> Optional[dict]:
+        """Retorna el diccionario ``address`` del punto o ``None`` si falla."""
+
+        if not self.circuit_breaker.permitir():
+            return None
+
+        if not self.limitador.adquirir(self.espera_maxima):
+            # Sin turno disponible a tiempo: no cuenta como fallo del servicio.
+            self.circuit_breaker.liberar_prueba()
+            return None
+
+        try:
+            respuesta = self.session.get(
+                f"{self.url_base}/reverse",
+                params={"format": "json", "lat": lat, "lon": lon, "addressdetails": 1},
+                timeout=self.timeout,
+            )
+        except requests.RequestException:
+            logger.warning("Nominatim no respondió para (%s, %s).", lat, lon, exc_info=True)
+            self.circuit_breaker.registrar_fallo()
+            return None
+
+        if respuesta.status_code == 429:
+            espera = _segundos_retry_after(respuesta.headers.get("Retry-After"))
+            self.circuit_breaker.abrir(
+                espera if espera is not None else self.circuit_breaker.tiempo_reapertura
+            )
+            logger.warning("Nominatim limitó la tasa de consultas (429).")
+            return None
+
+        if respuesta.status_code >= 500:
+            self.circuit_breaker.registrar_fallo()
+            return None
+
+        if respuesta.status_code != 200:
+            self.circuit_breaker.registrar_exito()
+            return None
+
+        try:
+            datos = respuesta.json()
+        except ValueError:
+            self.circuit_breaker.registrar_fallo()
+            return None
+
+        self.circuit_breaker.registrar_exito()
+        return datos.get("address", {}) if isinstance(datos, dict) else {}
+
+
+def _segundos_retry_after(valor) -> Optional[float]:
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+_cliente: Optional[ClienteNominatim] = None
+_cliente_lock = threading.Lock()
+
+
+def obtener_cliente_nominatim() -> ClienteNominatim:
+    """Entrega el cliente compartido por el proceso, configurado desde settings."""
+
+    global _cliente
+    if _cliente is None:
+        with _cliente_lock:
+            if _cliente is None:
+                _cliente = ClienteNominatim(
+                    url_base=getattr(settings, "NOMINATIM_URL", "https://nominatim.openstreetmap.org"),
+                    user_agent=getattr(settings, "NOMINATIM_USER_AGENT", "microbasurales-app/1.0"),
+                    timeout_conexion=getattr(settings, "NOMINATIM_TIMEOUT_CONEXION", 2.0),
+                    timeout_lectura=getattr(settings, "NOMINATIM_TIMEOUT_LECTURA", 3.0),
+                    tamano_pool=getattr(settings, "NOMINATIM_TAMANO_POOL", 4),
+                    circuit_breaker=CircuitBreaker(
+                        umbral_fallos=getattr(settings, "NOMINATIM_UMBRAL_FALLOS", 3),
+                        tiempo_reapertura=getattr(settings, "NOMINATIM_TIEMPO_REAPERTURA", 60.0),
+                    ),
+                    limitador=LimitadorTasa(
+                        intervalo_minimo=getattr(settings, "NOMINATIM_INTERVALO_MINIMO", 1.0),
+                    ),
+                    espera_maxima=getattr(settings, "NOMINATIM_ESPERA_MAXIMA", 2.0),
+                )
+    return _cliente
+
+
+def reiniciar_cliente_nominatim() -> None:
+    """Cierra la sesión actual; la próxima consulta crea un cliente nuevo."""
+
+    global _cliente
+    with _cliente_lock:
+        if _cliente is not None:
+            _cliente.session.close()
+        _cliente = None
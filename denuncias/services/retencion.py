@@ -0,0 +1,142 @@
+"""Retención y compactación de ``DenunciaNotificacion``.
+
+Las notificaciones leídas antiguas se eliminan y las no leídas antiguas de
+un mismo usuario y denuncia se resumen en una sola fila. Todo se hace en
+lotes acotados, cada uno en su propia transacción, para no mantener
+bloqueos largos sobre la tabla.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from denuncias.models import DenunciaNotificacion
+
+_LARGO_MENSAJE = DenunciaNotificacion._meta.get_field("mensaje").max_length
+
+
+@dataclass
+class ResultadoRetencion:
+    leidas_eliminadas: int = 0
+    no_leidas_eliminadas: int = 0
+    resumenes: int = 0
+    segundos: float = 0.0
+
+    @property
+    def filas_eliminadas(self) -> int:
+        return self.leidas_eliminadas + self.no_leidas_eliminadas
+
+
+def eliminar_leidas_antiguas(antes: datetime, *, lote: int = 1000, pausa: float = 0.0) -> int:
+    """Elimina por lotes las notificaciones leídas creadas antes de ``antes``."""
+
+    eliminadas = 0
+    candidatas = DenunciaNotificacion.objects.filter(leida=True, fecha_creacion__lt=antes)
+    while True:
+        ids = list(candidatas.order_by("id").values_list("id", flat=True)[:lote])
+        if not ids:
+            break
+        eliminadas += DenunciaNotificacion.objects.filter(id__in=ids).delete()[0]
+        if pausa:
+            time.sleep(pausa)
+    return eliminadas
+
+
+def _mensaje_resumen(total: int, denuncia_id: int, ultimo_mensaje: str) -> str:
+    mensaje = f"{total} actualizaciones de tu denuncia #{denuncia_id}. Última: {ultimo_mensaje}"
+    if len(mensaje) > _LARGO_MENSAJE:
+        mensaje = mensaje[: _LARGO_MENSAJE - 1] + "…"
+    return mensaje
+
+
+def _compactar_grupos(antes: datetime, grupos: List[Tuple[int, int]]) -> Tuple[int, int]:
+    """Resume los grupos ``(usuario_id, denuncia_id)``; retorna (eliminadas, resúmenes)."""
+
+    condicion = Q()
+    for usuario_id, denuncia_id in grupos:
+        condicion |= Q(usuario_id=usuario_id, denuncia_id=denuncia_id)
+
+    with transaction.atomic():
+        filas = (
+            DenunciaNotificacion.objects.select_for_update()
+            .filter(condicion, leida=False, fecha_creacion__lt=antes)
+            .order_by("id")
+            .only("id", "usuario_id", "denuncia_id", "mensaje", "agrupadas")
+        )
+        por_grupo: Dict[Tuple[int, int], List[DenunciaNotificacion]] = {}
+        for fila in filas:
+            por_grupo.setdefault((fila.usuario_id, fila.denuncia_id), []).append(fila)
+
+        resumenes = []
+        eliminar = []
+        for (_, denuncia_id), notificaciones in por_grupo.items():
+            if len(notificaciones) < 2:
+                continue
+            # Se conserva la más reciente (su estado y fecha) como fila de resumen.
+            *anteriores, ultima = notificaciones
+            total = sum(notificacion.agrupadas for notificacion in notificaciones)
+            ultimo_mensaje = ultima.mensaje
+            if ultima.agrupadas > 1:
+                ultimo_mensaje = ultimo_mensaje.split(". Última: ", 1)[-1]
+            ultima.mensaje = _mensaje_resumen(total, denuncia_id, ultimo_mensaje)
+            ultima.agrupadas = total
+            resumenes.append(ultima)
+            eliminar.extend(notificacion.id for notificacion in anteriores)
+
+        if eliminar:
+            DenunciaNotificacion.objects.filter(id__in=eliminar).delete()
+            DenunciaNotificacion.objects.bulk_update(resumenes, ["mensaje", "agrupadas"])
+    return len(eliminar), len(resumenes)
+
+
+def compactar_no_leidas_antiguas(
+    antes: datetime, *, lote: int = 1000, pausa: float = 0.0
+) -> Tuple[int, int]:
+    """Resume en una fila las no leídas antiguas de cada usuario y denuncia.
+
+    Retorna ``(filas eliminadas, filas de resumen)``. Cada transacción toca
+    a lo sumo ``lote`` pares usuario/denuncia.
+    """
+
+    grupos = list(
+        DenunciaNotificacion.objects.filter(leida=False, fecha_creacion__lt=antes)
+        .values_list("usuario_id", "denuncia_id")
+        .annotate(total=Count("id"))
+        .filter(total__gt=1)
+        .order_by("usuario_id", "denuncia_id")
+        .values_list("usuario_id", "denuncia_id")
+    )
+
+    eliminadas = resumenes = 0
+    for inicio in range(0, len(grupos), lote):
+        lote_eliminadas, lote_resumenes = _compactar_grupos(antes, grupos[inicio : inicio + lote])
+        eliminadas += lote_eliminadas
+        resumenes += lote_resumenes
+        if pausa:
+            time.sleep(pausa)
+    return eliminadas, resumenes
+
+
+def depurar_notificaciones(
+    *,
+    leidas_antes: datetime,
+    no_leidas_antes: datetime,
+    lote: int = 1000,
+    pausa: float = 0.0,
+) -> ResultadoRetencion:
+    """Aplica la retención completa y mide cuánto tardó."""
+
+    inicio = time.perf_counter()
+    resultado = ResultadoRetencion()
+    resultado.leidas_eliminadas = eliminar_leidas_antiguas(leidas_antes, lote=lote, pausa=pausa)
+    resultado.no_leidas_eliminadas, resultado.resumenes = compactar_no_leidas_antiguas(
+        no_leidas_antes, lote=lote, pausa=pausa
+    )
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
@@ -0,0 +1,212 @@
+"""Canal en memoria para empujar notificaciones a los clientes conectados (SSE).
+
+Cada conexión ``/api/denuncias/notificaciones/stream/`` se suscribe con una
+cola asyncio; una conexión inactiva solo ocupa esa cola y una tarea en espera,
+sin hilos ni consultas. Las notificaciones llegan por dos vías:
+
+* ``publicar_notificacion``: la llama quien crea la notificación, al
+  confirmarse la transacción, y entrega al instante en el mismo proceso.
+* El puente por sondeo: con varios workers, una sola tarea por proceso
+  consulta las notificaciones nuevas cada pocos segundos y las reparte a
+  sus suscriptores. Su costo no depende de cuántos clientes haya conectados.
+
+El canal descarta ids ya entregados, así que ambas vías pueden coexistir.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import OperationalError, ProgrammingError, transaction
+from django.utils import timezone
+
+from denuncias.models import DenunciaNotificacion
+
+logger = logging.getLogger(__name__)
+
+Evento = Dict[str, Any]
+
+# Eventos en espera por conexión; si un cliente no lee, se descartan los
+# siguientes (al reconectar recupera lo perdido con Last-Event-ID).
+MAXIMO_EN_COLA = 100
+# Ids recordados para no entregar dos veces la misma notificación.
+MAXIMO_IDS_RECORDADOS = 4096
+
+
+class CanalNotificaciones:
+    """Pub/sub en memoria por usuario, seguro entre hilos y event loops."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._suscriptores: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._entregados: "OrderedDict[int, None]" = OrderedDict()
+        self._puente: Optional[asyncio.Task] = None
+
+    def suscribir(self, usuario_id: int) -> asyncio.Queue:
+        """Registra una conexión del usuario; debe llamarse desde su event loop."""
+
+        loop = asyncio.get_running_loop()
+        cola: asyncio.Queue = asyncio.Queue(maxsize=MAXIMO_EN_COLA)
+        with self._lock:
+            self._suscriptores.setdefault(usuario_id, set()).add((loop, cola))
+        self._asegurar_puente(loop)
+        return cola
+
+    def desuscribir(self, usuario_id: int, cola: asyncio.Queue) -> None:
+        with self._lock:
+            colas = self._suscriptores.get(usuario_id, set())
+            colas.difference_update({par for par in colas if par[1] is cola})
+            if not colas:
+                self._suscriptores.pop(usuario_id, None)
+
+    def conectados(self) -> int:
+        with self._lock:
+            return sum(len(colas) for colas in self._suscriptores.values())
+
+    def publicar(self, usuario_id: int, evento: Evento) -> int:
+        """Entrega ``evento`` a las conexiones del usuario; retorna cuántas lo reciben.
+
+        Se puede llamar desde cualquier hilo.
+        """
+
+        with self._lock:
+            evento_id = evento.get("id")
+            if evento_id is not None:
+                if evento_id in self._entregados:
+                    return 0
+                self._entregados[evento_id] = None
+                while len(self._entregados) > MAXIMO_IDS_RECORDADOS:
+                    self._entregados.popitem(last=False)
+            destinos = list(self._suscriptores.get(usuario_id, ()))
+
+        for loop, cola in destinos:
+            try:
+                loop.call_soon_threadsafe(self._encolar, cola, evento)
+            except RuntimeError:
+                # El event loop de esa conexión ya se cerró.
+                self.desuscribir(usuario_id, cola)
+        return len(destinos)
+
+    @staticmethod
+    def _encolar(cola: asyncio.Queue, evento: Evento) -> None:
+        try:
+            cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            logger.debug("Cola SSE llena; se descarta la notificación %s.", evento.get("id"))
+
+    def _usuarios_conectados(self) -> List[int]:
+        with self._lock:
+            return list(self._suscriptores)
+
+    def _asegurar_puente(self, loop: asyncio.AbstractEventLoop) -> None:
+        if not getattr(settings, "NOTIFICACIONES_SSE_PUENTE", True):
+            return
+        if self._puente is not None and not self._puente.done():
+            return
+        self._puente = loop.create_task(self._sondear())
+
+    async def _sondear(self) -> None:
+        """Reparte las notificaciones creadas por otros procesos mientras haya conexiones."""
+
+        intervalo = getattr(settings, "NOTIFICACIONES_SSE_SONDEO_SEGUNDOS", 2.0)
+        # Mismo margen que la sincronización incremental: cubre transacciones
+        # confirmadas después del sondeo anterior con una fecha previa.
+        margen = timedelta(seconds=getattr(settings, "DENUNCIAS_SYNC_MARGEN_SEGUNDOS", 5))
+        desde = timezone.now()
+        while self._usuarios_conectados():
+            await asyncio.sleep(intervalo)
+            usuarios = self._usuarios_conectados()
+            if not usuarios:
+                break
+            ahora = timezone.now()
+            try:
+                eventos = await sync_to_async(notificaciones_desde)(desde - margen, usuarios)
+            except Exception:
+                logger.exception("Falló el sondeo de notificaciones para SSE.")
+                continue
+            desde = ahora
+            for evento in eventos:
+                self.publicar(evento["usuario"], evento)
+
+
+def evento_notificacion(notificacion: DenunciaNotificacion) -> Evento:
+    """Datos enviados al cliente: los mismos del listado de notificaciones."""
+
+    # Import diferido: el serializer vive en un módulo que importa servicios.
+    from denuncias.serializers import NotificacionDenunciaSerializer
+
+    evento = dict(NotificacionDenunciaSerializer(notificacion).data)
+    evento["usuario"] = notificacion.usuario_id
+    return evento
+
+
+def notificaciones_desde(desde, usuarios: List[int]) -> List[Evento]:
+    """Notificaciones creadas desde ``desde`` para los usuarios indicados.
+
+    Se filtra solo por fecha (índice ``notificacion_fecha_idx``) y los
+    usuarios se descartan en memoria: la ventana trae pocas filas y la
+    lista de conectados puede tener miles de ids.
+    """
+
+    conectados = set(usuarios)
+    queryset = (
+        DenunciaNotificacion.objects.filter(fecha_creacion__gte=desde)
+        .select_related("denuncia")
+        .order_by("id")
+    )
+    return [
+        evento_notificacion(notificacion)
+        for notificacion in queryset
+        if notificacion.usuario_id in conectados
+    ]
+
+
+def notificaciones_posteriores(usuario_id: int, ultimo_id: int) -> List[Evento]:
+    """Notificaciones no leídas del usuario con id mayor a ``ultimo_id`` (reconexión)."""
+
+    try:
+        queryset = (
+            DenunciaNotificacion.objects.filter(
+                usuario_id=usuario_id, leida=False, id__gt=ultimo_id
+            )
+            .select_related("denuncia")
+            .order_by("id")
+        )
+        return [evento_notificacion(notificacion) for notificacion in queryset]
+    except (ProgrammingError, OperationalError):
+        logger.warning(
+            "No se pudieron recuperar las notificaciones; ¿ejecutaste las migraciones?",
+            exc_info=True,
+        )
+        return []
+
+
+_canal: Optional[CanalNotificaciones] = None
+_canal_lock = threading.Lock()
+
+
+def obtener_canal_notificaciones() -> CanalNotificaciones:
+    global _canal
+    if _canal is None:
+        with _canal_lock:
+            if _canal is None:
+                _canal = CanalNotificaciones()
+    return _canal
+
+
+def publicar_notificacion(notificacion: DenunciaNotificacion) -> None:
+    """Publica la notificación en el canal cuando se confirme la transacción."""
+
+    def _publicar():
+        obtener_canal_notificaciones().publicar(
+            notificacion.usuario_id, evento_notificacion(notificacion)
+        )
+
+    transaction.on_commit(_publicar)
@@ -0,0 +1,319 @@
+"""Resolución local de zonas municipales a partir de polígonos GeoJSON."""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+from .cache_zonas import reiniciar_cache_zonas
+
+
+logger = logging.getLogger(__name__)
+
+Anillo = Sequence[Tuple[float, float]]
+
+_PROPIEDADES_NOMBRE = ("nombre", "name", "zona", "NOMBRE", "NAME")
+_INTERVALO_REVISION_ARCHIVO = 30.0
+
+
+class ZonasGeoJSONError(ValueError):
+    """Error levantado cuando el archivo de zonas no tiene un formato válido."""
+
+
+@dataclass
+class PoligonoZona:
+    """Polígono (con posibles huecos) asociado a una zona municipal."""
+
+    nombre: str
+    exterior: Anillo
+    huecos: List[Anillo] = field(default_factory=list)
+    min_lon: float = 0.0
+    min_lat: float = 0.0
+    max_lon: float = 0.0
+    max_lat: float = 0.0
+
+    def __post_init__(self):
+        lons = [punto[0] for punto in self.exterior]
+        lats = [punto[1] for punto in self.exterior]
+        self.min_lon, self.max_lon = min(lons), max(lons)
+        self.min_lat, self.max_lat = min(lats), max(lats)
+
+    def contiene_bbox(self, lat: float, lon: float) -> bool:
+        return (
+            self.min_lat <= lat <= self.max_lat
+            and self.min_lon <= lon <= self.max_lon
+        )
+
+    def contiene(self, lat: float, lon: float) -> bool:
+        if not self.contiene_bbox(lat, lon):
+            return False
+        if not _punto_en_anillo(lon, lat, self.exterior):
+            return False
+        return not any(_punto_en_anillo(lon, lat, hueco) for hueco in self.huecos)
+
+
+def _punto_en_anillo(x: float, y: float, anillo: Anillo) -> bool:
+    """Algoritmo de ray casting sobre un anillo en coordenadas (lon, lat)."""
+
+    dentro = False
+    j = len(anillo) - 1
+    for i in range(len(anillo)):
+        xi, yi = anillo[i][0], anillo[i][1]
+        xj, yj = anillo[j][0], anillo[j][1]
+        if (yi > y) != (yj > y):
+            cruce = (xj - xi) * (y - yi) / (yj - yi) + xi
+            if x < cruce:
+                dentro = not dentro
+        j = i
+    return dentro
+
+
+class IndiceZonas:
+    """Índice espacial en memoria basado en una grilla de cajas envolventes.
+
+    Cada celda de la grilla guarda los polígonos cuya caja envolvente la
+    intersecta, de modo que una consulta solo evalúa el punto contra los pocos
+    candidatos de su celda.
+    """
+
+    def __init__(self, poligonos: Iterable[PoligonoZona], tamano_celda: float = 0.01):
+        if tamano_celda <= 0:
+            raise ValueError("El tamaño de celda debe ser positivo.")
+
+        self.tamano_celda = tamano_celda
+        self.poligonos: List[PoligonoZona] = list(poligonos)
+        self._celdas: Dict[Tuple[int, int], List[int]] = {}
+
+        for posicion, poligono in enumerate(self.poligonos):
+            x_min, y_min = self._celda(poligono.min_lat, poligono.min_lon)
+            x_max, y_max = self._celda(poligono.max_lat, poligono.max_lon)
+            for x in range(x_min, x_max + 1):
+                for y in range(y_min, y_max + 1):
+                    self._celdas.setdefault((x, y), []).append(posicion)
+
+    def _celda(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (
+            math.floor(lon / self.tamano_celda),
+            math.floor(lat / self.tamano_celda),
+        )
+
+    @property
+    def total_zonas(self) -> int:
+        return len({poligono.nombre for poligono in self.poligonos})
+
+    @property
+    def total_celdas(self) -> int:
+        return len(self._celdas)
+
+    def buscar(self, lat: float, lon: float) -> Optional[str]:
+        """Retorna el nombre de la zona que contiene el punto o ``None``."""
+
+        for posicion in self._celdas.get(self._celda(lat, lon), ()):
+            poligono = self.poligonos[posicion]
+            if poligono.contiene(lat, lon):
+                return poligono.nombre
+        return None
+
+
+def _nombre_feature(feature: dict) -> str:
+    propiedades = feature.get("properties") or {}
+    if not isinstance(propiedades, dict):
+        raise ZonasGeoJSONError("Las propiedades de un Feature deben ser un objeto.")
+    propiedad_configurada = getattr(settings, "ZONAS_GEOJSON_PROPIEDAD_NOMBRE", "")
+    candidatas = (propiedad_configurada,) + _PROPIEDADES_NOMBRE
+    for clave in candidatas:
+        valor = propiedades.get(clave) if clave else None
+        if valor and str(valor).strip():
+            return str(valor).strip()
+    return ""
+
+
+def _punto(punto) -> Tuple[float, float]:
+    if not isinstance(punto, (list, tuple)) or len(punto) < 2:
+        raise ZonasGeoJSONError(f"Coordenada inválida en el GeoJSON: {punto!r}.")
+    try:
+        lon, lat = float(punto[0]), float(punto[1])
+    except (TypeError, ValueError) as exc:
+        raise ZonasGeoJSONError(f"Coordenada inválida en el GeoJSON: {punto!r}.") from exc
+    if not (math.isfinite(lon) and math.isfinite(lat)):
+        raise ZonasGeoJSONError(f"Coordenada inválida en el GeoJSON: {punto!r}.")
+    return lon, lat
+
+
+def _lista(valor, descripcion: str) -> list:
+    if not isinstance(valor, list):
+        raise ZonasGeoJSONError(f"Se esperaba una lista en {descripcion} del GeoJSON.")
+    return valor
+
+
+def _anillos_validos(anillos) -> List[Anillo]:
+    return [
+        [_punto(punto) for punto in anillo]
+        for anillo in (_lista(anillo, "un anillo") for anillo in _lista(anillos, "un polígono"))
+        if len(anillo) >= 3
+    ]
+
+
+def poligonos_desde_geojson(datos: dict) -> List[PoligonoZona]:
+    """Convierte un ``FeatureCollection`` GeoJSON en polígonos de zona.
+
+    Lanza ``ZonasGeoJSONError`` si la estructura no es la esperada, aunque el
+    archivo sea un JSON válido.
+    """
+
+    if not isinstance(datos, dict):
+        raise ZonasGeoJSONError("Se esperaba un Feature o FeatureCollection GeoJSON.")
+    if datos.get("type") == "Feature":
+        features = [datos]
+    elif datos.get("type") == "FeatureCollection":
+        features = _lista(datos.get("features") or [], "features")
+    else:
+        raise ZonasGeoJSONError("Se esperaba un Feature o FeatureCollection GeoJSON.")
+
+    poligonos: List[PoligonoZona] = []
+    for feature in features:
+        if not isinstance(feature, dict):
+            raise ZonasGeoJSONError("Cada elemento de features debe ser un Feature.")
+        geometria = feature.get("geometry") or {}
+        if not isinstance(geometria, dict):
+            raise ZonasGeoJSONError("La geometría de un Feature debe ser un objeto.")
+        nombre = _nombre_feature(feature)
+        if not nombre:
+            logger.warning("Se omitió una zona sin nombre en el archivo GeoJSON.")
+            continue
+
+        tipo = geometria.get("type")
+        if tipo in ("Polygon", "MultiPolygon"):
+            coordenadas = _lista(geometria.get("coordinates"), f"las coordenadas de {nombre}")
+            grupos = [coordenadas] if tipo == "Polygon" else coordenadas
+        else:
+            logger.warning("Geometría %s no soportada para la zona %s.", tipo, nombre)
+            continue
+
+        for grupo in grupos:
+            anillos = _anillos_validos(grupo)
+            if not anillos:
+                continue
+            poligonos.append(
+                PoligonoZona(nombre=nombre, exterior=anillos[0], huecos=anillos[1:])
+            )
+
+    return poligonos
+
+
+def cargar_indice_desde_archivo(ruta, tamano_celda: float | None = None) -> IndiceZonas:
+    """Lee el archivo GeoJSON indicado y construye su índice espacial."""
+
+    try:
+        with open(ruta, encoding="utf-8") as archivo:
+            datos = json.load(archivo)
+    except json.JSONDecodeError as exc:
+        raise ZonasGeoJSONError(f"El archivo {ruta} no es un JSON válido: {exc}") from exc
+
+    if tamano_celda is None:
+        tamano_celda = getattr(settings, "ZONAS_INDICE_TAMANO_CELDA", 0.01)
+    return IndiceZonas(poligonos_desde_geojson(datos), tamano_celda=tamano_celda)
+
+
+class _ResolutorZonas:
+    """Mantiene el índice de zonas del proceso y lo recarga si cambia el archivo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indice: Optional[IndiceZonas] = None
+        self._ruta: Optional[Path] = None
+        self._mtime: Optional[float] = None
+        self._ultima_revision = 0.0
+
+    def _ruta_configurada(self) -> Optional[Path]:
+        ruta = getattr(settings, "ZONAS_GEOJSON_PATH", None)
+        return Path(ruta) if ruta else None
+
+    def recargar(self) -> Optional[IndiceZonas]:
+        ruta = self._ruta_configurada()
+        with self._lock:
+            self._ultima_revision = time.monotonic()
+            if not ruta or not ruta.exists():
+                self._indice, self._ruta, self._mtime = None, ruta, None
+                reiniciar_cache_zonas()
+                return None
+
+            mtime = os.path.getmtime(ruta)
+            try:
+                indice = cargar_indice_desde_archivo(ruta)
+            except (OSError, ZonasGeoJSONError):
+                logger.exception("No se pudo cargar el archivo de zonas %s.", ruta)
+                return self._indice
+
+            self._indice, self._ruta, self._mtime = indice, ruta, mtime
+            # Las zonas cacheadas pueden haber cambiado con los nuevos polígonos.
+            reiniciar_cache_zonas()
+            logger.info(
+                "Índice de zonas cargado: %s zonas, %s polígonos, %s celdas.",
+                indice.total_zonas,
+                len(indice.poligonos),
+                indice.total_celdas,
+            )
+            return indice
+
+    def _requiere_recarga(self) -> bool:
+        ahora = time.monotonic()
+        if self._ruta is not None and ahora - self._ultima_revision < _INTERVALO_REVISION_ARCHIVO:
+            return False
+
+        ruta = self._ruta_configurada()
+        if ruta != self._ruta:
+            return True
+
+        self._ultima_revision = ahora
+        try:
+            return os.path.getmtime(ruta) != self._mtime
+        except (OSError, TypeError):
+            return self._indice is not None
+
+    def indice(self) -> Optional[IndiceZonas]:
+        if self._requiere_recarga():
+            return self.recargar()
+        return self._indice
+
+    def version(self) -> str:
+        """Identifica el índice vigente por la fecha de modificación del archivo."""
+
+        self.indice()
+        return f"{self._mtime:.6f}" if self._mtime is not None else "sin-indice"
+
+    def buscar(self, lat: float, lon: float) -> Optional[str]:
+        indice = self.indice()
+        if indice is None:
+            return None
+        return indice.buscar(lat, lon)
+
+
+resolutor_zonas = _ResolutorZonas()
+
+
+def buscar_zona_local(lat: float, lon: float) -> Optional[str]:
+    """Busca la zona del punto en el índice local; ``None`` si no hay coincidencia."""
+
+    return resolutor_zonas.buscar(lat, lon)
+
+
+def version_zonas() -> str:
+    """Versión del índice de zonas del proceso; cambia al recargar otro archivo."""
+
+    return resolutor_zonas.version()
+
+
+def recargar_zonas() -> Optional[IndiceZonas]:
+    """Fuerza la recarga del índice de zonas del proceso actual."""
+
+    return resolutor_zonas.recargar()
@@ -0,0 +1,68 @@
+"""Señales que mantienen los datos derivados de denuncias (clusters, eliminaciones
+y marcas de sincronización)."""
+
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from .models import Denuncia, DenunciaEliminada, ReporteCuadrilla
+from .services import clusters
+
+# Se envía tras cambiar zonas con update()/bulk_update, que no emiten post_save.
+# Argumento ``cambios``: lista de tuplas ``(denuncia_id, zona_anterior)``.
+zonas_actualizadas = Signal()
+
+_CAMPOS_CLUSTER = ("geohash", "estado", "latitud", "longitud")
+
+
+def _snapshot_cluster(instance):
+    # Se lee desde __dict__ para no disparar consultas sobre campos diferidos.
+    valores = tuple(instance.__dict__.get(campo) for campo in _CAMPOS_CLUSTER)
+    return None if None in valores else valores
+
+
+@receiver(post_init, sender=Denuncia)
+def guardar_ubicacion_original(sender, instance, **kwargs):
+    instance._cluster_original = _snapshot_cluster(instance)
+
+
+@receiver(post_save, sender=Denuncia)
+def actualizar_clusters_al_guardar(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not set(_CAMPOS_CLUSTER) & set(update_fields):
+        return
+
+    anterior = getattr(instance, "_cluster_original", None)
+    actual = _snapshot_cluster(instance)
+    if actual is None:
+        return
+
+    if created:
+        clusters.sumar_denuncia(*actual)
+    elif anterior is not None and anterior != actual:
+        clusters.restar_denuncia(*anterior)
+        clusters.sumar_denuncia(*actual)
+
+    instance._cluster_original = actual
+
+
+@receiver(post_delete, sender=Denuncia)
+def actualizar_clusters_al_eliminar(sender, instance, **kwargs):
+    anterior = getattr(instance, "_cluster_original", None)
+    if anterior is not None:
+        clusters.restar_denuncia(*anterior)
+
+
+@receiver(post_delete, sender=Denuncia)
+def registrar_denuncia_eliminada(sender, instance, **kwargs):
+    DenunciaEliminada.objects.create(
+        denuncia_id=instance.pk, usuario_id=instance.usuario_id
+    )
+
+
+@receiver(post_save, sender=ReporteCuadrilla)
+@receiver(post_delete, sender=ReporteCuadrilla)
+def marcar_denuncia_modificada_por_reporte(sender, instance, **kwargs):
+    # El reporte forma parte de la denuncia que ven las cargas incrementales:
+    # se actualiza fecha_actualizacion para que basten los filtros sobre ella.
+    # update() no emite señales de Denuncia.
+    Denuncia.objects.filter(pk=instance.denuncia_id).update(fecha_actualizacion=timezone.now())
@@ -1,16 +1,55 @@
 """Tests para la app de denuncias."""
 
+import asyncio
 import io
+import json
+import os
 import shutil
 import tempfile
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from importlib import import_module
+from unittest import mock
 
+from django.apps import apps
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.http import QueryDict
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from PIL import Image
 
-from .models import Denuncia, EstadoDenuncia, ReporteCuadrilla
+from . import geohash
+from .models import (
+    ClusterMapa,
+    Denuncia,
+    DenunciaEliminada,
+    DenunciaNotificacion,
+    EstadoDenuncia,
+    HistorialEstado,
+    ReporteCuadrilla,
+)
+from .services import enriquecimiento
+from .services.cache_zonas import CacheZonas, reiniciar_cache_zonas
+from .services.clusters import PRECISION_BASE
+from .services.enriquecimiento import enriquecer_denuncia
+from .services.esquema import invalidar_tablas_disponibles, tabla_disponible
+from .services.tiempo_real import notificaciones_desde, obtener_canal_notificaciones
+from .services.geocodificacion import CircuitBreaker, ClienteNominatim, LimitadorTasa
+from .services.zonas import (
+    IndiceZonas,
+    ZonasGeoJSONError,
+    _ResolutorZonas,
+    poligonos_desde_geojson,
+    recargar_zonas,
+)
+from .utils import ZONA_DESCONOCIDA, obtener_zona_por_coordenadas, obtener_zona_y_direccion
+from .views import _aplicar_filtros_panel
 
 
 class PanelCuadrillaViewTests(TestCase):
@@ -97,3 +136,1135 @@ class PanelCuadrillaViewTests(TestCase):
         reporte = ReporteCuadrilla.objects.get(denuncia=denuncia)
         self.assertEqual(reporte.jefe_cuadrilla, self.jefe)
         self.assertEqual(reporte.comentario, "Trabajo realizado")
+
+
+def _feature_zona(nombre, lon_min, lat_min, lon_max, lat_max):
+    return {
+        "type": "Feature",
+        "properties": {"nombre": nombre},
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [
+                [
+                    [lon_min, lat_min],
+                    [lon_max, lat_min],
+                    [lon_max, lat_max],
+                    [lon_min, lat_max],
+                    [lon_min, lat_min],
+                ]
+            ],
+        },
+    }
+
+
+ZONAS_GEOJSON_PRUEBA = {
+    "type": "FeatureCollection",
+    "features": [
+        _feature_zona("Centro", -70.70, -33.50, -70.60, -33.40),
+        _feature_zona("Norte", -70.70, -33.40, -70.60, -33.30),
+    ],
+}
+
+
+class ResolutorZonasTests(TestCase):
+    """Pruebas del índice local de zonas y su fallback a Nominatim."""
+
+    def setUp(self):
+        descriptor, self.ruta_geojson = tempfile.mkstemp(suffix=".geojson")
+        with os.fdopen(descriptor, "w", encoding="utf-8") as archivo:
+            json.dump(ZONAS_GEOJSON_PRUEBA, archivo)
+        self.addCleanup(os.remove, self.ruta_geojson)
+        self.addCleanup(recargar_zonas)
+
+    def test_indice_ubica_punto_y_respeta_huecos(self):
+        feature = _feature_zona("Con hueco", -70.70, -33.50, -70.60, -33.40)
+        feature["geometry"]["coordinates"].append(
+            [[-70.66, -33.46], [-70.64, -33.46], [-70.64, -33.44], [-70.66, -33.46]]
+        )
+        indice = IndiceZonas(
+            poligonos_desde_geojson({"type": "FeatureCollection", "features": [feature]}),
+            tamano_celda=0.05,
+        )
+        self.assertEqual(indice.buscar(-33.48, -70.68), "Con hueco")
+        self.assertIsNone(indice.buscar(-33.455, -70.642))
+        self.assertIsNone(indice.buscar(-33.20, -70.68))
+
+    def test_geojson_con_estructura_invalida(self):
+        invalidos = [
+            [ZONAS_GEOJSON_PRUEBA],
+            {"type": "FeatureCollection", "features": {"a": 1}},
+            {"type": "FeatureCollection", "features": ["zona"]},
+            {"type": "Feature", "properties": ["Norte"], "geometry": None},
+            {
+                "type": "Feature",
+                "properties": {"nombre": "Norte"},
+                "geometry": {"type": "Polygon", "coordinates": None},
+            },
+            {
+                "type": "Feature",
+                "properties": {"nombre": "Norte"},
+                "geometry": {"type": "Polygon", "coordinates": [[[1, 2], [3], [4, 5]]]},
+            },
+        ]
+        for datos in invalidos:
+            with self.subTest(datos=datos), self.assertRaises(ZonasGeoJSONError):
+                poligonos_desde_geojson(datos)
+
+    def test_archivo_con_estructura_invalida_no_rompe_la_carga(self):
+        with override_settings(ZONAS_GEOJSON_PATH=self.ruta_geojson):
+            recargar_zonas()
+            with open(self.ruta_geojson, "w", encoding="utf-8") as archivo:
+                json.dump(
+                    {
+                        "type": "Feature",
+                        "properties": {"nombre": "Norte"},
+                        "geometry": {"type": "Polygon", "coordinates": None},
+                    },
+                    archivo,
+                )
+            # Se conserva el índice anterior en vez de fallar al iniciar.
+            self.assertIsNotNone(recargar_zonas())
+            with mock.patch("denuncias.utils.obtener_zona_nominatim") as nominatim:
+                self.assertEqual(obtener_zona_por_coordenadas(-33.35, -70.65), "Norte")
+                nominatim.assert_not_called()
+
+        with open(self.ruta_geojson, "w", encoding="utf-8") as archivo:
+            json.dump([1, 2, 3], archivo)
+        with override_settings(ZONAS_GEOJSON_PATH=self.ruta_geojson):
+            self.assertIsNone(_ResolutorZonas().recargar())
+
+    def test_obtener_zona_usa_indice_local_sin_red(self):
+        with override_settings(ZONAS_GEOJSON_PATH=self.ruta_geojson):
+            recargar_zonas()
+            with mock.patch("denuncias.utils.obtener_zona_nominatim") as nominatim:
+                self.assertEqual(obtener_zona_por_coordenadas(-33.35, -70.65), "Norte")
+                nominatim.assert_not_called()
+
+    def test_fallback_nominatim_configurable(self):
+        with override_settings(ZONAS_GEOJSON_PATH=self.ruta_geojson):
+            recargar_zonas()
+            with mock.patch(
+                "denuncias.utils.obtener_zona_nominatim", return_value="Remota"
+            ) as nominatim:
+                self.assertEqual(obtener_zona_por_coordenadas(-32.0, -71.0), "Remota")
+                nominatim.assert_called_once()
+
+            reiniciar_cache_zonas()
+            with override_settings(ZONAS_NOMINATIM_FALLBACK=False):
+                self.assertEqual(
+                    obtener_zona_por_coordenadas(-32.0, -71.0), ZONA_DESCONOCIDA
+                )
+
+    def test_recargar_zonas_invalida_la_cache_compartida(self):
+        with override_settings(ZONAS_GEOJSON_PATH=self.ruta_geojson, ZONAS_CACHE_ALIAS="default"):
+            recargar_zonas()
+            self.assertEqual(obtener_zona_por_coordenadas(-33.35, -70.65), "Norte")
+
+            with open(self.ruta_geojson, encoding="utf-8") as archivo:
+                contenido = archivo.read().replace('"Norte"', '"Norte Alto"')
+            with open(self.ruta_geojson, "w", encoding="utf-8") as archivo:
+                archivo.write(contenido)
+            marca = os.path.getmtime(self.ruta_geojson) + 10
+            os.utime(self.ruta_geojson, (marca, marca))
+            recargar_zonas()
+
+            self.assertEqual(obtener_zona_por_coordenadas(-33.35, -70.65), "Norte Alto")
+
+
+class CacheZonasTests(TestCase):
+    """Pruebas de la caché LRU+TTL de zonas por celda de grilla."""
+
+    def setUp(self):
+        self.ahora = 1000.0
+        self.cache = CacheZonas(
+            max_entradas=2, ttl=60, tamano_celda=0.001, reloj=lambda: self.ahora
+        )
+
+    def test_coordenadas_de_la_misma_celda_comparten_entrada(self):
+        resolver = mock.Mock(return_value="Centro")
+        self.cache.obtener_o_resolver(-33.4501, -70.6601, resolver)
+        self.cache.obtener_o_resolver(-33.4504, -70.6604, resolver)
+
+        resolver.assert_called_once()
+        estadisticas = self.cache.estadisticas()
+        self.assertEqual(estadisticas["aciertos"], 1)
+        self.assertEqual(estadisticas["fallos"], 1)
+        self.assertEqual(estadisticas["tasa_aciertos"], 0.5)
+
+    def test_desaloja_la_entrada_menos_usada_y_expira_por_ttl(self):
+        self.cache.guardar(-33.0, -70.0, "A")
+        self.cache.guardar(-33.1, -70.0, "B")
+        self.assertEqual(self.cache.obtener(-33.0, -70.0), "A")
+        self.cache.guardar(-33.2, -70.0, "C")
+
+        self.assertIsNone(self.cache.obtener(-33.1, -70.0))
+        self.assertEqual(self.cache.estadisticas()["desalojos"], 1)
+
+        self.ahora += 61
+        self.assertIsNone(self.cache.obtener(-33.0, -70.0))
+        self.assertEqual(self.cache.estadisticas()["expiraciones"], 1)
+
+    def test_no_guarda_valores_omitidos(self):
+        resolver = mock.Mock(return_value=ZONA_DESCONOCIDA)
+        self.cache.obtener_o_resolver(-33.0, -70.0, resolver, omitir={ZONA_DESCONOCIDA})
+        self.cache.obtener_o_resolver(-33.0, -70.0, resolver, omitir={ZONA_DESCONOCIDA})
+        self.assertEqual(resolver.call_count, 2)
+
+
+@override_settings(ENRIQUECIMIENTO_SINCRONO=True, ENRIQUECIMIENTO_REINTENTOS=1)
+class EnriquecimientoDenunciaTests(TestCase):
+    """La creación de denuncias no espera al geocodificador."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._media_root = tempfile.mkdtemp()
+        cls._override = override_settings(MEDIA_ROOT=cls._media_root)
+        cls._override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._override.disable()
+        shutil.rmtree(cls._media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ciudadano = get_user_model().objects.create_user(
+            username="vecina", password="pass1234"
+        )
+
+    def _crear_imagen(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (10, 10), color=(0, 255, 0)).save(buffer, format="JPEG")
+        return SimpleUploadedFile("foto.jpg", buffer.getvalue(), content_type="image/jpeg")
+
+    def _publicar(self):
+        self.client.force_login(self.ciudadano)
+        return self.client.post(
+            reverse("denuncias_list_create"),
+            {
+                "descripcion": "Escombros",
+                "direccion_textual": "Pasaje 1",
+                "latitud": "-33.45",
+                "longitud": "-70.66",
+                "imagen": self._crear_imagen(),
+            },
+        )
+
+    @mock.patch(
+        "denuncias.utils.obtener_zona_y_direccion",
+        return_value=("Centro", "Pasaje 1 123, Santiago"),
+    )
+    def test_responde_sin_zona_y_la_completa_al_confirmar(self, geocodificar_mock):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self._publicar()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["zona"], "")
+        geocodificar_mock.assert_not_called()
+
+        for callback in callbacks:
+            callback()
+
+        denuncia = Denuncia.objects.get(pk=response.json()["id"])
+        self.assertEqual(denuncia.zona, "Centro")
+        self.assertEqual(denuncia.direccion, "Pasaje 1 123, Santiago")
+
+    @mock.patch("denuncias.services.enriquecimiento.threading.Timer")
+    @mock.patch("denuncias.utils.obtener_zona_y_direccion", side_effect=[None, ("Norte", "")])
+    def test_reintenta_con_backoff_solo_si_falla(self, geocodificar_mock, timer_mock):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._publicar()
+
+        # El fallo no duerme en el worker: programa el reintento y deja la zona vacía.
+        denuncia_id = response.json()["id"]
+        self.assertEqual(Denuncia.objects.get(pk=denuncia_id).zona, "")
+        timer_mock.assert_called_once()
+        self.assertEqual(timer_mock.call_args.args[0], 2.0)
+        timer_mock.return_value.start.assert_called_once()
+
+        with mock.patch("denuncias.services.enriquecimiento._obtener_executor") as executor:
+            timer_mock.call_args.args[1]()
+        executor.return_value.submit.assert_called_once_with(
+            enriquecimiento._ejecutar_en_worker, denuncia_id, 1
+        )
+        self.assertTrue(enriquecer_denuncia(denuncia_id, intento=1))
+
+        denuncia = Denuncia.objects.get(pk=denuncia_id)
+        self.assertEqual(denuncia.zona, "Norte")
+        self.assertEqual(denuncia.direccion, "")
+        self.assertEqual(geocodificar_mock.call_count, 2)
+
+    @mock.patch("denuncias.services.enriquecimiento.threading.Timer")
+    @mock.patch("denuncias.utils.obtener_zona_y_direccion", return_value=None)
+    def test_sin_reintentos_queda_pendiente_y_se_recupera(self, geocodificar_mock, timer_mock):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._publicar()
+        denuncia_id = response.json()["id"]
+
+        self.assertFalse(enriquecer_denuncia(denuncia_id, intento=1))
+        timer_mock.assert_called_once()
+        # Una caída pasajera no deja una zona "desconocida" permanente.
+        self.assertEqual(Denuncia.objects.get(pk=denuncia_id).zona, "")
+
+        geocodificar_mock.return_value = ("Centro", "Pasaje 1 123, Santiago")
+        salida = io.StringIO()
+        call_command("enriquecer_denuncias_pendientes", "--minutos", "0", stdout=salida)
+        self.assertIn("1 denuncias completadas", salida.getvalue())
+        self.assertEqual(Denuncia.objects.get(pk=denuncia_id).zona, "Centro")
+
+    @mock.patch("denuncias.services.enriquecimiento.threading.Timer")
+    @mock.patch(
+        "denuncias.utils.obtener_zona_y_direccion", return_value=(ZONA_DESCONOCIDA, "")
+    )
+    def test_resultado_vacio_no_se_reintenta(self, geocodificar_mock, timer_mock):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._publicar()
+
+        self.assertEqual(Denuncia.objects.get(pk=response.json()["id"]).zona, ZONA_DESCONOCIDA)
+        geocodificar_mock.assert_called_once()
+        timer_mock.assert_not_called()
+
+    @override_settings(ZONAS_NOMINATIM_FALLBACK=True)
+    def test_una_consulta_para_zona_y_direccion(self):
+        reiniciar_cache_zonas()
+        address = {"suburb": "Yungay", "road": "Pasaje 1", "house_number": "12", "city": "Santiago"}
+        with mock.patch("denuncias.utils.buscar_zona_local", return_value=None), mock.patch(
+            "denuncias.utils._consultar_nominatim", return_value=address
+        ) as nominatim:
+            resultado = obtener_zona_y_direccion(-33.45, -70.66)
+        self.assertEqual(resultado, ("Yungay", "Pasaje 1 12, Santiago"))
+        nominatim.assert_called_once()
+        reiniciar_cache_zonas()
+
+
+class _NominatimFalsoHandler(BaseHTTPRequestHandler):
+    respuestas = []
+    solicitudes = 0
+
+    def do_GET(self):
+        type(self).solicitudes += 1
+        codigo, cuerpo = type(self).respuestas.pop(0)
+        contenido = json.dumps(cuerpo).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(contenido)))
+        self.end_headers()
+        self.wfile.write(contenido)
+
+    def log_message(self, *args):
+        pass
+
+
+class ClienteNominatimTests(TestCase):
+    """Prueba el cliente de geocodificación contra un servidor HTTP local."""
+
+    def setUp(self):
+        _NominatimFalsoHandler.respuestas = []
+        _NominatimFalsoHandler.solicitudes = 0
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), _NominatimFalsoHandler)
+        hilo = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+        hilo.start()
+        self.addCleanup(self.servidor.server_close)
+        self.addCleanup(self.servidor.shutdown)
+
+        self.ahora = 0.0
+        self.cliente = ClienteNominatim(
+            url_base=f"http://127.0.0.1:{self.servidor.server_address[1]}",
+            circuit_breaker=CircuitBreaker(
+                umbral_fallos=2, tiempo_reapertura=30, reloj=lambda: self.ahora
+            ),
+            limitador=LimitadorTasa(intervalo_minimo=0),
+        )
+        self.addCleanup(self.cliente.session.close)
+
+    def test_retorna_address_del_servicio(self):
+        _NominatimFalsoHandler.respuestas = [(200, {"address": {"suburb": "Centro"}})]
+        self.assertEqual(self.cliente.reverse(-33.4, -70.6), {"suburb": "Centro"})
+
+    def test_circuito_se_abre_tras_fallos_y_prueba_nuevamente(self):
+        _NominatimFalsoHandler.respuestas = [
+            (503, {}),
+            (503, {}),
+            (200, {"address": {"city": "Santiago"}}),
+        ]
+        self.assertIsNone(self.cliente.reverse(-33.4, -70.6))
+        self.assertIsNone(self.cliente.reverse(-33.4, -70.6))
+        self.assertEqual(self.cliente.circuit_breaker.estado, CircuitBreaker.ABIERTO)
+
+        # Con el circuito abierto no se realizan solicitudes.
+        self.assertIsNone(self.cliente.reverse(-33.4, -70.6))
+        self.assertEqual(_NominatimFalsoHandler.solicitudes, 2)
+
+        self.ahora += 31
+        self.assertEqual(self.cliente.reverse(-33.4, -70.6), {"city": "Santiago"})
+        self.assertEqual(self.cliente.circuit_breaker.estado, CircuitBreaker.CERRADO)
+
+    def test_limitador_falla_rapido_si_no_hay_turno(self):
+        limitador = LimitadorTasa(intervalo_minimo=1.0, reloj=lambda: 0.0, dormir=mock.Mock())
+        self.assertTrue(limitador.adquirir(espera_maxima=0))
+        self.assertFalse(limitador.adquirir(espera_maxima=0.5))
+
+
+class RezonificarDenunciasCommandTests(TestCase):
+    """Pruebas del comando de rezonificación masiva."""
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario = get_user_model().objects.create_user(username="historico", password="x")
+        base = {"usuario": usuario, "descripcion": "Basural", "latitud": -33.4, "longitud": -70.6}
+        cls.sin_zona = Denuncia.objects.create(zona="", **base)
+        cls.desconocida = Denuncia.objects.create(zona=ZONA_DESCONOCIDA, **base)
+        cls.con_zona = Denuncia.objects.create(zona="Antigua", **base)
+
+    def _ejecutar(self, *args):
+        salida = io.StringIO()
+        with mock.patch(
+            "denuncias.management.commands.rezonificar_denuncias.obtener_zona_por_coordenadas",
+            return_value="Centro",
+        ):
+            call_command("rezonificar_denuncias", *args, stdout=salida)
+        return salida.getvalue()
+
+    def test_dry_run_no_escribe(self):
+        salida = self._ejecutar("--dry-run", "--bloque", "1")
+        self.assertIn("2 se actualizarían", salida)
+        self.assertEqual(Denuncia.objects.filter(zona="Centro").count(), 0)
+
+    def test_actualiza_pendientes_y_reanuda_desde_checkpoint(self):
+        descriptor, ruta = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(descriptor, "w") as archivo:
+            json.dump({"ultimo_id": self.sin_zona.pk}, archivo)
+        self.addCleanup(lambda: os.path.exists(ruta) and os.remove(ruta))
+
+        self._ejecutar("--checkpoint", ruta, "--todas")
+
+        self.sin_zona.refresh_from_db()
+        self.desconocida.refresh_from_db()
+        self.con_zona.refresh_from_db()
+        self.assertEqual(self.sin_zona.zona, "")
+        self.assertEqual(self.desconocida.zona, "Centro")
+        self.assertEqual(self.con_zona.zona, "Centro")
+        self.assertFalse(os.path.exists(ruta))
+
+
+class DenunciaListCursorPaginationTests(TestCase):
+    """El listado general se pagina por cursor con un tope de tamaño."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_user(username="lector", password="x")
+        cls.denuncias = [
+            Denuncia.objects.create(
+                usuario=cls.usuario, descripcion=f"D{i}", latitud=-33.4, longitud=-70.6
+            )
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def test_recorre_todas_las_paginas_sin_repetir(self):
+        url = reverse("denuncias_list_create") + "?page_size=2"
+        vistos = []
+        while url:
+            data = self.client.get(url).json()
+            self.assertLessEqual(len(data["results"]), 2)
+            vistos.extend(item["id"] for item in data["results"])
+            url = data["next"]
+
+        esperados = [
+            d.id for d in sorted(self.denuncias, key=lambda d: (d.fecha_creacion, d.id), reverse=True)
+        ]
+        self.assertEqual(vistos, esperados)
+
+    def test_tamano_de_pagina_acotado_y_cursor_invalido(self):
+        data = self.client.get(reverse("denuncias_list_create") + "?page_size=5000").json()
+        self.assertEqual(data["page_size"], 200)
+
+        response = self.client.get(reverse("denuncias_list_create") + "?cursor=xyz")
+        self.assertEqual(response.status_code, 404)
+
+    def test_listado_completo_explicito(self):
+        data = self.client.get(reverse("denuncias_list_create") + "?completo=1").json()
+        self.assertIsInstance(data, list)
+        self.assertEqual(len(data), 5)
+
+
+class EstadoCanonicoTests(TestCase):
+    """Los estados se guardan canónicos y los alias se resuelven en la API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_user(username="lector", password="x")
+        cls.finalizada = Denuncia.objects.create(
+            usuario=cls.usuario,
+            descripcion="Cerrada",
+            latitud=-33.4,
+            longitud=-70.6,
+            estado=EstadoDenuncia.FINALIZADO,
+        )
+        Denuncia.objects.create(
+            usuario=cls.usuario, descripcion="Nueva", latitud=-33.4, longitud=-70.6
+        )
+
+    def test_filtro_por_alias_usa_igualdad(self):
+        self.client.force_login(self.usuario)
+        with CaptureQueriesContext(connection) as consultas:
+            data = self.client.get(
+                reverse("denuncias_list_create"), {"estado": "Resuelta", "completo": 1}
+            ).json()
+        self.assertEqual([fila["id"] for fila in data], [self.finalizada.id])
+        sql = next(q["sql"] for q in consultas.captured_queries if "denuncias_denuncia" in q["sql"])
+        self.assertIn('"estado" = ', sql)
+        self.assertNotIn("UPPER(", sql)
+        self.assertNotIn(" LIKE ", sql)
+
+    def test_restriccion_rechaza_estados_no_canonicos(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Denuncia.objects.filter(pk=self.finalizada.pk).update(estado="resuelta")
+
+    def test_migracion_canonicaliza_el_historial(self):
+        HistorialEstado.objects.create(
+            denuncia=self.finalizada, estado_anterior="Nuevo", estado_nuevo="en_proceso"
+        )
+        HistorialEstado.objects.create(
+            denuncia=self.finalizada, estado_anterior="en_proceso", estado_nuevo="Resuelta"
+        )
+
+        migracion = import_module("denuncias.migrations.0016_canonicalizar_estado_denuncia")
+        migracion.canonicalizar_estados(apps, None)
+        self.assertEqual(
+            list(
+                HistorialEstado.objects.order_by("id").values_list(
+                    "estado_anterior", "estado_nuevo"
+                )
+            ),
+            [
+                (EstadoDenuncia.PENDIENTE, EstadoDenuncia.EN_GESTION),
+                (EstadoDenuncia.EN_GESTION, EstadoDenuncia.FINALIZADO),
+            ],
+        )
+
+
+class PlanConsultasPanelTests(TestCase):
+    """Los filtros del panel deben resolverse con los índices compuestos."""
+
+    def _plan(self, params, orden=("fecha_creacion",)):
+        queryset = _aplicar_filtros_panel(Denuncia.objects.all(), QueryDict(params))
+        if connection.vendor == "postgresql":
+            # Con la tabla casi vacía el planificador preferiría un seq scan.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.order_by(*orden).explain()
+
+    def test_estado_y_rango_de_fechas_usan_indice_compuesto(self):
+        plan = self._plan("estado=pendiente&fecha_desde=2024-01-01&fecha_hasta=2024-01-31")
+        self.assertIn("denuncia_estado_fecha_idx", plan)
+
+    def test_zona_usa_indice_funcional(self):
+        plan = self._plan("zona=Centro")
+        self.assertIn("denuncia_zona_lower_idx", plan)
+
+    def test_rango_de_fechas_respeta_dia_local(self):
+        usuario = get_user_model().objects.create_user(username="lector", password="x")
+        denuncia = Denuncia.objects.create(
+            usuario=usuario, descripcion="Borde", latitud=-33.4, longitud=-70.6
+        )
+        # 23:30 del 31 de enero en Santiago ya es 1 de febrero en UTC.
+        Denuncia.objects.filter(pk=denuncia.pk).update(
+            fecha_creacion=timezone.make_aware(datetime(2024, 1, 31, 23, 30))
+        )
+        encontrados = _aplicar_filtros_panel(
+            Denuncia.objects.all(), QueryDict("fecha_desde=2024-01-31&fecha_hasta=2024-01-31")
+        )
+        self.assertEqual(list(encontrados), [denuncia])
+
+
+class DenunciaMapaViewTests(TestCase):
+    """Endpoint compacto de marcadores filtrado por recuadro."""
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario_model = get_user_model()
+        cls.fiscalizador = usuario_model.objects.create_user(
+            username="fiscal", password="x", rol=usuario_model.Roles.FISCALIZADOR
+        )
+        base = {"usuario": cls.fiscalizador, "descripcion": "Basural"}
+        cls.dentro = Denuncia.objects.create(latitud=-33.45, longitud=-70.66, **base)
+        cls.fuera = Denuncia.objects.create(latitud=-33.60, longitud=-70.90, **base)
+
+    def setUp(self):
+        self.client.force_login(self.fiscalizador)
+
+    def test_geohash_se_calcula_al_guardar(self):
+        self.assertEqual(self.dentro.geohash, geohash.codificar(-33.45, -70.66))
+        self.assertTrue(self.dentro.geohash.startswith("66j"))
+
+    def test_devuelve_solo_marcadores_del_recuadro(self):
+        response = self.client.get(
+            reverse("denuncias_mapa"), {"bbox": "-70.70,-33.50,-70.60,-33.40", "zoom": 14}
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["campos"], ["id", "lat", "lon", "estado", "color"])
+        self.assertEqual(
+            data["marcadores"],
+            [
+                [
+                    self.dentro.id,
+                    -33.45,
+                    -70.66,
+                    EstadoDenuncia.PENDIENTE,
+                    EstadoDenuncia.get_color(EstadoDenuncia.PENDIENTE),
+                ]
+            ],
+        )
+        self.assertFalse(data["truncado"])
+
+    def test_recuadro_invalido(self):
+        response = self.client.get(reverse("denuncias_mapa"), {"bbox": "a,b", "zoom": 3})
+        self.assertEqual(response.status_code, 400)
+
+    def test_recuadro_fuera_de_rango_se_recorta(self):
+        # Zoom bajo: Leaflet entrega más de una vuelta al mundo.
+        response = self.client.get(
+            reverse("denuncias_mapa"), {"bbox": "-400.0,-95.0,400.0,95.0", "zoom": 14}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["marcadores"]), Denuncia.objects.count())
+
+        # Tras desplazarse una vuelta completa hacia el este.
+        response = self.client.get(
+            reverse("denuncias_mapa"), {"bbox": "289.30,-33.50,289.40,-33.40", "zoom": 14}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([fila[0] for fila in response.json()["marcadores"]], [self.dentro.id])
+
+    def test_zoom_bajo_responde_clusters_precalculados(self):
+        Denuncia.objects.create(
+            latitud=-33.46, longitud=-70.65, usuario=self.fiscalizador, descripcion="Otro"
+        )
+        response = self.client.get(
+            reverse("denuncias_mapa"), {"bbox": "-71.00,-33.70,-70.50,-33.30", "zoom": 8}
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["modo"], "clusters")
+        self.assertEqual(data["precision"], 4)
+        self.assertEqual(sum(fila[3] for fila in data["clusters"]), 3)
+        totales = {celda: total for celda, _, _, total, _ in data["clusters"]}
+        self.assertEqual(totales[self.dentro.geohash[:4]], 2)
+
+    def test_clusters_se_actualizan_con_cambios_de_estado_y_eliminacion(self):
+        celda = self.dentro.geohash[:5]
+        filtro = {"precision": 5, "celda": celda}
+
+        self.dentro.estado = EstadoDenuncia.EN_GESTION
+        self.dentro.save(update_fields=["estado"])
+        self.assertEqual(
+            dict(ClusterMapa.objects.filter(**filtro).values_list("estado", "total")),
+            {EstadoDenuncia.EN_GESTION: 1},
+        )
+
+        Denuncia.objects.get(pk=self.dentro.pk).delete()
+        self.assertFalse(ClusterMapa.objects.filter(**filtro).exists())
+
+    def test_escrituras_no_tocan_celdas_gruesas(self):
+        # Las precisiones gruesas se suman al consultar: no hay filas por ciudad.
+        self.assertFalse(
+            ClusterMapa.objects.filter(precision__lt=PRECISION_BASE).exists()
+        )
+        response = self.client.get(
+            reverse("denuncias_mapa"), {"bbox": "-180,-90,180,90", "zoom": 2}
+        )
+        self.assertEqual(response.json()["precision"], 1)
+        self.assertEqual(
+            sum(fila[3] for fila in response.json()["clusters"]), Denuncia.objects.count()
+        )
+
+    def test_reconstruir_corrige_cambios_hechos_sin_senales(self):
+        # update() no emite post_save: los clusters quedan desfasados.
+        Denuncia.objects.filter(pk=self.dentro.pk).update(estado=EstadoDenuncia.EN_GESTION)
+        filtro = {"precision": 5, "celda": self.dentro.geohash[:5]}
+        self.assertEqual(
+            dict(ClusterMapa.objects.filter(**filtro).values_list("estado", "total")),
+            {EstadoDenuncia.PENDIENTE: 1},
+        )
+
+        salida = io.StringIO()
+        call_command("reconstruir_clusters_mapa", stdout=salida)
+        self.assertIn("Clusters reconstruidos", salida.getvalue())
+        self.assertEqual(
+            dict(ClusterMapa.objects.filter(**filtro).values_list("estado", "total")),
+            {EstadoDenuncia.EN_GESTION: 1},
+        )
+
+    def test_clusters_con_filtro_de_zona_se_agrupan_en_vivo(self):
+        Denuncia.objects.filter(pk=self.dentro.pk).update(zona="Centro")
+        response = self.client.get(
+            reverse("denuncias_mapa"),
+            {"bbox": "-71.00,-33.70,-70.50,-33.30", "zoom": 8, "zona": "centro"},
+        )
+        self.assertEqual(response.status_code, 200)
+        clusters = response.json()["clusters"]
+        self.assertEqual(len(clusters), 1)
+        self.assertEqual(clusters[0][3], 1)
+        self.assertEqual(clusters[0][4], {EstadoDenuncia.PENDIENTE: 1})
+
+
+@override_settings(DENUNCIAS_SYNC_MARGEN_SEGUNDOS=0)
+class SincronizacionDeltaTests(TestCase):
+    """Listados con ?sync_token / ?updated_since y marcas de eliminación."""
+
+    def setUp(self):
+        usuario_model = get_user_model()
+        self.vecino = usuario_model.objects.create_user(
+            username="vecino", password="x", rol=usuario_model.Roles.CIUDADANO
+        )
+        self.fiscalizador = usuario_model.objects.create_user(
+            username="fiscal", password="x", rol=usuario_model.Roles.FISCALIZADOR
+        )
+        base = {"usuario": self.vecino, "latitud": -33.45, "longitud": -70.66}
+        self.sin_cambios = Denuncia.objects.create(descripcion="A", **base)
+        self.modificada = Denuncia.objects.create(descripcion="B", **base)
+        self.eliminada_id = Denuncia.objects.create(descripcion="C", **base).id
+        self.desde = timezone.now()
+        Denuncia.objects.update(fecha_actualizacion=self.desde - timedelta(hours=1))
+
+    def _modificar_y_eliminar(self):
+        self.modificada.estado = EstadoDenuncia.EN_GESTION
+        self.modificada.save(update_fields=["estado"])
+        Denuncia.objects.get(pk=self.eliminada_id).delete()
+
+    def test_listado_completo_entrega_token(self):
+        self.client.force_login(self.vecino)
+        response = self.client.get(reverse("mis_denuncias"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 3)
+        self.assertTrue(response["X-Sync-Token"])
+
+    def test_delta_ciudadano_con_cambios_y_eliminaciones(self):
+        self._modificar_y_eliminar()
+        self.client.force_login(self.vecino)
+        response = self.client.get(
+            reverse("mis_denuncias"), {"updated_since": self.desde.isoformat()}
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([fila["id"] for fila in data["results"]], [self.modificada.id])
+        self.assertEqual(data["eliminadas"], [self.eliminada_id])
+
+        siguiente = self.client.get(reverse("mis_denuncias"), {"sync_token": data["sync_token"]})
+        self.assertEqual(siguiente.json()["results"], [])
+
+    def test_reporte_de_cuadrilla_marca_la_denuncia_modificada(self):
+        jefe = get_user_model().objects.create_user(
+            username="jefe", password="x", rol=get_user_model().Roles.JEFE_CUADRILLA
+        )
+        ReporteCuadrilla.objects.create(
+            denuncia=self.sin_cambios, jefe_cuadrilla=jefe, comentario="Listo", foto_trabajo="r.jpg"
+        )
+        self.client.force_login(self.vecino)
+        response = self.client.get(
+            reverse("mis_denuncias"), {"updated_since": self.desde.isoformat()}
+        )
+        self.assertEqual([fila["id"] for fila in response.json()["results"]], [self.sin_cambios.id])
+
+    def test_delta_admin_informa_denuncias_que_salen_del_filtro(self):
+        self._modificar_y_eliminar()
+        self.client.force_login(self.fiscalizador)
+        response = self.client.get(
+            reverse("denuncias_admin_list"),
+            {"updated_since": self.desde.isoformat(), "estado": EstadoDenuncia.PENDIENTE},
+        )
+        data = response.json()
+        self.assertEqual(data["results"], [])
+        self.assertEqual(data["eliminadas"], sorted([self.modificada.id, self.eliminada_id]))
+
+    @override_settings(DENUNCIAS_SYNC_MAX_DIAS=10)
+    def test_depuracion_conserva_marcas_de_tokens_vigentes(self):
+        ahora = timezone.now()
+        with mock.patch("django.utils.timezone.now", return_value=ahora - timedelta(days=11)):
+            DenunciaEliminada.objects.create(denuncia_id=9001, usuario_id=self.vecino.id)
+        with mock.patch("django.utils.timezone.now", return_value=ahora - timedelta(days=9)):
+            vigente = DenunciaEliminada.objects.create(denuncia_id=9002, usuario_id=self.vecino.id)
+
+        call_command("depurar_denuncias_eliminadas", stdout=io.StringIO())
+        self.assertEqual(
+            list(DenunciaEliminada.objects.values_list("pk", flat=True)), [vigente.pk]
+        )
+
+        # El token más antiguo que se acepta todavía ve la marca conservada.
+        self.client.force_login(self.vecino)
+        desde = ahora - timedelta(days=10) + timedelta(minutes=1)
+        response = self.client.get(reverse("mis_denuncias"), {"updated_since": desde.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(9002, response.json()["eliminadas"])
+        # Uno anterior al plazo de retención debe recargar todo.
+        desde = ahora - timedelta(days=11)
+        response = self.client.get(reverse("mis_denuncias"), {"updated_since": desde.isoformat()})
+        self.assertEqual(response.status_code, 410)
+
+    def test_token_invalido_o_vencido(self):
+        self.client.force_login(self.vecino)
+        response = self.client.get(reverse("mis_denuncias"), {"sync_token": "xyz"})
+        self.assertEqual(response.status_code, 400)
+        antiguo = (timezone.now() - timedelta(days=365)).isoformat()
+        response = self.client.get(reverse("mis_denuncias"), {"updated_since": antiguo})
+        self.assertEqual(response.status_code, 410)
+
+
+class TablasDisponiblesTests(TestCase):
+    """La verificación de la tabla de notificaciones no se repite por request."""
+
+    def setUp(self):
+        invalidar_tablas_disponibles()
+        self.vecino = get_user_model().objects.create_user(username="vecino", password="x")
+        self.client.force_login(self.vecino)
+
+    def test_introspeccion_una_sola_vez(self):
+        self.client.get(reverse("mis_notificaciones_denuncias"))
+        # Sesión + usuario + notificaciones, sin listar el esquema.
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse("mis_notificaciones_denuncias"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(consultas), 3)
+
+        with mock.patch.object(
+            connection.introspection, "table_names", return_value=[]
+        ) as table_names:
+            self.assertTrue(tabla_disponible(DenunciaNotificacion))
+            table_names.assert_not_called()
+            invalidar_tablas_disponibles()
+            self.assertFalse(tabla_disponible(DenunciaNotificacion))
+            self.assertFalse(tabla_disponible(DenunciaNotificacion))
+            table_names.assert_called_once()
+        invalidar_tablas_disponibles()
+
+
+class NotificacionesResumenTests(TestCase):
+    """Sondeo de notificaciones: resumen liviano y listado sin N+1."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vecino = get_user_model().objects.create_user(username="vecino", password="x")
+        denuncia = Denuncia.objects.create(
+            usuario=cls.vecino, descripcion="Basural", latitud=-33.45, longitud=-70.66
+        )
+        cls.notificaciones = [
+            DenunciaNotificacion.objects.create(
+                usuario=cls.vecino,
+                denuncia=denuncia,
+                mensaje=f"Cambio {indice}",
+                estado_nuevo=EstadoDenuncia.EN_GESTION,
+                leida=indice == 0,
+            )
+            for indice in range(3)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.vecino)
+
+    def test_resumen(self):
+        response = self.client.get(reverse("notificaciones_resumen"))
+        self.assertEqual(
+            response.json(), {"no_leidas": 2, "ultima_id": self.notificaciones[-1].id}
+        )
+
+    def test_resumen_cuenta_las_agrupadas(self):
+        DenunciaNotificacion.objects.filter(pk=self.notificaciones[1].pk).update(agrupadas=5)
+        response = self.client.get(reverse("notificaciones_resumen"))
+        self.assertEqual(response.json()["no_leidas"], 6)
+
+        DenunciaNotificacion.objects.update(leida=True)
+        response = self.client.get(reverse("notificaciones_resumen"))
+        self.assertEqual(response.json(), {"no_leidas": 0, "ultima_id": None})
+
+    def test_firma_del_listado_coincide_con_el_resumen(self):
+        # El cliente firma el listado con la suma de ``agrupadas`` y el id
+        # máximo; tras compactar debe coincidir con el resumen o el sondeo
+        # descargaría el listado en cada ciclo.
+        call_command("depurar_notificaciones", "--dias-no-leidas", "0", stdout=io.StringIO())
+        listado = self.client.get(
+            reverse("mis_notificaciones_denuncias"), {"solo_no_leidas": 1}
+        ).json()
+        self.assertEqual([fila["agrupadas"] for fila in listado], [2])
+
+        resumen = self.client.get(reverse("notificaciones_resumen")).json()
+        self.assertEqual(
+            resumen,
+            {
+                "no_leidas": sum(fila["agrupadas"] for fila in listado),
+                "ultima_id": max(fila["id"] for fila in listado),
+            },
+        )
+
+    def test_listado_en_una_consulta(self):
+        self.client.get(reverse("mis_notificaciones_denuncias"))
+        # Sesión + usuario + notificaciones con su denuncia (select_related).
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                reverse("mis_notificaciones_denuncias"), {"solo_no_leidas": 1}
+            )
+        self.assertEqual(
+            [fila["denuncia_descripcion"] for fila in response.json()], ["Basural", "Basural"]
+        )
+
+class NotificacionesMarcarLeidasTests(TestCase):
+    """Marcado masivo de notificaciones y efectos del cambio de estado."""
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario_model = get_user_model()
+        cls.vecino = usuario_model.objects.create_user(username="vecino", password="x")
+        cls.otro = usuario_model.objects.create_user(username="otro", password="x")
+        cls.fiscalizador = usuario_model.objects.create_user(
+            username="fiscal", password="x", rol=usuario_model.Roles.FISCALIZADOR
+        )
+        cls.denuncia = Denuncia.objects.create(
+            usuario=cls.vecino, descripcion="Basural", latitud=-33.45, longitud=-70.66
+        )
+        cls.ids = [
+            DenunciaNotificacion.objects.create(
+                usuario=usuario,
+                denuncia=cls.denuncia,
+                mensaje="Cambio",
+                estado_nuevo=EstadoDenuncia.EN_GESTION,
+            ).id
+            for usuario in (cls.vecino, cls.vecino, cls.vecino, cls.otro)
+        ]
+
+    def _marcar(self, datos):
+        self.client.force_login(self.vecino)
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post(
+                reverse("notificaciones_marcar_leidas"), datos, content_type="application/json"
+            )
+        updates = [q for q in consultas.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        return response
+
+    def test_por_ids_y_hasta_id(self):
+        response = self._marcar({"ids": [self.ids[0], self.ids[3]]})
+        # La notificación de otro usuario no se toca.
+        self.assertEqual(response.json(), {"actualizadas": 1})
+
+        response = self._marcar({"hasta_id": self.ids[3]})
+        self.assertEqual(response.json(), {"actualizadas": 2})
+        self.assertFalse(
+            DenunciaNotificacion.objects.filter(usuario=self.vecino, leida=False).exists()
+        )
+        self.assertFalse(DenunciaNotificacion.objects.get(pk=self.ids[3]).leida)
+
+    def test_parametros_invalidos(self):
+        self.client.force_login(self.vecino)
+        url = reverse("notificaciones_marcar_leidas")
+        for datos in ({}, {"ids": [1], "hasta_id": 1}, {"ids": []}):
+            response = self.client.post(url, datos, content_type="application/json")
+            self.assertEqual(response.status_code, 400)
+
+    def test_cambio_de_estado_en_una_transaccion(self):
+        self.client.force_login(self.fiscalizador)
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.patch(
+                reverse("denuncias_admin_update", args=[self.denuncia.id]),
+                {"estado": EstadoDenuncia.RECHAZADA, "motivo_rechazo": "no_verificada"},
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        sql = [q["sql"] for q in consultas.captured_queries]
+        inserciones = [q for q in sql if q.startswith("INSERT")]
+        self.assertTrue(any("denuncianotificacion" in q for q in inserciones))
+        self.assertTrue(any("historialestado" in q for q in inserciones))
+        # El historial se guarda solo por la FK, sin tabla intermedia.
+        self.assertFalse(any("denuncia_historial" in q for q in inserciones))
+        self.assertEqual(
+            len([q for q in sql if q.startswith('UPDATE "denuncias_denuncia"')]), 1
+        )
+
+
+class DenunciaHistorialTests(TestCase):
+    """Línea de tiempo de estados de varias denuncias en una sola petición."""
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario_model = get_user_model()
+        cls.vecino = usuario_model.objects.create_user(username="vecino", password="x")
+        cls.fiscalizador = usuario_model.objects.create_user(
+            username="fiscal", password="x", rol=usuario_model.Roles.FISCALIZADOR
+        )
+        cls.denuncias = [
+            Denuncia.objects.create(
+                usuario=cls.vecino, descripcion=f"Basural {indice}", latitud=-33.45, longitud=-70.66
+            )
+            for indice in range(3)
+        ]
+        for denuncia in cls.denuncias[:2]:
+            for anterior, nuevo in (
+                (EstadoDenuncia.PENDIENTE, EstadoDenuncia.EN_GESTION),
+                (EstadoDenuncia.EN_GESTION, EstadoDenuncia.REALIZADO),
+            ):
+                HistorialEstado.objects.create(
+                    denuncia=denuncia,
+                    estado_anterior=anterior,
+                    estado_nuevo=nuevo,
+                    responsable=cls.fiscalizador,
+                )
+
+    def test_historial_de_varias_denuncias_en_consultas_constantes(self):
+        self.client.force_login(self.fiscalizador)
+        ids = ",".join(str(denuncia.id) for denuncia in self.denuncias)
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse("denuncias_historial"), {"ids": ids})
+        self.assertEqual(response.status_code, 200)
+        selects = [q for q in consultas.captured_queries if q["sql"].startswith("SELECT")]
+        self.assertLessEqual(len(selects), 4)  # sesión, usuario, denuncias y historial
+
+        historial = response.json()["historial"]
+        primera = historial[str(self.denuncias[0].id)]
+        self.assertEqual(
+            [registro["estado_nuevo"] for registro in primera],
+            [EstadoDenuncia.EN_GESTION, EstadoDenuncia.REALIZADO],
+        )
+        self.assertEqual(primera[0]["responsable"]["id"], self.fiscalizador.id)
+        self.assertEqual(historial[str(self.denuncias[2].id)], [])
+
+    def test_parametros_y_permisos(self):
+        url = reverse("denuncias_historial")
+        self.client.force_login(self.fiscalizador)
+        for ids in ("", "a,b", "0", ",".join(str(i) for i in range(1, 102))):
+            self.assertEqual(self.client.get(url, {"ids": ids}).status_code, 400)
+
+        self.client.force_login(self.vecino)
+        self.assertEqual(self.client.get(url, {"ids": "1"}).status_code, 403)
+
+
+class DepurarNotificacionesTests(TestCase):
+    """Retención de notificaciones: leídas eliminadas y no leídas compactadas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario_model = get_user_model()
+        cls.vecino = usuario_model.objects.create_user(username="vecino", password="x")
+        cls.denuncia = Denuncia.objects.create(
+            usuario=cls.vecino, descripcion="Basural", latitud=-33.45, longitud=-70.66
+        )
+        cls.otra = Denuncia.objects.create(
+            usuario=cls.vecino, descripcion="Escombros", latitud=-33.45, longitud=-70.66
+        )
+
+    def _crear(self, denuncia, mensaje, *, leida=False, dias=0):
+        notificacion = DenunciaNotificacion.objects.create(
+            usuario=self.vecino,
+            denuncia=denuncia,
+            mensaje=mensaje,
+            estado_nuevo=EstadoDenuncia.EN_GESTION,
+            leida=leida,
+        )
+        DenunciaNotificacion.objects.filter(pk=notificacion.pk).update(
+            fecha_creacion=timezone.now() - timedelta(days=dias)
+        )
+        return notificacion
+
+    def test_comando_elimina_leidas_y_compacta_no_leidas(self):
+        leida_antigua = self._crear(self.denuncia, "Vieja", leida=True, dias=120)
+        leida_reciente = self._crear(self.denuncia, "Reciente", leida=True, dias=5)
+        for indice in range(3):
+            self._crear(self.denuncia, f"Cambio {indice}", dias=60 - indice)
+        unica = self._crear(self.otra, "Sola", dias=60)
+        no_leida_reciente = self._crear(self.denuncia, "Nueva", dias=1)
+
+        salida = io.StringIO()
+        call_command("depurar_notificaciones", "--lote", "1", stdout=salida)
+        self.assertIn("3 filas eliminadas", salida.getvalue())
+
+        restantes = DenunciaNotificacion.objects.filter(usuario=self.vecino)
+        self.assertFalse(restantes.filter(pk=leida_antigua.pk).exists())
+        self.assertEqual(restantes.filter(pk__in=[leida_reciente.pk, unica.pk]).count(), 2)
+        self.assertTrue(restantes.filter(pk=no_leida_reciente.pk, agrupadas=1).exists())
+
+        resumen = restantes.get(denuncia=self.denuncia, leida=False, agrupadas__gt=1)
+        self.assertEqual(resumen.agrupadas, 3)
+        self.assertEqual(
+            resumen.mensaje,
+            f"3 actualizaciones de tu denuncia #{self.denuncia.id}. Última: Cambio 2",
+        )
+
+    def test_compactar_de_nuevo_acumula_el_total(self):
+        for indice in range(2):
+            self._crear(self.denuncia, f"Cambio {indice}", dias=60 - indice)
+        call_command("depurar_notificaciones", stdout=io.StringIO())
+        self._crear(self.denuncia, "Cambio 2", dias=40)
+        call_command("depurar_notificaciones", stdout=io.StringIO())
+
+        resumen = DenunciaNotificacion.objects.get(denuncia=self.denuncia)
+        self.assertEqual(resumen.agrupadas, 3)
+        self.assertTrue(resumen.mensaje.endswith("Última: Cambio 2"))
+
+
+@override_settings(NOTIFICACIONES_SSE_PUENTE=False, NOTIFICACIONES_SSE_LATIDO_SEGUNDOS=1)
+class NotificacionesStreamTests(TestCase):
+    """Canal SSE: reenvío al reconectar y entrega de lo publicado en el proceso."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vecino = get_user_model().objects.create_user(username="vecino", password="x")
+        denuncia = Denuncia.objects.create(
+            usuario=cls.vecino, descripcion="Basural", latitud=-33.45, longitud=-70.66
+        )
+        cls.previa = DenunciaNotificacion.objects.create(
+            usuario=cls.vecino,
+            denuncia=denuncia,
+            mensaje="En gestión",
+            estado_nuevo=EstadoDenuncia.EN_GESTION,
+        )
+
+    def test_puente_filtra_por_conectados(self):
+        desde = timezone.now() - timedelta(minutes=1)
+        self.assertEqual(
+            [evento["id"] for evento in notificaciones_desde(desde, [self.vecino.id])],
+            [self.previa.id],
+        )
+        self.assertEqual(notificaciones_desde(desde, [self.vecino.id + 1]), [])
+
+    def test_sin_asgi_responde_204(self):
+        self.client.force_login(self.vecino)
+        response = self.client.get(reverse("notificaciones_stream"))
+        self.assertEqual(response.status_code, 204)
+
+    async def _siguiente_evento(self, partes):
+        for _ in range(5):
+            parte = (await anext(partes)).decode()
+            if not parte.startswith((":", "retry:")):
+                return parte
+        self.fail("No llegó ningún evento.")
+
+    async def test_reenvio_y_publicacion(self):
+        await self.async_client.aforce_login(self.vecino)
+        response = await self.async_client.get(
+            reverse("notificaciones_stream"), headers={"Last-Event-ID": "0"}
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        partes = aiter(response.streaming_content)
+
+        evento = await self._siguiente_evento(partes)
+        self.assertIn(f"id: {self.previa.id}\n", evento)
+        self.assertIn('"mensaje": "En gestión"', evento)
+
+        canal = obtener_canal_notificaciones()
+        self.assertEqual(canal.conectados(), 1)
+        canal.publicar(self.vecino.id, {"id": 10_000, "mensaje": "Finalizada", "usuario": 0})
+        evento = await self._siguiente_evento(partes)
+        self.assertIn("id: 10000\nevent: notificacion\n", evento)
+        # El mismo id no se entrega dos veces (proceso local + puente).
+        self.assertEqual(canal.publicar(self.vecino.id, {"id": 10_000}), 0)
+
+        # Al desconectarse el cliente, el servidor ASGI cancela la respuesta.
+        espera = asyncio.ensure_future(anext(partes))
+        await asyncio.sleep(0.05)
+        espera.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await espera
+        self.assertEqual(canal.conectados(), 0)
@@ -3,12 +3,18 @@ from django.urls import path
 from .views import (
     DenunciaAdminListView,
     DenunciaAdminUpdateView,
+    DenunciaHistorialView,
     DenunciaListCreateView,
+    DenunciaMapaView,
     JefesCuadrillaList,
     MiDenunciaRetrieveUpdateView,
     MisDenunciasListView,
     MisNotificacionesListView,
     NotificacionActualizarView,
+    NotificacionesMarcarLeidasView,
+    NotificacionesResumenView,
+    ZonasCacheEstadisticasView,
+    notificaciones_stream,
 )
 
 
@@ -21,6 +27,8 @@ urlpatterns = [
         name="mi_denuncia_detalle",
     ),
     path("admin/", DenunciaAdminListView.as_view(), name="denuncias_admin_list"),
+    path("mapa/", DenunciaMapaView.as_view(), name="denuncias_mapa"),
+    path("historial/", DenunciaHistorialView.as_view(), name="denuncias_historial"),
     path(
         "admin/<int:pk>/",
         DenunciaAdminUpdateView.as_view(),
@@ -36,9 +44,29 @@ urlpatterns = [
         MisNotificacionesListView.as_view(),
         name="mis_notificaciones_denuncias",
     ),
+    path(
+        "notificaciones/resumen/",
+        NotificacionesResumenView.as_view(),
+        name="notificaciones_resumen",
+    ),
+    path(
+        "notificaciones/marcar-leidas/",
+        NotificacionesMarcarLeidasView.as_view(),
+        name="notificaciones_marcar_leidas",
+    ),
+    path(
+        "notificaciones/stream/",
+        notificaciones_stream,
+        name="notificaciones_stream",
+    ),
     path(
         "notificaciones/<int:pk>/",
         NotificacionActualizarView.as_view(),
         name="notificacion_denuncia_actualizar",
     ),
+    path(
+        "zonas/cache/",
+        ZonasCacheEstadisticasView.as_view(),
+        name="zonas_cache_estadisticas",
+    ),
 ]
@@ -1,45 +1,167 @@
-import requests
+import logging
+
+from django.conf import settings
+
+from .services.cache_zonas import obtener_cache_zonas
+from .services.geocodificacion import obtener_cliente_nominatim
+from .services.zonas import buscar_zona_local
+
+
+logger = logging.getLogger(__name__)
+
+ZONA_DESCONOCIDA = "Zona desconocida"
 
 
 def obtener_zona_por_coordenadas(lat, lon):
+    """
+    Devuelve la zona municipal que contiene las coordenadas indicadas.
+
+    Se consulta primero el índice local de polígonos (sin red). Solo si el
+    punto no cae en ninguna zona conocida y el fallback está habilitado se
+    recurre al reverse geocoding de Nominatim. Los resultados se guardan en
+    una caché por celda de grilla compartida por las denuncias cercanas.
+    """
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return ZONA_DESCONOCIDA
+
+    return obtener_cache_zonas().obtener_o_resolver(
+        lat, lon, _resolver_zona, omitir={ZONA_DESCONOCIDA}
+    )
+
+
+def _resolver_zona(lat, lon):
+    try:
+        zona_local = buscar_zona_local(lat, lon)
+    except Exception:
+        logger.exception("Falló la búsqueda de zona en el índice local.")
+        zona_local = None
+
+    if zona_local:
+        return zona_local
+
+    if not getattr(settings, "ZONAS_NOMINATIM_FALLBACK", True):
+        return ZONA_DESCONOCIDA
+
+    return obtener_zona_nominatim(lat, lon)
+
+
+def _consultar_nominatim(lat, lon):
+    """Retorna el diccionario ``address`` del reverse geocoding o ``None``."""
+    try:
+        return obtener_cliente_nominatim().reverse(lat, lon)
+    except Exception:
+        logger.exception("Error inesperado consultando Nominatim.")
+        return None
+
+
+def zona_desde_address(address):
     """
     Devuelve la zona usando principalmente el 'suburb' del reverse geocoding.
     Si no existe suburb, usa un fallback básico.
     """
+    # Prioridad máxima: suburb
+    suburb = address.get("suburb")
+    if suburb and suburb.strip():
+        return suburb.strip()
+
+    # Fallback
+    posibles = [
+        address.get("neighbourhood"),
+        address.get("city"),
+        address.get("town"),
+        address.get("village"),
+        address.get("municipality"),
+        address.get("state"),
+    ]
+
+    for zona in posibles:
+        if zona and zona.strip():
+            return zona.strip()
+
+    return ZONA_DESCONOCIDA
+
+
+def direccion_desde_address(address):
+    """Arma "calle número, comuna" a partir del ``address`` de Nominatim."""
+
+    calle = (address.get("road") or address.get("pedestrian") or "").strip()
+    numero = (address.get("house_number") or "").strip()
+    comuna = (
+        address.get("city")
+        or address.get("town")
+        or address.get("village")
+        or address.get("municipality")
+        or ""
+    ).strip()
+
+    partes = [" ".join(parte for parte in (calle, numero) if parte), comuna]
+    return ", ".join(parte for parte in partes if parte)
+
+
+def obtener_zona_nominatim(lat, lon):
+    """Zona según el reverse geocoding de Nominatim, o "Zona desconocida"."""
+    address = _consultar_nominatim(lat, lon)
+    if address is None:
+        return ZONA_DESCONOCIDA
+    return zona_desde_address(address)
+
+
+def obtener_direccion_por_coordenadas(lat, lon):
+    """
+    Devuelve una dirección legible ("calle número, comuna") para las
+    coordenadas, o una cadena vacía si no se pudo determinar.
+    """
+    address = _consultar_nominatim(lat, lon)
+    if not address:
+        return ""
+    return direccion_desde_address(address)
+
+
+def obtener_zona_y_direccion(lat, lon, *, requiere_zona=True, requiere_direccion=True):
+    """
+    Resuelve zona y dirección con a lo sumo una consulta a Nominatim.
+
+    La zona se busca primero en la caché y el índice local; Nominatim solo se
+    consulta si falta la dirección o la zona no se resolvió localmente (y el
+    fallback está habilitado), y de esa única respuesta se toman ambas.
+    Retorna ``(zona, direccion)`` (vacías si no se pidieron o Nominatim no
+    las trae) o ``None`` si la consulta necesaria falló: error de red,
+    respuesta inválida, límite de tasa o circuito abierto.
+    """
     try:
-        url = (
-            f"https://nominatim.openstreetmap.org/reverse"
-            f"?format=json&lat={lat}&lon={lon}&addressdetails=1"
-        )
-        headers = {"User-Agent": "microbasurales-app/1.0"}
-        res = requests.get(url, headers=headers, timeout=5)
-
-        if res.status_code != 200:
-            return "Zona desconocida"
-
-        data = res.json()
-        address = data.get("address", {})
-
-        # Prioridad máxima: suburb
-        suburb = address.get("suburb")
-        if suburb and suburb.strip():
-            return suburb.strip()
-
-        # Fallback
-        posibles = [
-            address.get("neighbourhood"),
-            address.get("city"),
-            address.get("town"),
-            address.get("village"),
-            address.get("municipality"),
-            address.get("state"),
-        ]
-
-        for zona in posibles:
-            if zona and zona.strip():
-                return zona.strip()
-
-        return "Zona desconocida"
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return (ZONA_DESCONOCIDA if requiere_zona else ""), ""
 
-    except Exception:
-        return "Zona desconocida"
+    cache = obtener_cache_zonas()
+    zona = ""
+    if requiere_zona:
+        zona = cache.obtener(lat, lon) or ""
+        if not zona:
+            try:
+                zona = buscar_zona_local(lat, lon) or ""
+            except Exception:
+                logger.exception("Falló la búsqueda de zona en el índice local.")
+            if zona:
+                cache.guardar(lat, lon, zona)
+
+    zona_remota = (
+        requiere_zona and not zona and getattr(settings, "ZONAS_NOMINATIM_FALLBACK", True)
+    )
+    if not (requiere_direccion or zona_remota):
+        return (zona or ZONA_DESCONOCIDA) if requiere_zona else "", ""
+
+    address = _consultar_nominatim(lat, lon)
+    if address is None:
+        return None
+
+    if zona_remota:
+        zona = zona_desde_address(address)
+        if zona != ZONA_DESCONOCIDA:
+            cache.guardar(lat, lon, zona)
+    elif requiere_zona and not zona:
+        zona = ZONA_DESCONOCIDA
+    direccion = direccion_desde_address(address) if requiere_direccion else ""
+    return zona, direccion
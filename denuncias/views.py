@@ -1,12 +1,24 @@
+import asyncio
+import json
 import logging
+import math
+import os
+from datetime import datetime, time, timedelta
 from urllib.parse import urlencode
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db import OperationalError, ProgrammingError, connection
-from django.db.models import Q
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import OperationalError, ProgrammingError
+from django.db.models import Max, Prefetch, Q, Sum, Value
+from django.db.models.functions import Coalesce, Lower
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.dateparse import parse_date
 from rest_framework import generics, permissions, status
 from rest_framework.pagination import PageNumberPagination
@@ -15,31 +27,55 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from . import geohash
 from .forms import ReporteCuadrillaForm
-from .models import Denuncia, DenunciaNotificacion, EstadoDenuncia
+from .models import (
+    ClusterMapa,
+    Denuncia,
+    DenunciaNotificacion,
+    EstadoDenuncia,
+    HistorialEstado,
+)
+from .pagination import DenunciaCursorPagination
 from .permissions import IsFuncionarioMunicipal, PuedeEditarDenunciasFinalizadas
 from .serializers import (
     DenunciaAdminSerializer,
     DenunciaCiudadanoSerializer,
     DenunciaSerializer,
+    HistorialEstadoSerializer,
+    MarcarNotificacionesLeidasSerializer,
     NotificacionDenunciaSerializer,
 )
-from .utils import obtener_zona_por_coordenadas
+from .services import clusters
+from .services.cache_zonas import obtener_cache_zonas
+from .services.enriquecimiento import encolar_enriquecimiento
+from .services.esquema import tabla_disponible
+from .services.sincronizacion import (
+    TokenSincronizacionInvalido,
+    cambios_desde,
+    eliminadas_desde,
+    generar_token_sincronizacion,
+    resolver_desde,
+    token_vencido,
+)
+from .services.tiempo_real import notificaciones_posteriores, obtener_canal_notificaciones
 from usuarios.models import Usuario
 
 
 logger = logging.getLogger(__name__)
 
 
+def _parametro_activo(valor):
+    return valor is not None and str(valor).lower() in {"1", "true", "t", "yes", "on"}
+
+
 def _build_estado_q(estado):
-    equivalentes = EstadoDenuncia.equivalent_values(estado)
-    if not equivalentes:
+    # En la base solo hay valores canónicos (restricción denuncia_estado_canonico),
+    # así que el alias recibido se normaliza aquí y se compara por igualdad.
+    estado_normalizado = EstadoDenuncia.normalize(estado)
+    if not estado_normalizado:
         return None
-
-    condicion = Q()
-    for valor in equivalentes:
-        condicion |= Q(estado__iexact=valor)
-    return condicion
+    return Q(estado=estado_normalizado)
 
 
 def _aplicar_filtro_estado(queryset, estado, *, excluir=False):
@@ -52,6 +88,67 @@ def _aplicar_filtro_estado(queryset, estado, *, excluir=False):
     return queryset.filter(condicion)
 
 
+def _aplicar_filtros_estado(queryset, params):
+    """Aplica los filtros de estado del panel (``estado``, ``excluir_estado``
+    y ``solo_activos``); sirve para cualquier modelo con campo ``estado``."""
+
+    estado = params.get("estado")
+    if estado:
+        queryset = _aplicar_filtro_estado(queryset, estado)
+
+    excluir_estado = params.get("excluir_estado")
+    if excluir_estado:
+        queryset = _aplicar_filtro_estado(
+            queryset, excluir_estado, excluir=True
+        )
+
+    solo_activos = params.get("solo_activos")
+    if solo_activos is not None:
+        valor_normalizado = str(solo_activos).lower()
+        if valor_normalizado in {"1", "true", "t", "yes", "on"}:
+            queryset = _aplicar_filtro_estado(
+                queryset, Denuncia.EstadoDenuncia.FINALIZADO, excluir=True
+            )
+
+    return queryset
+
+
+def _tiene_filtros_no_agregados(params):
+    return any(params.get(clave) for clave in ("zona", "fecha_desde", "fecha_hasta"))
+
+
+def _aplicar_filtros_panel(queryset, params):
+    """Aplica los filtros del panel de fiscalizadores (estado, zona y fechas)."""
+
+    queryset = _aplicar_filtros_estado(queryset, params)
+
+    zona = params.get("zona")
+    if zona:
+        # Igual que zona__iexact, pero sobre LOWER(zona), que tiene índice.
+        queryset = queryset.alias(zona_normalizada=Lower("zona")).filter(
+            zona_normalizada=Lower(Value(zona))
+        )
+
+    # Rangos de timestamp en lugar de ``__date`` para que usen los índices.
+    fecha_desde = parse_date(params.get("fecha_desde", ""))
+    if fecha_desde:
+        queryset = queryset.filter(fecha_creacion__gte=_inicio_del_dia(fecha_desde))
+
+    fecha_hasta = parse_date(params.get("fecha_hasta", ""))
+    if fecha_hasta:
+        queryset = queryset.filter(
+            fecha_creacion__lt=_inicio_del_dia(fecha_hasta + timedelta(days=1))
+        )
+
+    return queryset
+
+
+def _inicio_del_dia(fecha):
+    """Medianoche de ``fecha`` en la zona horaria local, como datetime aware."""
+
+    return timezone.make_aware(datetime.combine(fecha, time.min))
+
+
 class DenunciasPagination(PageNumberPagination):
     page_size = 50
     page_size_query_param = "page_size"
@@ -59,7 +156,10 @@ class DenunciasPagination(PageNumberPagination):
 
 
 class DenunciaListCreateView(APIView):
-    """Permite listar todas las denuncias y crear nuevas denuncias."""
+    """Permite listar todas las denuncias y crear nuevas denuncias.
+
+    El listado se pagina por cursor sobre ``(fecha_creacion, id)``.
+    """
 
     permission_classes = [permissions.IsAuthenticated]
 
@@ -77,10 +177,19 @@ class DenunciaListCreateView(APIView):
         if estado:
             queryset = _aplicar_filtro_estado(queryset, estado)
 
+        # Compatibilidad: ``?completo=1`` entrega el listado completo sin paginar.
+        if _parametro_activo(request.query_params.get("completo")):
+            serializer = DenunciaSerializer(
+                queryset, many=True, context={"request": request}
+            )
+            return Response(serializer.data)
+
+        paginator = DenunciaCursorPagination()
+        pagina = paginator.paginate_queryset(queryset, request, view=self)
         serializer = DenunciaSerializer(
-            queryset, many=True, context={"request": request}
+            pagina, many=True, context={"request": request}
         )
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request, *args, **kwargs):
         descripcion = request.data.get("descripcion", "").strip()
@@ -117,11 +226,8 @@ class DenunciaListCreateView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        zona_calculada = obtener_zona_por_coordenadas(
-            latitud_valor,
-            longitud_valor,
-        )
-
+        # La zona y la dirección se completan en segundo plano para que la
+        # respuesta no dependa del geocodificador.
         denuncia = Denuncia.objects.create(
             usuario=request.user,
             descripcion=descripcion,
@@ -130,26 +236,83 @@ class DenunciaListCreateView(APIView):
             latitud=latitud_valor,
             longitud=longitud_valor,
             direccion=direccion,
-            zona=zona_calculada,
+            zona="",
         )
+        encolar_enriquecimiento(denuncia.pk)
 
         serializer = DenunciaSerializer(denuncia, context={"request": request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class MisDenunciasListView(generics.ListAPIView):
+class SincronizacionDeltaMixin:
+    """Agrega ``?sync_token=`` / ``?updated_since=`` a un listado de denuncias.
+
+    Sin esos parámetros el listado responde como siempre e incluye el token en
+    la cabecera ``X-Sync-Token``. Con ellos responde solo las denuncias
+    modificadas desde entonces y los ids que el cliente debe quitar.
+    """
+
+    def get_queryset_sincronizacion(self):
+        raise NotImplementedError
+
+    def filtrar_sincronizacion(self, queryset):
+        return queryset
+
+    def get_usuario_eliminadas(self):
+        return None
+
+    def list(self, request, *args, **kwargs):
+        ahora = timezone.now()
+        try:
+            desde = resolver_desde(request.query_params)
+        except TokenSincronizacionInvalido as exc:
+            return Response({"sync_token": [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+
+        token = generar_token_sincronizacion(ahora)
+        if desde is None:
+            response = super().list(request, *args, **kwargs)
+            response["X-Sync-Token"] = token
+            return response
+
+        if token_vencido(desde, ahora):
+            return Response(
+                {"detail": "El token de sincronización expiró; vuelve a cargar el listado."},
+                status=status.HTTP_410_GONE,
+            )
+
+        visibles, removidas = cambios_desde(
+            self.get_queryset_sincronizacion(), desde, self.filtrar_sincronizacion
+        )
+        eliminadas = eliminadas_desde(desde, usuario_id=self.get_usuario_eliminadas())
+        serializer = self.get_serializer(visibles.order_by("fecha_actualizacion", "id"), many=True)
+        response = Response(
+            {
+                "sync_token": token,
+                "results": serializer.data,
+                "eliminadas": sorted(set(removidas) | set(eliminadas)),
+            }
+        )
+        response["X-Sync-Token"] = token
+        return response
+
+
+class MisDenunciasListView(SincronizacionDeltaMixin, generics.ListAPIView):
     """Lista únicamente las denuncias del usuario autenticado."""
 
     serializer_class = DenunciaCiudadanoSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-    def get_queryset(self):
-        return (
-            Denuncia.objects.filter(usuario=self.request.user)
-            .select_related("reporte_cuadrilla", "reporte_cuadrilla__jefe_cuadrilla")
-            .order_by("-fecha_creacion")
+    def get_queryset_sincronizacion(self):
+        return Denuncia.objects.filter(usuario=self.request.user).select_related(
+            "reporte_cuadrilla", "reporte_cuadrilla__jefe_cuadrilla"
         )
 
+    def get_queryset(self):
+        return self.get_queryset_sincronizacion().order_by("-fecha_creacion")
+
+    def get_usuario_eliminadas(self):
+        return self.request.user.pk
+
 
 class MiDenunciaRetrieveUpdateView(generics.RetrieveUpdateAPIView):
     """Permite obtener y actualizar una denuncia propia."""
@@ -167,57 +330,189 @@ class MiDenunciaRetrieveUpdateView(generics.RetrieveUpdateAPIView):
         serializer.save(usuario=self.request.user)
 
 
-class DenunciaAdminListView(generics.ListAPIView):
+class DenunciaAdminListView(SincronizacionDeltaMixin, generics.ListAPIView):
     """Lista de denuncias con filtros para funcionarios municipales."""
 
     serializer_class = DenunciaAdminSerializer
     permission_classes = [permissions.IsAuthenticated, IsFuncionarioMunicipal]
     pagination_class = DenunciasPagination
 
-    def get_queryset(self):
-        queryset = Denuncia.objects.select_related(
+    def get_queryset_sincronizacion(self):
+        return Denuncia.objects.select_related(
             "usuario",
             "reporte_cuadrilla",
             "reporte_cuadrilla__jefe_cuadrilla",
             "jefe_cuadrilla_asignado",
         ).all()
 
-        estado = self.request.query_params.get("estado")
-        if estado:
-            queryset = _aplicar_filtro_estado(queryset, estado)
+    def filtrar_sincronizacion(self, queryset):
+        return _aplicar_filtros_panel(queryset, self.request.query_params)
 
-        excluir_estado = self.request.query_params.get("excluir_estado")
-        if excluir_estado:
-            queryset = _aplicar_filtro_estado(
-                queryset, excluir_estado, excluir=True
+    def get_queryset(self):
+        queryset = self.filtrar_sincronizacion(self.get_queryset_sincronizacion())
+        return queryset.order_by("fecha_creacion")
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["request"] = self.request
+        return context
+
+
+def _parsear_bbox(valor):
+    """Interpreta ``oeste,sur,este,norte`` (formato de ``L.LatLngBounds.toBBoxString``).
+
+    Con zoom bajo o tras cruzar el antimeridiano Leaflet entrega longitudes
+    fuera de ±180: el recuadro se traslada al mundo central y se recorta, en
+    vez de rechazarlo.
+    """
+
+    try:
+        oeste, sur, este, norte = (float(parte) for parte in str(valor).split(","))
+    except (TypeError, ValueError):
+        return None
+
+    if not all(math.isfinite(parte) for parte in (oeste, sur, este, norte)):
+        return None
+    if sur > norte or oeste > este:
+        return None
+
+    if este - oeste >= 360:
+        oeste, este = -180.0, 180.0
+    else:
+        desplazamiento = 360 * math.floor(((oeste + este) / 2 + 180) / 360)
+        oeste = max(oeste - desplazamiento, -180.0)
+        este = min(este - desplazamiento, 180.0)
+    return max(sur, -90.0), oeste, min(norte, 90.0), este
+
+
+class DenunciaMapaView(APIView):
+    """Entrega el contenido visible en un recuadro del mapa en formato compacto.
+
+    Con zoom bajo responde clusters por celda geohash (``modo: clusters``),
+    leídos de la tabla precalculada ``ClusterMapa`` o agrupados en vivo si hay
+    filtros de zona o fecha. Con zoom cercano responde marcadores
+    ``[id, latitud, longitud, estado, color]`` filtrados por prefijo geohash.
+    """
+
+    permission_classes = [permissions.IsAuthenticated, IsFuncionarioMunicipal]
+    campos = ["id", "lat", "lon", "estado", "color"]
+    campos_cluster = ["celda", "lat", "lon", "total", "por_estado"]
+
+    def get(self, request, *args, **kwargs):
+        bbox = _parsear_bbox(request.query_params.get("bbox"))
+        if bbox is None:
+            return Response(
+                {"bbox": ["Debes indicar un recuadro válido: oeste,sur,este,norte."]},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-        solo_activos = self.request.query_params.get("solo_activos")
-        if solo_activos is not None:
-            valor_normalizado = str(solo_activos).lower()
-            if valor_normalizado in {"1", "true", "t", "yes", "on"}:
-                queryset = _aplicar_filtro_estado(
-                    queryset, Denuncia.EstadoDenuncia.FINALIZADO, excluir=True
-                )
+        try:
+            zoom = int(request.query_params.get("zoom", 0))
+        except (TypeError, ValueError):
+            zoom = -1
+        if not 0 <= zoom <= 22:
+            return Response(
+                {"zoom": ["El zoom debe ser un entero entre 0 y 22."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        zona = self.request.query_params.get("zona")
-        if zona:
-            queryset = queryset.filter(zona__iexact=zona)
+        sur, oeste, norte, este = bbox
+        prefijos = geohash.prefijos_para_bbox(sur, oeste, norte, este)
 
-        fecha_desde = parse_date(self.request.query_params.get("fecha_desde", ""))
-        if fecha_desde:
-            queryset = queryset.filter(fecha_creacion__date__gte=fecha_desde)
+        precision = clusters.precision_para_zoom(zoom)
+        if precision is not None:
+            return self._responder_clusters(request, zoom, precision, prefijos)
 
-        fecha_hasta = parse_date(self.request.query_params.get("fecha_hasta", ""))
-        if fecha_hasta:
-            queryset = queryset.filter(fecha_creacion__date__lte=fecha_hasta)
+        condicion_geohash = Q()
+        for prefijo in prefijos:
+            condicion_geohash |= Q(geohash__startswith=prefijo)
 
-        return queryset.order_by("fecha_creacion")
+        queryset = Denuncia.objects.filter(
+            condicion_geohash,
+            latitud__range=(sur, norte),
+            longitud__range=(oeste, este),
+        )
+        queryset = _aplicar_filtros_panel(queryset, request.query_params)
 
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context["request"] = self.request
-        return context
+        limite = getattr(settings, "MAPA_MAX_MARCADORES", 2000)
+        filas = list(
+            queryset.order_by("-fecha_creacion").values_list(
+                "id", "latitud", "longitud", "estado"
+            )[: limite + 1]
+        )
+        truncado = len(filas) > limite
+
+        marcadores = [
+            [identificador, lat, lon, estado, EstadoDenuncia.get_color(estado)]
+            for identificador, lat, lon, estado in filas[:limite]
+        ]
+        return Response(
+            {
+                "zoom": zoom,
+                "modo": "marcadores",
+                "campos": self.campos,
+                "marcadores": marcadores,
+                "truncado": truncado,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    def _responder_clusters(self, request, zoom, precision, prefijos):
+        params = request.query_params
+        # Los prefijos más finos que la celda se recortan a su precisión; los
+        # más gruesos seleccionan todas las celdas que contienen.
+        celdas = {prefijo[:precision] for prefijo in prefijos if len(prefijo) >= precision}
+        gruesos = [prefijo for prefijo in prefijos if len(prefijo) < precision]
+
+        if _tiene_filtros_no_agregados(params):
+            condicion = Q()
+            for prefijo in sorted(celdas) + gruesos:
+                condicion |= Q(geohash__startswith=prefijo)
+            queryset = _aplicar_filtros_panel(Denuncia.objects.filter(condicion), params)
+            filas = clusters.agrupar_denuncias(queryset, precision)
+        else:
+            queryset = ClusterMapa.objects.filter(
+                clusters.filtro_celdas(celdas, gruesos, precision)
+            )
+            filas = clusters.resumir_precalculados(
+                _aplicar_filtros_estado(queryset, params), precision
+            )
+
+        agrupados = {}
+        for fila in filas:
+            if fila["total"] <= 0:
+                continue
+            grupo = agrupados.setdefault(
+                fila["celda"],
+                {"total": 0, "suma_latitud": 0.0, "suma_longitud": 0.0, "por_estado": {}},
+            )
+            grupo["total"] += fila["total"]
+            grupo["suma_latitud"] += fila["suma_latitud"]
+            grupo["suma_longitud"] += fila["suma_longitud"]
+            grupo["por_estado"][fila["estado"]] = (
+                grupo["por_estado"].get(fila["estado"], 0) + fila["total"]
+            )
+
+        resultado = [
+            [
+                celda,
+                round(grupo["suma_latitud"] / grupo["total"], 6),
+                round(grupo["suma_longitud"] / grupo["total"], 6),
+                grupo["total"],
+                grupo["por_estado"],
+            ]
+            for celda, grupo in sorted(agrupados.items())
+        ]
+        return Response(
+            {
+                "zoom": zoom,
+                "modo": "clusters",
+                "precision": precision,
+                "campos": self.campos_cluster,
+                "clusters": resultado,
+            },
+            status=status.HTTP_200_OK,
+        )
 
 
 class DenunciaAdminUpdateView(generics.UpdateAPIView):
@@ -323,14 +618,76 @@ class JefesCuadrillaList(APIView):
         return Response(data, status=status.HTTP_200_OK)
 
 
-def _tabla_notificaciones_disponible():
-    """Verifica si la tabla de notificaciones existe en la base de datos."""
+def _parsear_ids(valor, maximo):
+    """Interpreta ``1,2,3`` como ids únicos; ``None`` si es inválido o excede ``maximo``."""
 
     try:
-        tablas = connection.introspection.table_names()
-    except (ProgrammingError, OperationalError):
-        return False
-    return DenunciaNotificacion._meta.db_table in tablas
+        ids = {int(parte) for parte in str(valor or "").split(",") if parte.strip()}
+    except ValueError:
+        return None
+    if not ids or len(ids) > maximo or min(ids) < 1:
+        return None
+    return sorted(ids)
+
+
+class DenunciaHistorialView(APIView):
+    """Historial de estados de varias denuncias en una sola respuesta.
+
+    ``?ids=1,2,3`` retorna ``{"historial": {"1": [...], ...}}`` con los
+    cambios de cada denuncia del más antiguo al más reciente. Los registros se
+    cargan con un único ``prefetch_related`` sobre la FK de ``HistorialEstado``.
+    """
+
+    permission_classes = [permissions.IsAuthenticated, IsFuncionarioMunicipal]
+    maximo_ids = 100
+
+    def get(self, request, *args, **kwargs):
+        ids = _parsear_ids(request.query_params.get("ids"), self.maximo_ids)
+        if ids is None:
+            return Response(
+                {"ids": [f"Indica entre 1 y {self.maximo_ids} ids separados por comas."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not tabla_disponible(HistorialEstado):
+            return Response({"historial": {}}, status=status.HTTP_200_OK)
+
+        denuncias = (
+            Denuncia.objects.filter(id__in=ids)
+            .only("id")
+            .prefetch_related(
+                Prefetch(
+                    "historial_registros",
+                    queryset=HistorialEstado.objects.select_related("responsable").order_by(
+                        "fecha", "id"
+                    ),
+                )
+            )
+        )
+        historial = {
+            str(denuncia.id): HistorialEstadoSerializer(
+                denuncia.historial_registros.all(), many=True
+            ).data
+            for denuncia in denuncias
+        }
+        return Response({"historial": historial}, status=status.HTTP_200_OK)
+
+
+class ZonasCacheEstadisticasView(APIView):
+    """Expone los contadores de la caché de zonas del proceso actual."""
+
+    permission_classes = [permissions.IsAuthenticated, IsFuncionarioMunicipal]
+
+    def get(self, request, *args, **kwargs):
+        estadisticas = obtener_cache_zonas().estadisticas()
+        estadisticas["pid"] = os.getpid()
+        return Response(estadisticas, status=status.HTTP_200_OK)
+
+
+def _tabla_notificaciones_disponible():
+    """Verifica si la tabla de notificaciones existe (resultado cacheado por proceso)."""
+
+    return tabla_disponible(DenunciaNotificacion)
 
 
 class MisNotificacionesListView(generics.ListAPIView):
@@ -349,7 +706,9 @@ class MisNotificacionesListView(generics.ListAPIView):
         return super().list(request, *args, **kwargs)
 
     def get_queryset(self):
-        queryset = DenunciaNotificacion.objects.filter(usuario=self.request.user)
+        queryset = DenunciaNotificacion.objects.filter(
+            usuario=self.request.user
+        ).select_related("denuncia")
         solo_no_leidas = self.request.query_params.get("solo_no_leidas")
         if solo_no_leidas is not None:
             valor = str(solo_no_leidas).lower()
@@ -358,6 +717,94 @@ class MisNotificacionesListView(generics.ListAPIView):
         return queryset.order_by("-fecha_creacion")
 
 
+class NotificacionesResumenView(APIView):
+    """Cantidad de notificaciones no leídas y el id de la más reciente.
+
+    Pensado para el sondeo periódico: el cliente solo pide el listado completo
+    cuando este resumen cambia. Usa el índice (usuario, leida, fecha_creacion).
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        if not _tabla_notificaciones_disponible():
+            return Response({"no_leidas": 0, "ultima_id": None}, status=status.HTTP_200_OK)
+
+        # Una fila compactada por la retención cuenta por las que resume.
+        resumen = DenunciaNotificacion.objects.filter(
+            usuario=request.user, leida=False
+        ).aggregate(no_leidas=Coalesce(Sum("agrupadas"), 0), ultima_id=Max("id"))
+        return Response(resumen, status=status.HTTP_200_OK)
+
+
+def _formatear_evento_sse(evento):
+    datos = {clave: valor for clave, valor in evento.items() if clave != "usuario"}
+    return (
+        f"id: {evento['id']}\n"
+        "event: notificacion\n"
+        f"data: {json.dumps(datos, cls=DjangoJSONEncoder, ensure_ascii=False)}\n\n"
+    )
+
+
+async def _eventos_notificaciones(usuario_id, ultimo_id):
+    canal = obtener_canal_notificaciones()
+    cola = canal.suscribir(usuario_id)
+    latido = getattr(settings, "NOTIFICACIONES_SSE_LATIDO_SEGUNDOS", 20)
+    try:
+        yield f"retry: {getattr(settings, 'NOTIFICACIONES_SSE_REINTENTO_MS', 5000)}\n\n"
+        reenviadas = set()
+        if ultimo_id is not None:
+            # Reconexión: se entregan las no leídas creadas mientras no hubo conexión.
+            for evento in await sync_to_async(notificaciones_posteriores)(usuario_id, ultimo_id):
+                reenviadas.add(evento["id"])
+                yield _formatear_evento_sse(evento)
+        while True:
+            try:
+                evento = await asyncio.wait_for(cola.get(), timeout=latido)
+            except asyncio.TimeoutError:
+                # Comentario SSE: mantiene viva la conexión a través de proxies.
+                yield ": latido\n\n"
+                continue
+            if evento["id"] not in reenviadas:
+                yield _formatear_evento_sse(evento)
+    finally:
+        canal.desuscribir(usuario_id, cola)
+
+
+async def notificaciones_stream(request):
+    """Server-Sent Events con las notificaciones nuevas del usuario.
+
+    Requiere un servidor ASGI (``config.asgi``). Bajo WSGI, o con
+    ``NOTIFICACIONES_SSE_HABILITADO = False``, responde 204: ``EventSource``
+    deja de reintentar y el cliente sigue con el sondeo de ``/resumen/``.
+    """
+
+    if not isinstance(request, ASGIRequest) or not getattr(
+        settings, "NOTIFICACIONES_SSE_HABILITADO", True
+    ):
+        return HttpResponse(status=204)
+
+    usuario = await request.auser()
+    if not usuario.is_authenticated:
+        return JsonResponse(
+            {"detail": "Las credenciales de autenticación no se proveyeron."}, status=401
+        )
+
+    ultimo_id = request.headers.get("Last-Event-ID") or request.GET.get("ultimo_id")
+    try:
+        ultimo_id = int(ultimo_id) if ultimo_id else None
+    except ValueError:
+        ultimo_id = None
+
+    response = StreamingHttpResponse(
+        _eventos_notificaciones(usuario.pk, ultimo_id), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # Evita que Nginx acumule la respuesta antes de enviarla.
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 class NotificacionActualizarView(generics.UpdateAPIView):
     """Permite marcar como leídas las notificaciones propias."""
 
@@ -376,6 +823,30 @@ class NotificacionActualizarView(generics.UpdateAPIView):
         return DenunciaNotificacion.objects.filter(usuario=self.request.user)
 
 
+class NotificacionesMarcarLeidasView(APIView):
+    """Marca como leídas varias notificaciones propias con un solo UPDATE.
+
+    Acepta ``{"ids": [...]}`` o ``{"hasta_id": n}`` (todas las no leídas con
+    id menor o igual a ``n``, p. ej. el más reciente que muestra la pantalla).
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = MarcarNotificacionesLeidasSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        if not _tabla_notificaciones_disponible():
+            return Response({"actualizadas": 0}, status=status.HTTP_200_OK)
+
+        queryset = DenunciaNotificacion.objects.filter(usuario=request.user, leida=False)
+        if "ids" in serializer.validated_data:
+            queryset = queryset.filter(id__in=serializer.validated_data["ids"])
+        else:
+            queryset = queryset.filter(id__lte=serializer.validated_data["hasta_id"])
+        return Response({"actualizadas": queryset.update(leida=True)}, status=status.HTTP_200_OK)
+
+
 def _usuario_puede_gestionar_denuncias(usuario) -> bool:
     """Devuelve ``True`` si el usuario tiene permisos de fiscalizador o administrador."""
 
@@ -447,6 +918,8 @@ def _construir_panel_context(request, *, solo_activos=False, solo_finalizados=Fa
         "api_update_url": request.build_absolute_uri(
             reverse("denuncias_admin_update", args=[0])
         ),
+        "api_mapa_url": request.build_absolute_uri(reverse("denuncias_mapa")),
+        "api_historial_url": request.build_absolute_uri(reverse("denuncias_historial")),
         "jefes_cuadrilla_url": None,
         "zonas_disponibles": zonas_disponibles,
         "estados_config": estados_config,
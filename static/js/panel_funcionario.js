@@ -6,6 +6,8 @@
 
     const token = mapaElemento.dataset.token;
     const apiUrl = mapaElemento.dataset.apiUrl;
+    const mapaUrl = mapaElemento.dataset.mapaUrl || "";
+    const historialUrl = mapaElemento.dataset.historialUrl || "";
     const updateUrlTemplate = mapaElemento.dataset.updateUrl || "";
     const updateBaseUrl = updateUrlTemplate.replace(/0\/?$/, "");
     const esFiscalizador = mapaElemento.dataset.esFiscalizador === "true";
@@ -114,6 +116,9 @@
         : null;
     let denunciaRechazoActual = null;
     const denunciasPorId = new Map();
+    // Historial de estados por denuncia; se pide en bloque al abrir un detalle.
+    const historialPorId = new Map();
+    const MAXIMO_IDS_HISTORIAL = 100;
     const denunciasPorEstado = {
         pendiente: [],
         en_gestion: [],
@@ -544,6 +549,11 @@
     const markerLayer = L.layerGroup().addTo(map);
     const marcadoresPorId = new Map();
     let filtrosActivos = {};
+    let marcadoresAbortController = null;
+    let marcadoresTimeout = null;
+    let marcadorPendienteDeAbrir = null;
+    let syncToken = null;
+    const INTERVALO_SINCRONIZACION_MS = 60000;
 
     function obtenerCSRFToken() {
         const nombre = "csrftoken";
@@ -596,22 +606,100 @@
             const detalle = await extraerMensajeDeError(respuesta);
             throw new Error(detalle);
         }
+        historialPorId.delete(Number(denunciaId));
+    }
+
+    function construirParametrosFiltros(filtros) {
+        const parametros = new URLSearchParams();
+        Object.entries(filtros)
+            .filter(([, value]) => value)
+            .forEach(([clave, valor]) => parametros.append(clave, valor));
+        return parametros;
+    }
+
+    function programarCargaMarcadores() {
+        clearTimeout(marcadoresTimeout);
+        marcadoresTimeout = setTimeout(cargarMarcadores, 250);
+    }
+
+    function recuadroVisible() {
+        // Con zoom bajo o tras cruzar el antimeridiano Leaflet entrega
+        // longitudes fuera de ±180; se envía el recuadro recortado al mundo.
+        const limites = map.wrapLatLngBounds(map.getBounds());
+        const oeste = Math.max(limites.getWest(), -180);
+        const este = Math.min(limites.getEast(), 180);
+        const sur = Math.max(limites.getSouth(), -90);
+        const norte = Math.min(limites.getNorth(), 90);
+        return [oeste, sur, este, norte].join(",");
+    }
+
+    async function cargarMarcadores() {
+        if (!mapaUrl) {
+            return;
+        }
+
+        if (marcadoresAbortController) {
+            marcadoresAbortController.abort();
+        }
+        marcadoresAbortController = new AbortController();
+
+        const parametros = construirParametrosFiltros(filtrosActivos);
+        parametros.set("bbox", recuadroVisible());
+        parametros.set("zoom", String(map.getZoom()));
+        const url = new URL(mapaUrl);
+        url.search = parametros.toString();
+
+        try {
+            const respuesta = await fetch(url.toString(), {
+                headers: {
+                    Authorization: `Bearer ${token}`,
+                    Accept: "application/json",
+                },
+                credentials: "same-origin",
+                signal: marcadoresAbortController.signal,
+            });
+
+            if (!respuesta.ok) {
+                throw new Error("No fue posible obtener los marcadores");
+            }
+
+            const data = await respuesta.json();
+            markerLayer.clearLayers();
+            marcadoresPorId.clear();
+            if (data.modo === "clusters") {
+                (data.clusters || []).forEach(([celda, latitud, longitud, total, porEstado]) => {
+                    agregarCluster({ celda, latitud, longitud, total, porEstado });
+                });
+            } else {
+                (data.marcadores || []).forEach(([id, latitud, longitud, estado, color]) => {
+                    agregarMarcador({ id, latitud, longitud, estado, color });
+                });
+            }
+
+            if (marcadorPendienteDeAbrir !== null) {
+                const pendiente = marcadoresPorId.get(marcadorPendienteDeAbrir);
+                marcadorPendienteDeAbrir = null;
+                if (pendiente) {
+                    pendiente.openPopup();
+                }
+            }
+        } catch (error) {
+            if (error.name === "AbortError") {
+                return;
+            }
+            console.error(error);
+        }
     }
 
     async function cargarDenuncias(filtros = {}) {
         filtrosActivos = filtros;
-        markerLayer.clearLayers();
-        marcadoresPorId.clear();
         denunciasPorId.clear();
         Object.keys(denunciasPorEstado).forEach((estado) => {
             denunciasPorEstado[estado] = [];
         });
 
         try {
-            const parametros = new URLSearchParams();
-            Object.entries(filtros)
-                .filter(([, value]) => value)
-                .forEach(([clave, valor]) => parametros.append(clave, valor));
+            const parametros = construirParametrosFiltros(filtros);
 
             let paginaUrl = new URL(apiUrl);
             paginaUrl.search = parametros.toString();
@@ -622,6 +710,7 @@
             const realizados = [];
             const finalizados = [];
             const rechazadas = [];
+            let tokenCarga = null;
 
             while (paginaUrl) {
                 const respuesta = await fetch(paginaUrl.toString(), {
@@ -636,9 +725,14 @@
                     throw new Error("No fue posible obtener las denuncias");
                 }
 
+                // El token de la primera página marca el inicio de la carga.
+                tokenCarga = tokenCarga || respuesta.headers.get("X-Sync-Token");
+
                 const data = await respuesta.json();
                 (data.results || []).forEach((denuncia) => {
-                    agregarMarcador(denuncia, bounds);
+                    if (denuncia.latitud && denuncia.longitud) {
+                        bounds.push([denuncia.latitud, denuncia.longitud]);
+                    }
                     denunciasPorId.set(Number(denuncia.id), denuncia);
                     const estadoNormalizado = normalizarEstado(denuncia.estado);
                     if (estadoNormalizado === "pendiente") {
@@ -673,7 +767,9 @@
             denunciasPorEstado.finalizado = finalizados.slice();
             denunciasPorEstado.rechazada = rechazadas.slice();
 
+            syncToken = tokenCarga;
             ajustarMapa(bounds);
+            programarCargaMarcadores();
             actualizarMarcaDeTiempo();
             renderEstado("pendiente");
             renderEstado("en_gestion");
@@ -695,14 +791,76 @@
         }
     }
 
-    function agregarMarcador(denuncia, bounds) {
-        if (!denuncia.latitud || !denuncia.longitud) {
+    function reagruparDenunciasPorEstado() {
+        Object.keys(denunciasPorEstado).forEach((estado) => {
+            denunciasPorEstado[estado] = [];
+        });
+        denunciasPorId.forEach((denuncia) => {
+            const estado = normalizarEstado(denuncia.estado);
+            if (denunciasPorEstado[estado]) {
+                denunciasPorEstado[estado].push(denuncia);
+            }
+        });
+        Object.values(denunciasPorEstado).forEach(ordenarDenunciasPorFecha);
+    }
+
+    async function sincronizarDenuncias() {
+        if (!syncToken) {
+            return cargarDenuncias(filtrosActivos);
+        }
+
+        const parametros = construirParametrosFiltros(filtrosActivos);
+        parametros.set("sync_token", syncToken);
+        const url = new URL(apiUrl);
+        url.search = parametros.toString();
+
+        try {
+            const respuesta = await fetch(url.toString(), {
+                headers: {
+                    Authorization: `Bearer ${token}`,
+                    Accept: "application/json",
+                },
+                credentials: "same-origin",
+            });
+
+            if (respuesta.status === 410) {
+                return cargarDenuncias(filtrosActivos);
+            }
+            if (!respuesta.ok) {
+                throw new Error("No fue posible sincronizar las denuncias");
+            }
+
+            const data = await respuesta.json();
+            syncToken = data.sync_token;
+            const cambios = (data.eliminadas || []).length + (data.results || []).length;
+            (data.eliminadas || []).forEach((id) => denunciasPorId.delete(Number(id)));
+            (data.results || []).forEach((denuncia) => {
+                denunciasPorId.set(Number(denuncia.id), denuncia);
+                historialPorId.delete(Number(denuncia.id));
+            });
+
+            actualizarMarcaDeTiempo();
+            if (!cambios) {
+                return;
+            }
+            reagruparDenunciasPorEstado();
+            programarCargaMarcadores();
+            Object.keys(denunciasPorEstado).forEach(renderEstado);
+        } catch (error) {
+            console.error(error);
+        }
+    }
+
+    function agregarMarcador(marcador) {
+        if (!marcador.latitud || !marcador.longitud) {
             return;
         }
 
-        const color = obtenerColorDenuncia(denuncia);
+        const id = Number(marcador.id);
+        const completa = denunciasPorId.get(id);
+        const color = obtenerColorDenuncia(completa || marcador);
 
-        const marker = L.circleMarker([denuncia.latitud, denuncia.longitud], {
+        const marker = L.circleMarker([marcador.latitud, marcador.longitud], {
             radius: 16,
             fillColor: color,
             color: "#ffffff",
@@ -710,10 +868,44 @@
             fillOpacity: 1,
         });
 
-        marker.bindPopup(construirPopup(denuncia));
+        // El contenido se arma al abrir el popup con los datos completos del listado.
+        marker.bindPopup(() => construirPopup(denunciasPorId.get(id) || marcador));
+        markerLayer.addLayer(marker);
+        marcadoresPorId.set(id, marker);
+    }
+
+    function agregarCluster(cluster) {
+        if (cluster.total === 1) {
+            // Una sola denuncia se ve como punto, sin contador.
+            const estado = Object.keys(cluster.porEstado)[0];
+            const marker = L.circleMarker([cluster.latitud, cluster.longitud], {
+                radius: 10,
+                fillColor: obtenerColorDenuncia({ estado }),
+                color: "#ffffff",
+                weight: 2,
+                fillOpacity: 1,
+            });
+            marker.on("click", () => {
+                map.setView([cluster.latitud, cluster.longitud], Math.max(map.getZoom() + 2, 14));
+            });
+            markerLayer.addLayer(marker);
+            return;
+        }
+
+        const tamano = Math.min(56, 28 + Math.round(Math.log10(cluster.total) * 10));
+        const detalle = Object.entries(cluster.porEstado)
+            .map(([estado, cantidad]) => `${obtenerEtiquetaEstado({ estado })}: ${cantidad}`)
+            .join("\n");
+        const icono = L.divIcon({
+            className: "cluster-denuncias",
+            html: `<div title="${escapeHtml(detalle)}" style="width:${tamano}px;height:${tamano}px;line-height:${tamano}px;border-radius:50%;background:rgba(13,110,253,0.85);color:#fff;font-weight:600;text-align:center;border:3px solid #fff;">${cluster.total}</div>`,
+            iconSize: [tamano, tamano],
+        });
+        const marker = L.marker([cluster.latitud, cluster.longitud], { icon: icono });
+        marker.on("click", () => {
+            map.setView([cluster.latitud, cluster.longitud], map.getZoom() + 2);
+        });
         markerLayer.addLayer(marker);
-        marcadoresPorId.set(Number(denuncia.id), marker);
-        bounds.push([denuncia.latitud, denuncia.longitud]);
     }
 
     function construirPopup(denuncia) {
@@ -856,7 +1048,7 @@
                         "Denuncia asignada y marcada en gestión correctamente.",
                         "success"
                     );
-                    cargarDenuncias(filtrosActivos);
+                    sincronizarDenuncias();
                 } catch (error) {
                     if (errorElemento) {
                         errorElemento.textContent =
@@ -1243,6 +1435,14 @@
                 </section>`
             : "";
         const formularioGestionHtml = construirFormularioGestion(denuncia);
+        const historialHtml = historialUrl
+            ? `<section class="denuncia-card__detail-group" data-historial-denuncia="${escapeAttribute(
+                  denuncia.id
+              )}">
+                    <h6>Historial de estados</h6>
+                    ${construirHistorialHtml(historialPorId.get(Number(denuncia.id)))}
+                </section>`
+            : "";
 
         return `
             <header class="denuncia-card__header">
@@ -1319,6 +1519,7 @@
                         </section>
                     </div>
                     ${rechazoDetalleHtml}
+                    ${historialHtml}
                     ${galeriaHtml}
                     ${formularioGestionHtml}
                 </div>
@@ -1326,6 +1527,83 @@
         `;
     }
 
+    function construirHistorialHtml(registros) {
+        if (!registros) {
+            return `<p class="text-muted mb-0">Cargando historial…</p>`;
+        }
+        if (!registros.length) {
+            return `<p class="text-muted mb-0">Sin cambios de estado registrados.</p>`;
+        }
+        const items = registros
+            .map((registro) => {
+                const anterior = obtenerConfigEstado(registro.estado_anterior);
+                const nuevo = obtenerConfigEstado(registro.estado_nuevo);
+                const responsable = registro.responsable
+                    ? escapeHtml(registro.responsable.nombre)
+                    : "Sin registro";
+                return `<li><span>${formatearFecha(registro.fecha)}</span><strong>${escapeHtml(
+                    (anterior && anterior.label) || registro.estado_anterior || "-"
+                )} → ${escapeHtml(
+                    (nuevo && nuevo.label) || registro.estado_nuevo || "-"
+                )} (${responsable})</strong></li>`;
+            })
+            .join("");
+        return `<ul class="denuncia-card__detail-list">${items}</ul>`;
+    }
+
+    function pintarHistorial(denunciaId) {
+        document
+            .querySelectorAll(`[data-historial-denuncia="${denunciaId}"]`)
+            .forEach((seccion) => {
+                const titulo = seccion.querySelector("h6");
+                seccion.innerHTML = "";
+                if (titulo) {
+                    seccion.appendChild(titulo);
+                }
+                seccion.insertAdjacentHTML(
+                    "beforeend",
+                    construirHistorialHtml(historialPorId.get(denunciaId))
+                );
+            });
+    }
+
+    async function cargarHistorial(denunciaIdPrioritaria) {
+        if (!historialUrl || historialPorId.has(denunciaIdPrioritaria)) {
+            return;
+        }
+
+        // Se aprovecha la misma petición para las demás tarjetas visibles.
+        const ids = new Set([denunciaIdPrioritaria]);
+        document.querySelectorAll("[data-historial-denuncia]").forEach((seccion) => {
+            const id = Number(seccion.dataset.historialDenuncia);
+            if (ids.size < MAXIMO_IDS_HISTORIAL && id && !historialPorId.has(id)) {
+                ids.add(id);
+            }
+        });
+
+        const url = new URL(historialUrl);
+        url.searchParams.set("ids", Array.from(ids).join(","));
+        try {
+            const respuesta = await fetch(url.toString(), {
+                headers: {
+                    Authorization: `Bearer ${token}`,
+                    Accept: "application/json",
+                },
+                credentials: "same-origin",
+            });
+            if (!respuesta.ok) {
+                throw new Error("No fue posible obtener el historial");
+            }
+            const data = await respuesta.json();
+            ids.forEach((id) => {
+                historialPorId.set(id, (data.historial || {})[String(id)] || []);
+                pintarHistorial(id);
+            });
+        } catch (error) {
+            console.error(error);
+        }
+    }
+
     function inicializarFormularioActualizacion(contenedor) {
         if (!contenedor) {
             return;
@@ -1410,7 +1688,7 @@
                     feedback.textContent = "Cambios guardados correctamente";
                     feedback.className = "feedback mt-2 text-success";
                 }
-                cargarDenuncias(filtrosActivos);
+                sincronizarDenuncias();
             } catch (error) {
                 console.error(error);
                 if (feedback) {
@@ -1433,6 +1711,18 @@
 
     function centrarDenunciaEnMapa(denunciaId, { enfocarFormulario = false } = {}) {
         const marker = marcadoresPorId.get(Number(denunciaId));
+        const denuncia = denunciasPorId.get(Number(denunciaId));
+
+        if (!marker && denuncia && denuncia.latitud && denuncia.longitud) {
+            // El marcador está fuera del recuadro cargado: se abre al refrescar el mapa.
+            marcadorPendienteDeAbrir = Number(denunciaId);
+            map.setView(
+                [denuncia.latitud, denuncia.longitud],
+                Math.max(map.getZoom(), 15),
+                { animate: true }
+            );
+            return;
+        }
 
         if (!marker) {
             mostrarMensajeGlobal(
@@ -1796,6 +2086,24 @@
         modalImagen.show();
     });
 
+    map.on("moveend", programarCargaMarcadores);
+
+    // "toggle" no burbujea: se escucha en fase de captura.
+    document.addEventListener(
+        "toggle",
+        (event) => {
+            const detalle = event.target;
+            if (!detalle.open || !detalle.classList.contains("denuncia-card__details")) {
+                return;
+            }
+            const seccion = detalle.querySelector("[data-historial-denuncia]");
+            if (seccion) {
+                cargarHistorial(Number(seccion.dataset.historialDenuncia));
+            }
+        },
+        true
+    );
+
     filtrosForm.addEventListener("submit", (event) => {
         event.preventDefault();
         const filtros = {
@@ -1808,10 +2116,15 @@
     });
 
     recargarBtn.addEventListener("click", () => {
-        cargarDenuncias(filtrosActivos);
+        sincronizarDenuncias();
     });
 
     cargarDenuncias();
+    setInterval(() => {
+        if (!document.hidden) {
+            sincronizarDenuncias();
+        }
+    }, INTERVALO_SINCRONIZACION_MS);
 
     async function extraerMensajeDeError(respuesta) {
         const generico = "No se pudieron guardar los cambios";